@@ -0,0 +1,55 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Compares :func:`~pyzx.simplify.interior_clifford_simp` with and without the
+:class:`~pyzx.dense.DenseCore` on random Clifford+T circuits with few T gates,
+which turn into dense graph states. Usage::
+
+    python benchmarks/dense.py [qubits-depth ...]"""
+
+import sys
+import os
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.generate import cliffordT
+from pyzx.simplify import interior_clifford_simp, SimpStats
+
+DEFAULT = ['10-2000', '20-5000', '30-10000']
+
+def bench(qubits, depth, dense, seed=1337):
+    random.seed(seed)
+    g = cliffordT(qubits, depth, p_t=0.05)
+    with SimpStats() as stats:
+        t = time.time()
+        interior_clifford_simp(g, quiet=True, dense=dense)
+        t = time.time() - t
+    summary = stats.summary()
+    rewrites = sum(summary[r]['matches'] for r in ('pivot_simp', 'lcomp_simp', 'dense_pass') if r in summary)
+    return t, rewrites, g.num_vertices(), g.num_edges()
+
+if __name__ == '__main__':
+    sizes = sys.argv[1:] or DEFAULT
+    print("circuit".ljust(10), "mode".rjust(6), "time".rjust(9), "rewrites".rjust(9),
+          "per sec".rjust(9), "vertices".rjust(9), "edges".rjust(7))
+    for size in sizes:
+        qubits, depth = (int(x) for x in size.split('-'))
+        for dense in (False, True):
+            t, n, verts, edges = bench(qubits, depth, dense)
+            print(size.ljust(10), ("dense" if dense else "sparse").rjust(6), "{:.2f}s".format(t).rjust(9),
+                  str(n).rjust(9), "{:.0f}".format(n/t).rjust(9), str(verts).rjust(9), str(edges).rjust(7))
@@ -0,0 +1,57 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Times :func:`~pyzx.extract.streaming_extract` on the circuits in
+``circuits/QFT_and_Adders`` after they have been simplified with
+:func:`~pyzx.simplify.full_reduce`. Usage::
+
+    python benchmarks/extract.py [circuit ...]
+
+By default all the ``_before`` circuits up to 32 qubits are used."""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.circuit import Circuit
+from pyzx.simplify import full_reduce
+from pyzx.extract import streaming_extract
+
+CIRCUIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'circuits', 'QFT_and_Adders')
+DEFAULT = ['QFT8_before', 'QFT16_before', 'QFT32_before', 'Adder8_before', 'Adder16_before',
+           'Adder32_before', 'QFTAdd8_before', 'QFTAdd16_before', 'QFTAdd32_before']
+
+def bench(name):
+    c = Circuit.load(os.path.join(CIRCUIT_DIR, name))
+    g = c.to_graph()
+    t = time.time()
+    full_reduce(g)
+    t_reduce = time.time() - t
+    verts = g.num_vertices()
+    t = time.time()
+    c2 = streaming_extract(g)
+    t_extract = time.time() - t
+    return verts, t_reduce, t_extract, len(c2.gates)
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or DEFAULT
+    print("circuit".ljust(16), "vertices".rjust(9), "reduce".rjust(9), "extract".rjust(9), "gates".rjust(7))
+    for name in names:
+        verts, t_reduce, t_extract, gates = bench(name)
+        print(name.ljust(16), str(verts).rjust(9), "{:.2f}s".format(t_reduce).rjust(9),
+              "{:.2f}s".format(t_extract).rjust(9), str(gates).rjust(7))
@@ -0,0 +1,72 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Times how long ``import pyzx`` and starting ``python -m pyzx`` take, in fresh
+interpreters, minus the time it takes to start an interpreter that does nothing. Usage::
+
+    python benchmarks/imports.py [--repeat N] [--limit MS]
+
+The best time of ``--repeat`` runs is reported, as that is the least affected by other
+processes. With ``--limit`` it exits with status 1 when ``import pyzx`` takes longer
+than that many milliseconds. It also lists the heavy modules that got imported,
+which should be none of them."""
+
+import sys
+import os
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY = ['numpy', 'matplotlib', 'IPython', 'multiprocessing']
+COMMANDS = [
+    ('nothing', ['-c', 'pass']),
+    ('import pyzx', ['-c', 'import pyzx']),
+    ('pyzx opt --help', ['-m', 'pyzx', 'opt', '--help']),
+]
+
+def best_time(args, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        t = time.perf_counter() - t
+        if best is None or t < best: best = t
+    return best
+
+def heavy_modules():
+    code = "import sys, pyzx; print(' '.join(m for m in {!r} if m in sys.modules))".format(HEAVY)
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, stdout=subprocess.PIPE,
+                         universal_newlines=True, check=True).stdout
+    return out.split()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time the start-up of PyZX")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=float, default=None,
+                        help='maximum number of milliseconds import pyzx is allowed to take')
+    options = parser.parse_args()
+    times = {name: best_time(args, options.repeat) for name, args in COMMANDS}
+    base = times['nothing']
+    for name, _ in COMMANDS[1:]:
+        print(name.ljust(20), "{:7.1f}ms".format((times[name] - base)*1000))
+    heavy = heavy_modules()
+    print("heavy modules".ljust(20), ', '.join(heavy) if heavy else 'none')
+    import_time = (times['import pyzx'] - base)*1000
+    if options.limit is not None and import_time > options.limit:
+        print("import pyzx takes {:.1f}ms, more than the limit of {:.1f}ms".format(import_time, options.limit))
+        sys.exit(1)
@@ -0,0 +1,57 @@
+# PyZX - Python library for quantum circuit rewriting 
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Compares the list-based :class:`Mat2` with the bit-packed :class:`Mat2Packed`
+on random square matrices. Usage::
+
+    python benchmarks/linalg.py [size ...]
+
+The list-based version is skipped for sizes above 1000, as it takes far too long."""
+
+import sys
+import os
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.linalg import Mat2, Mat2Packed
+
+def timed(f, *args, **kwargs):
+    t = time.time()
+    f(*args, **kwargs)
+    return time.time() - t
+
+def bench(n, seed=1337):
+    random.seed(seed)
+    data = [[random.randint(0,1) for _ in range(n)] for _ in range(n)]
+    results = []
+    for cls in (Mat2, Mat2Packed):
+        if cls is Mat2 and n > 1000:
+            results.append((cls.__name__, '-', '-'))
+            continue
+        m = cls([list(r) for r in data])
+        t_rank = timed(m.rank)
+        t_inv = timed(m.inverse)
+        results.append((cls.__name__, "{:.3f}s".format(t_rank), "{:.3f}s".format(t_inv)))
+    return results
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [500, 5000]
+    print("size".rjust(6), "class".rjust(12), "rank".rjust(10), "inverse".rjust(10))
+    for n in sizes:
+        for name, t_rank, t_inv in bench(n):
+            print(str(n).rjust(6), name.rjust(12), t_rank.rjust(10), t_inv.rjust(10))
@@ -0,0 +1,116 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Times :func:`~pyzx.optimize.basic_optimization` on the Arithmetic_and_Toffoli circuits.
+Usage::
+
+    python benchmarks/optimize.py [repeat]
+
+Every circuit is repeated ``repeat`` times (1 by default) to see how the time scales with
+the length of a circuit. Besides the gate, T and two-qubit counts before and after, the
+time spent on putting the gates in order in the passes of the
+:class:`~pyzx.optimize.Optimizer` is shown, both for the list based sorting it used before
+and for the :class:`~pyzx.gatedag.GateDAG` it uses now."""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.circuit import Circuit, ZPhase, XPhase
+from pyzx.optimize import basic_optimization, Optimizer
+from pyzx.gatedag import GateDAG
+
+CIRCUIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'circuits',
+                           'Arithmetic_and_Toffoli')
+
+def list_sort(gates):
+    """The ordering of the gates as it was done in ``Optimizer.topological_sort_gates``."""
+    output = []
+    while any(gates.values()):
+        available_indices = set()
+        for q, gs in gates.items():
+            while gs:
+                g = gs[0]
+                if g.name not in ('CZ', 'CNOT'):
+                    output.append(gs.pop(0))
+                elif g.index in available_indices:
+                    available_indices.remove(g.index)
+                    q2 = g.target if q == g.control else g.control
+                    gates[q2].remove(g)
+                    output.append(gs.pop(0))
+                else:
+                    ty = 1 if (g.name == 'CZ' or g.control == q) else 2
+                    available_indices.add(g.index)
+                    remove = []
+                    for i, g2 in enumerate(gs[1:]):
+                        if (ty == 1 and isinstance(g2, ZPhase)) or (ty == 2 and isinstance(g2, XPhase)):
+                            output.append(g2)
+                            remove.append(i)
+                        elif g2.name not in ('CZ', 'CNOT'): break
+                        elif (ty == 1 and (g2.name == 'CZ' or g2.control == q)) or (ty == 2 and g2.name == 'CNOT' and g2.target == q):
+                            if g2.index in available_indices:
+                                available_indices.remove(g2.index)
+                                q2 = g2.target if q == g2.control else g2.control
+                                gates[q2].remove(g2)
+                                output.append(g2)
+                                remove.append(i)
+                            else:
+                                available_indices.add(g2.index)
+                        else:
+                            break
+                    for i in reversed(remove):
+                        gs.pop(i+1)
+                    break
+    return output
+
+def timed(f, *args):
+    t = time.perf_counter()
+    f(*args)
+    return time.perf_counter() - t
+
+class TimedOptimizer(Optimizer):
+    """Times both ways of sorting the gates of every pass."""
+    def __init__(self, circuit):
+        super().__init__(circuit)
+        self.sort_times = [0.0, 0.0]
+
+    def topological_sort_gates(self):
+        lists = {q: list(gs) for q, gs in self.gates.items()}
+        self.sort_times[0] += timed(list_sort, lists)
+        lists = {q: list(gs) for q, gs in self.gates.items()}
+        self.sort_times[1] += timed(lambda: GateDAG.from_qubit_lists(self.qubits, lists).to_gates())
+        return super().topological_sort_gates()
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    print("{:30} {:>6} {:>6} {:>6} {:>6} {:>9} {:>9} {:>9}".format("circuit", "gates", "after",
+          "T", "2q", "optimize", "list", "dag"))
+    total = [0.0, 0.0, 0.0]
+    for name in sorted(os.listdir(CIRCUIT_DIR)):
+        if not name.endswith('_before'): continue
+        c = Circuit.load(os.path.join(CIRCUIT_DIR, name)).to_basic_gates()
+        c.gates = [g.copy() for _ in range(repeat) for g in c.gates]
+        t = time.perf_counter()
+        c2 = basic_optimization(c.copy())
+        t = time.perf_counter() - t
+        o = TimedOptimizer(c.copy())
+        o.parse_circuit()
+        times = [t] + o.sort_times
+        total = [a+b for a, b in zip(total, times)]
+        print("{:30} {:6d} {:6d} {:6d} {:6d} {:8.3f}s {:8.3f}s {:8.3f}s".format(name, len(c.gates),
+              len(c2.gates), c2.tcount(), c2.twoqubitcount(), *times), flush=True)
+    print("{:30} {:6} {:6} {:6} {:6} {:8.3f}s {:8.3f}s {:8.3f}s".format("total", "", "", "", "", *total))
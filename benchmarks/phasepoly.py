@@ -0,0 +1,104 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Times building the phase polynomial of wide CNOT+CZ+T blocks. Usage::
+
+    python benchmarks/phasepoly.py [qubits ...] [--full]
+
+For every number of qubits (16, 32 and 64 by default) a random block of ten gates per
+qubit is made. Its phase polynomial is built in two ways: with terms that are bitmasks,
+as :func:`~pyzx.phasepoly.optimize_block` does using
+:class:`~pyzx.phasepoly.BitPolynomial`, and with the string-keyed
+:class:`~pyzx.phasepoly.BoolPolynomial` it used before. :func:`~pyzx.todd.phase_gates_to_poly`
+is timed as well. With ``--full`` the whole of
+:func:`~pyzx.phasepoly.optimize_block` is timed too, which is dominated by the CNOT
+synthesis for wide blocks."""
+
+import sys
+import os
+import time
+import random
+from fractions import Fraction
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.circuit import CNOT, CZ, ZPhase
+from pyzx.phasepoly import BitPolynomial, BoolPolynomial, optimize_block
+from pyzx.todd import phase_gates_to_poly
+
+def random_block(qubits, gates):
+    random.seed(1337)
+    block = []
+    for _ in range(gates):
+        r = random.random()
+        a, b = random.sample(range(qubits), 2)
+        if r < 0.5: block.append(CNOT(a, b))
+        elif r < 0.6: block.append(CZ(a, b))
+        else: block.append(ZPhase(a, Fraction(random.choice([1,3,5,7]), 4)))
+    return block
+
+def string_polynomial(block, qubits):
+    variables = ['x{:03d}'.format(i) for i in range(qubits)]
+    phase_poly = BoolPolynomial()
+    expression_polys = []
+    for i in range(qubits):
+        p = BoolPolynomial()
+        p.add_term(variables[i],1)
+        expression_polys.append(p)
+    for g in block:
+        if isinstance(g, ZPhase):
+            terms = expression_polys[g.target].terms
+            if len(terms) == 1: term = list(terms.keys())[0]
+            else: term = "({})".format("+".join(t[0] for t in terms.keys()))
+            phase_poly.add_term(term, g.phase)
+        elif isinstance(g, CZ):
+            phase_poly.add_polynomial(expression_polys[g.target]*expression_polys[g.control])
+        elif isinstance(g, CNOT):
+            expression_polys[g.target].add_polynomial(expression_polys[g.control])
+    return phase_poly
+
+def bit_polynomial(block, qubits):
+    phase_poly = BitPolynomial(modulus=2)
+    parity_phases = {}
+    expressions = [1 << i for i in range(qubits)]
+    for g in block:
+        if isinstance(g, ZPhase):
+            par = expressions[g.target]
+            if par & (par - 1): parity_phases[par] = (parity_phases.get(par, 0) + g.phase) % 2
+            else: phase_poly.add_term(par, g.phase)
+        elif isinstance(g, CZ):
+            phase_poly.add_polynomial(BitPolynomial.parity(expressions[g.target])*
+                                      BitPolynomial.parity(expressions[g.control]))
+        elif isinstance(g, CNOT):
+            expressions[g.target] ^= expressions[g.control]
+    return phase_poly, parity_phases
+
+def timed(f, *args):
+    t = time.perf_counter()
+    f(*args)
+    return time.perf_counter() - t
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:] if not a.startswith('--')]
+    full = '--full' in sys.argv
+    print("qubits  gates    strings   bitmasks  phase_gates_to_poly" + ("  optimize_block" if full else ""))
+    for q in args or [16, 32, 64]:
+        block = random_block(q, 10*q)
+        line = "{:6d} {:6d} {:9.3f}s {:9.3f}s {:19.3f}s".format(q, len(block),
+                timed(string_polynomial, block, q), timed(bit_polynomial, block, q),
+                timed(phase_gates_to_poly, [g for g in block if not isinstance(g, ZPhase) or
+                                            g.phase.denominator == 4], q))
+        if full: line += " {:14.3f}s".format(timed(optimize_block, block, q))
+        print(line, flush=True)
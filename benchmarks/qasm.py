@@ -0,0 +1,99 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Times the QASM parser on a large generated file. Usage::
+
+    python benchmarks/qasm.py [gates] [--memory]
+
+A file with ``gates`` random Clifford+T gates (two million by default) on 64 qubits and
+a thousand custom gate definitions is written to a temporary directory. It is then
+parsed in four ways: by reading the whole file and calling
+:meth:`~pyzx.circuit.QASMParser.parse`, by :meth:`~pyzx.circuit.QASMParser.parse_stream`
+on the open file, by the same storing the gates in a :class:`~pyzx.gatelist.GateList`,
+and by only counting the gates generated by
+:meth:`~pyzx.circuit.QASMParser.iter_gates`. With ``--memory`` the peak memory use
+of each is measured with :mod:`tracemalloc` as well, which makes them slower."""
+
+import sys
+import os
+import time
+import random
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.circuit import QASMParser
+
+QUBITS = 64
+CUSTOM = 1000
+
+def write_qasm(fname, gates):
+    random.seed(1337)
+    with open(fname, 'w') as f:
+        f.write('OPENQASM 2.0;\ninclude "qelib1.inc";\n')
+        for i in range(CUSTOM):
+            f.write('gate g{:d} a, b {{\n  h b;\n  cx a, b;\n  t b;\n}}\n'.format(i))
+        f.write('qreg q[{:d}];\n'.format(QUBITS))
+        for _ in range(gates):
+            r = random.random()
+            a, b = random.sample(range(QUBITS), 2)
+            if r < 0.4: f.write('cx q[{:d}],q[{:d}];\n'.format(a, b))
+            elif r < 0.6: f.write('h q[{:d}];\n'.format(a))
+            elif r < 0.8: f.write('t q[{:d}];\n'.format(a))
+            elif r < 0.99: f.write('rz(pi/2) q[{:d}];\n'.format(a))
+            else: f.write('g{:d} q[{:d}],q[{:d}];\n'.format(random.randrange(CUSTOM), a, b))
+
+def parse_text(fname):
+    with open(fname) as f:
+        return len(QASMParser().parse(f.read()).gates)
+
+def parse_stream(fname):
+    with open(fname) as f:
+        return len(QASMParser().parse_stream(f).gates)
+
+def parse_compact(fname):
+    with open(fname) as f:
+        return len(QASMParser().parse_stream(f, compact=True).gates)
+
+def count_gates(fname):
+    with open(fname) as f:
+        return sum(1 for _ in QASMParser().iter_gates(f))
+
+def bench(f, fname, memory=False):
+    if memory: tracemalloc.start()
+    t = time.perf_counter()
+    n = f(fname)
+    t = time.perf_counter() - t
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return n, t, peak
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    gates = int(args[0]) if args else 2000000
+    memory = '--memory' in sys.argv
+    with tempfile.TemporaryDirectory() as d:
+        fname = os.path.join(d, 'circuit.qasm')
+        write_qasm(fname, gates)
+        print("{:d} gates, {:.1f}MB".format(gates, os.path.getsize(fname)/2**20))
+        for name, f in [('parse(text)', parse_text), ('parse_stream', parse_stream),
+                        ('compact', parse_compact), ('iter_gates', count_gates)]:
+            n, t, peak = bench(f, fname, memory)
+            print(name.ljust(14), "{:9d} gates".format(n), "{:7.2f}s".format(t),
+                  "{:9.1f}MB peak".format(peak/2**20) if peak is not None else "")
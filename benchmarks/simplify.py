@@ -0,0 +1,71 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Times :func:`~pyzx.simplify.full_reduce` on Clifford+T inputs: the circuits in
+``circuits/QFT_and_Adders`` and random circuits made by :func:`~pyzx.generate.cliffordT`.
+Usage::
+
+    python benchmarks/simplify.py [circuit ...] [--workers 1,2,4]
+
+Random circuits are given as ``random-<qubits>-<depth>``. With ``--workers`` every
+circuit is reduced once for each of the given numbers of worker processes, to see how
+the parallel Clifford simplification scales. This only makes sense on a machine with
+at least that many cores."""
+
+import sys
+import os
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.circuit import Circuit
+from pyzx.generate import cliffordT
+from pyzx.simplify import full_reduce, tcount
+
+CIRCUIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'circuits', 'QFT_and_Adders')
+DEFAULT = ['Adder16_before', 'Adder32_before', 'Adder64_before', 'QFTAdd32_before',
+           'random-20-5000', 'random-50-20000']
+
+def load(name, seed=1337):
+    if name.startswith('random-'):
+        random.seed(seed)
+        qubits, depth = name.split('-')[1:]
+        return cliffordT(int(qubits), int(depth))
+    return Circuit.load(os.path.join(CIRCUIT_DIR, name)).to_graph()
+
+def bench(name, workers=1):
+    g = load(name)
+    verts = g.num_vertices()
+    t = time.time()
+    full_reduce(g, quiet=True, workers=workers)
+    return verts, time.time() - t, g.num_vertices(), tcount(g)
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    workers = [1]
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = [int(w) for w in args[i+1].split(',')]
+        del args[i:i+2]
+    names = args or DEFAULT
+    print("circuit".ljust(16), "workers".rjust(7), "vertices".rjust(9), "reduce".rjust(9),
+          "left".rjust(7), "tcount".rjust(7))
+    for name in names:
+        for w in workers:
+            verts, t_reduce, left, t = bench(name, w)
+            print(name.ljust(16), str(w).rjust(7), str(verts).rjust(9),
+                  "{:.2f}s".format(t_reduce).rjust(9), str(left).rjust(7), str(t).rjust(7), flush=True)
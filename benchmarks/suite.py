@@ -0,0 +1,263 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark suite for the whole optimisation pipeline, whose results can be compared
+between versions of PyZX. Usage::
+
+    python benchmarks/suite.py run [--suite fast|full] [--repeat N] [-o results.json] [--baseline old.json]
+    python benchmarks/suite.py compare old.json new.json
+
+Every workload is a circuit from ``circuits/Fast``, ``circuits/Arithmetic_and_Toffoli``
+or ``circuits/QFT_and_Adders``, or a random circuit made by :func:`~pyzx.generate.cliffordT`.
+It goes through the stages ``parse`` (loading and converting to basic gates, or generating
+the circuit), ``to_graph``, ``full_reduce``, ``extract`` and ``optimize``
+(:func:`~pyzx.optimize.basic_optimization`). The wall time of every stage is measured
+``--repeat`` times. After that the pipeline is run once more with :mod:`tracemalloc`
+enabled, to find the peak memory of every stage. The T-count and two-qubit gate count of
+the output are recorded as well.
+
+``compare`` reports, for every stage, whether it is slower than in the baseline. It only
+flags a slowdown when a permutation test on the measured times gives a p-value below
+``--alpha``, and the median time is more than ``--threshold`` slower. It also flags peak
+memory growing by more than ``--memory-threshold``, and any increase of the T-count or
+two-qubit gate count of the output. It exits with status 1 when anything is flagged.
+The test needs enough samples to detect anything: with 5 repeats on both sides the
+smallest possible p-value is 1/252."""
+
+import sys
+import os
+import time
+import json
+import random
+import fnmatch
+import platform
+import argparse
+import itertools
+import tracemalloc
+from statistics import mean, median
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.circuit import Circuit
+from pyzx.generate import cliffordT
+from pyzx.simplify import full_reduce, tcount
+from pyzx.extract import streaming_extract
+from pyzx.optimize import basic_optimization
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+STAGES = ['parse', 'to_graph', 'full_reduce', 'extract', 'optimize']
+SUITES = {
+    'fast': (['Fast'], ['cliffordT-8-400', 'cliffordT-16-1000']),
+    'full': (['Fast', 'Arithmetic_and_Toffoli', 'QFT_and_Adders'],
+             ['cliffordT-8-400', 'cliffordT-16-1000', 'cliffordT-32-4000']),
+}
+SEED = 1337
+
+
+def workloads(suite, pattern=None):
+    """Returns the names of the workloads in the suite. Circuit files are named by their
+    directory and file name. Only the inputs are used, not the optimised versions that
+    are stored next to them."""
+    dirs, generated = SUITES[suite]
+    names = []
+    for d in dirs:
+        for f in sorted(os.listdir(os.path.join(ROOT, 'circuits', d))):
+            if f.find('before') == -1 and (f.find('tpar') != -1 or
+                    os.path.splitext(f)[1] not in ('.qc', '.tfc')):
+                continue
+            names.append(d + '/' + f)
+    names.extend(generated)
+    if pattern: names = [n for n in names if fnmatch.fnmatch(n, pattern)]
+    return names
+
+def _stages(name):
+    """Generates the stages of the pipeline for the workload as (stage, function) pairs,
+    where every function gets the output of the previous one."""
+    if name.startswith('cliffordT-'):
+        qubits, depth = (int(x) for x in name.split('-')[1:])
+        def parse(_):
+            random.seed(SEED)
+            return cliffordT(qubits, depth)
+        yield 'parse', parse
+    else:
+        path = os.path.join(ROOT, 'circuits', *name.split('/'))
+        yield 'parse', lambda _: Circuit.load(path).to_basic_gates()
+        yield 'to_graph', lambda c: c.to_graph()
+    def reduce(g):
+        full_reduce(g, quiet=True)
+        return g
+    yield 'full_reduce', reduce
+    yield 'extract', lambda g: streaming_extract(g, quiet=True)
+    yield 'optimize', lambda c: basic_optimization(c.to_basic_gates()).to_basic_gates()
+
+def _run_pipeline(name, memory=False):
+    random.seed(SEED)
+    x = None
+    measured = {}
+    if memory: tracemalloc.start()
+    try:
+        for stage, f in _stages(name):
+            if memory:
+                tracemalloc.clear_traces()
+                base = tracemalloc.get_traced_memory()[0]
+                x = f(x)
+                measured[stage] = tracemalloc.get_traced_memory()[1] - base
+            else:
+                t = time.perf_counter()
+                x = f(x)
+                measured[stage] = time.perf_counter() - t
+            if stage == 'full_reduce': reduced_tcount = tcount(x)
+    finally:
+        if memory: tracemalloc.stop()
+    output = {'tcount': x.tcount(), 'twoqubit': x.twoqubitcount(),
+              'gates': len(x.gates), 'reduced_tcount': reduced_tcount}
+    return measured, output
+
+def run_workload(name, repeat):
+    """Runs the pipeline on the workload ``repeat`` times, and once more to measure memory."""
+    stages = {}
+    for _ in range(repeat):
+        times, output = _run_pipeline(name)
+        for stage, t in times.items():
+            stages.setdefault(stage, {'times': []})['times'].append(t)
+    peaks, _ = _run_pipeline(name, memory=True)
+    for stage, peak in peaks.items():
+        stages[stage]['peak_memory'] = peak
+    return {'stages': stages, 'output': output}
+
+def run(suite='fast', repeat=5, pattern=None, quiet=False):
+    results = {'meta': {'suite': suite, 'repeat': repeat, 'python': platform.python_version(),
+                        'platform': platform.platform(), 'date': time.strftime('%Y-%m-%d %H:%M:%S')},
+               'workloads': {}}
+    for name in workloads(suite, pattern):
+        if not quiet: print(name.ljust(45), end=' ', flush=True)
+        try:
+            r = run_workload(name, repeat)
+        except Exception as e:
+            r = {'error': '{}: {!s}'.format(type(e).__name__, e)}
+        results['workloads'][name] = r
+        if not quiet:
+            if 'error' in r: print(r['error'])
+            else:
+                total = sum(median(s['times']) for s in r['stages'].values())
+                print("{:8.3f}s  T-count {:5d}  2-qubit {:5d}".format(
+                    total, r['output']['tcount'], r['output']['twoqubit']))
+    return results
+
+
+def permutation_pvalue(old, new, rounds=10000, seed=SEED):
+    """Returns the one-sided p-value of the hypothesis that the samples ``new`` have a
+    larger mean than ``old``, using a permutation test. All ways of splitting the
+    samples are tried if there are at most ``rounds`` of them, otherwise ``rounds``
+    random ones."""
+    pooled = list(old) + list(new)
+    n, total = len(new), sum(pooled)
+    observed = mean(new) - mean(old)
+    def diff(s):
+        return s/n - (total - s)/(len(pooled) - n)
+    count = 0
+    splits = 0
+    combinations = 1
+    for k in range(n): combinations = combinations*(len(pooled) - k)//(k + 1)
+    if combinations <= rounds:
+        for idx in itertools.combinations(range(len(pooled)), n):
+            splits += 1
+            if diff(sum(pooled[i] for i in idx)) >= observed - 1e-12: count += 1
+    else:
+        rng = random.Random(seed)
+        for _ in range(rounds):
+            splits += 1
+            if diff(sum(rng.sample(pooled, n))) >= observed - 1e-12: count += 1
+    return count / splits
+
+def compare(baseline, results, alpha=0.05, threshold=0.05, memory_threshold=0.1):
+    """Compares two results of :func:`run` and returns a list of the regressions,
+    each a tuple ``(workload, stage, kind, description)``."""
+    flagged = []
+    for name, new in results['workloads'].items():
+        old = baseline['workloads'].get(name)
+        if old is None or 'error' in old: continue
+        if 'error' in new:
+            flagged.append((name, '-', 'error', new['error']))
+            continue
+        for stage in STAGES:
+            if stage not in new['stages'] or stage not in old['stages']: continue
+            o, n = old['stages'][stage], new['stages'][stage]
+            mo, mn = median(o['times']), median(n['times'])
+            if mn > mo*(1 + threshold):
+                p = permutation_pvalue(o['times'], n['times'])
+                if p < alpha:
+                    flagged.append((name, stage, 'time', "{:.4f}s -> {:.4f}s ({:+.0%}, p={:.3f})".format(
+                        mo, mn, mn/mo - 1, p)))
+            po, pn = o.get('peak_memory'), n.get('peak_memory')
+            if po and pn and pn > po*(1 + memory_threshold):
+                flagged.append((name, stage, 'memory', "{:.2f}MB -> {:.2f}MB".format(
+                    po/2**20, pn/2**20)))
+        for key in ('tcount', 'twoqubit'):
+            if new['output'][key] > old['output'][key]:
+                flagged.append((name, '-', key, "{:d} -> {:d}".format(old['output'][key], new['output'][key])))
+    return flagged
+
+def print_regressions(flagged):
+    if not flagged:
+        print("No regressions")
+        return
+    print("{} regressions:".format(len(flagged)))
+    for name, stage, kind, desc in flagged:
+        print(name.ljust(45), stage.ljust(12), kind.ljust(9), desc)
+
+
+parser = argparse.ArgumentParser(description="PyZX benchmark suite")
+commands = parser.add_subparsers(dest='command')
+p_run = commands.add_parser('run', help='run the benchmarks')
+p_run.add_argument('--suite', choices=sorted(SUITES), default='fast')
+p_run.add_argument('--repeat', type=int, default=5, help='number of timed runs of every workload')
+p_run.add_argument('--filter', type=str, default=None, dest='pattern',
+                   help='only run the workloads matching this glob pattern')
+p_run.add_argument('-o', type=str, default='benchmark-results.json', dest='output',
+                   help='file to write the results to')
+p_run.add_argument('--baseline', type=str, default=None, help='results to compare to afterwards')
+p_compare = commands.add_parser('compare', help='compare results to a baseline')
+p_compare.add_argument('baseline', type=str)
+p_compare.add_argument('results', type=str)
+for p in (p_run, p_compare):
+    p.add_argument('--alpha', type=float, default=0.05, help='significance level of slowdowns')
+    p.add_argument('--threshold', type=float, default=0.05,
+                   help='smallest relative slowdown that is reported')
+    p.add_argument('--memory-threshold', type=float, default=0.1, dest='memory_threshold',
+                   help='smallest relative growth of peak memory that is reported')
+
+def main(args):
+    options = parser.parse_args(args)
+    if options.command == 'run':
+        results = run(options.suite, options.repeat, options.pattern)
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=1)
+        print("Results written to {}".format(options.output))
+        if not options.baseline: return 0
+        with open(options.baseline) as f: baseline = json.load(f)
+    elif options.command == 'compare':
+        with open(options.baseline) as f: baseline = json.load(f)
+        with open(options.results) as f: results = json.load(f)
+    else:
+        parser.print_help()
+        return 2
+    flagged = compare(baseline, results, options.alpha, options.threshold, options.memory_threshold)
+    print_regressions(flagged)
+    return 1 if flagged else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,63 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Compares the bit-packed TODD implementation to the list-based one. Usage::
+
+    python benchmarks/todd.py [--packed-only] [circuit ...]
+
+Every circuit (by default a few from ``circuits/Fast``) is cleaned up with
+:func:`~pyzx.optimize.basic_optimization` and then optimised with
+:func:`~pyzx.optimize.phase_block_optimize`, once with :data:`~pyzx.todd.USE_PACKED`
+set and once without. Both runs use the same random seed, and as the two
+implementations apply the same matches they should give the same T-count. The
+list-based one is very slow on the bigger circuits, which ``--packed-only`` skips."""
+
+import sys
+import os
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyzx.circuit import Circuit
+from pyzx.optimize import basic_optimization, phase_block_optimize
+from pyzx import todd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT = ['tof_3_before', 'barenco_tof_4_before', 'mod5_4_before', 'tof_5_before',
+           'gf2^4_mult_before', 'gf2^5_mult_before']
+SEED = 1337
+
+def run(c, packed):
+    todd.USE_PACKED = packed
+    random.seed(SEED)
+    t = time.perf_counter()
+    c2 = phase_block_optimize(c.to_basic_gates())
+    return c2.tcount(), time.perf_counter() - t
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    packed_only = '--packed-only' in sys.argv
+    print("circuit".ljust(24), "T-count", "  packed", "    list", " speedup")
+    for name in args or DEFAULT:
+        path = name if os.path.exists(name) else os.path.join(ROOT, 'circuits', 'Fast', name)
+        c = basic_optimization(Circuit.load(path).to_basic_gates())
+        tc, tp = run(c, True)
+        line = "{} {:3d} -> {:3d} {:7.2f}s".format(os.path.basename(name).ljust(24), c.tcount(), tc, tp)
+        if not packed_only:
+            tc2, tl = run(c, False)
+            line += " {:7.2f}s {:7.1f}x".format(tl, tl/tp)
+            if tc2 != tc: line += "  (list-based T-count {:d})".format(tc2)
+        print(line, flush=True)
@@ -17,21 +17,41 @@
 
 from .graph.graph import Graph
 from .linalg import Mat2
-from .drawing import *
 from .simplify import *
 from .io import *
-from .tensor import *
 from .circuit import Circuit
-from . import quantomatic
 from . import generate
-from . import todd
 from . import linalg
-from . import extract
 from . import rules
-from . import optimize
 from . import simplify
-from . import d3
-from . import tikz
+
+# The modules below need numpy, matplotlib or IPython, or are only used by some
+# scripts, so they are only imported when one of their names is first accessed.
+# This keeps 'import pyzx' and 'python -m pyzx' fast.
+_lazy_modules = ['drawing', 'tensor', 'quantomatic', 'todd', 'extract', 'optimize',
+                 'phasepoly', 'verify', 'batch', 'd3', 'tikz']
+_lazy_names = {
+    'draw': 'drawing', 'pack_circuit_nf': 'drawing',
+    'tensorfy': 'tensor', 'compare_tensors': 'tensor', 'compose_tensors': 'tensor',
+    'adjoint': 'tensor', 'is_unitary': 'tensor', 'plan_contraction': 'tensor',
+    'ContractionPlan': 'tensor',
+}
+
+def __getattr__(name):
+    from importlib import import_module
+    if name in _lazy_names:
+        value = getattr(import_module('.' + _lazy_names[name], __name__), name)
+    elif name in _lazy_modules:
+        value = import_module('.' + name, __name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_names) | set(_lazy_modules))
+
+__all__ = sorted(set(n for n in globals() if not n.startswith('_')) | set(_lazy_names) | set(_lazy_modules))
 
 if __name__ == '__main__':
     print("Please execute this as a module by running 'python -m pyzx'")
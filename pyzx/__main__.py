@@ -20,6 +20,7 @@ Run one of the scripts supplied with PyZX.
 
 The options for command are:
     opt   -- Optimise a circuit using PyZX
+    batch -- Optimise many circuits in parallel
     tikz  -- Convert a circuit into a Tikz file
 
 For help on the arguments for these commands run for instance 'python -m pyzx opt --help'
@@ -28,13 +29,10 @@ For help on the arguments for these commands run for instance 'python -m pyzx op
 if __name__ == '__main__':
     import sys
     import argparse
-    try:
-        from .scripts import circ2circ
-        from .scripts import circ2tikz
-    except SystemError:
+    if __package__ is None:
         print("Please run as a module by using 'python -m pyzx'")
         exit(1)
-    
+
     parser = argparse.ArgumentParser(prog="PyZX", description="PyZX commandline interface",
                                      usage=usage_string)
     parser.add_argument('command', help='Command to run')
@@ -42,12 +40,18 @@ if __name__ == '__main__':
         parser.print_help()
         exit(1)
     args = parser.parse_args(sys.argv[1:2])
-    if args.command not in ('opt', 'tikz'):
+    if args.command not in ('opt', 'tikz', 'batch'):
         print("Unrecognized command '{}'".format(args.command))
         parser.print_help()
         exit(1)
 
+    # Only the script that is run is imported, to keep the startup time short
     if args.command == 'opt':
+              from .scripts import circ2circ
               circ2circ.main(sys.argv[2:])
     if args.command == 'tikz':
+              from .scripts import circ2tikz
               circ2tikz.main(sys.argv[2:])
+    if args.command == 'batch':
+              from .scripts import batch
+              batch.main(sys.argv[2:])
@@ -0,0 +1,174 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""This module optimises many circuits at once. Every circuit goes through the usual
+pipeline: it is loaded, converted to basic gates and to a graph, simplified with
+:func:`~simplify.full_reduce`, extracted again with :func:`~extract.streaming_extract`
+and cleaned up with :func:`~optimize.basic_optimization`.
+
+Every circuit is handled in its own process, with at most ``workers`` of them running
+at the same time. This way a circuit that runs out of time or memory, or that
+crashes its process, only loses its own result. The results are yielded as soon as
+they are ready, so that they can be written away one by one. This is also available
+from the command line as ``python -m pyzx batch``."""
+
+import os
+import fnmatch
+from collections import deque
+from timeit import default_timer as _timer
+
+try:
+    import multiprocessing as mp
+    from multiprocessing.connection import wait
+except ImportError:
+    mp = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+__all__ = ['optimize_circuit', 'batch_optimize', 'circuit_files']
+
+
+def circuit_files(sources, pattern=None):
+    """Returns the list of circuit files given by ``sources``, which is a list of
+    files and directories. Directories are replaced by the files in them, in sorted order,
+    leaving out hidden files and ``.qgraph`` files. If ``pattern`` is given, only the
+    files in directories whose name matches this glob pattern are used."""
+    if isinstance(sources, str): sources = [sources]
+    files = []
+    for s in sources:
+        if not os.path.isdir(s):
+            files.append(s)
+            continue
+        for f in sorted(os.listdir(s)):
+            path = os.path.join(s, f)
+            if f.startswith('.') or f.endswith('.qgraph') or not os.path.isfile(path): continue
+            if pattern and not fnmatch.fnmatch(f, pattern): continue
+            files.append(path)
+    return files
+
+def optimize_circuit(path, simplifier='full', output_dir=None, dense=False):
+    """Runs the optimisation pipeline described at the top of this module on the circuit
+    stored at ``path``. If ``simplifier`` is ``'cliff'``, :func:`~simplify.clifford_simp`
+    is used instead of :func:`~simplify.full_reduce`. If ``output_dir`` is given, the
+    optimised circuit is written there as a QASM file. Returns a dictionary with the
+    statistics of the circuit before and after, and the time taken by each step."""
+    from .circuit import Circuit
+    from .simplify import full_reduce, clifford_simp
+    from .extract import streaming_extract
+    from .optimize import basic_optimization
+
+    start = _timer()
+    c = Circuit.load(path).to_basic_gates()
+    result = {'circuit': path, 'name': os.path.basename(path), 'status': 'ok',
+              'qubits': c.qubits, 'gates': len(c.gates), 'tcount': c.tcount(),
+              'twoqubit': c.twoqubitcount()}
+    g = c.to_graph()
+    t = _timer()
+    if simplifier == 'cliff': clifford_simp(g, quiet=True, dense=dense)
+    else: full_reduce(g, quiet=True, dense=dense)
+    result['time_simplify'] = _timer() - t
+    t = _timer()
+    c2 = streaming_extract(g, quiet=True)
+    result['time_extract'] = _timer() - t
+    c2 = basic_optimization(c2.to_basic_gates()).to_basic_gates()
+    result.update({'gates_after': len(c2.gates), 'tcount_after': c2.tcount(),
+                   'twoqubit_after': c2.twoqubitcount()})
+    if output_dir is not None:
+        dest = os.path.join(output_dir, os.path.splitext(result['name'])[0] + '.qasm')
+        c2.save(dest, 'qasm')
+        result['output'] = dest
+    result['time'] = _timer() - start
+    return result
+
+
+def _worker(path, conn, memory_limit, options):
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    try:
+        result = optimize_circuit(path, **options)
+    except MemoryError:
+        result = {'circuit': path, 'name': os.path.basename(path), 'status': 'memory'}
+    except Exception as e:
+        result = {'circuit': path, 'name': os.path.basename(path), 'status': 'error',
+                  'error': '{}: {!s}'.format(type(e).__name__, e)}
+    conn.send(result)
+    conn.close()
+
+def batch_optimize(sources, workers=None, timeout=None, memory_limit=None, pattern=None, **options):
+    """Optimises all the circuits given by ``sources`` (see :func:`circuit_files`) with
+    :func:`optimize_circuit`, and yields the resulting dictionaries in the order in
+    which the circuits finish. Their ``status`` is one of
+
+    - ``'ok'``: the circuit was optimised.
+    - ``'timeout'``: it took longer than ``timeout`` seconds and was stopped.
+    - ``'memory'``: it needed more than ``memory_limit`` bytes of memory.
+    - ``'error'``: an exception was raised, which is given as ``error``.
+    - ``'crashed'``: the process died, with exit code ``exitcode``.
+
+    :param workers: The number of circuits processed at the same time. Defaults to the
+        number of CPUs.
+    :param memory_limit: The maximum size in bytes of the address space of every process.
+        This is only supported on systems that have the :mod:`resource` module.
+    :param options: Passed on to :func:`optimize_circuit`.
+    """
+    if mp is None: raise ImportError("batch_optimize needs the multiprocessing module")
+    if workers is None: workers = mp.cpu_count()
+    pending = deque(circuit_files(sources, pattern))
+    running = {} # receiving end of the pipe --> (process, path, deadline)
+    try:
+        for result in _run_pool(pending, running, workers, timeout, memory_limit, options):
+            yield result
+    finally:
+        # Only left non-empty when the caller stopped early
+        for p, _, _ in running.values(): p.terminate()
+
+def _run_pool(pending, running, workers, timeout, memory_limit, options):
+    while pending or running:
+        while pending and len(running) < workers:
+            path = pending.popleft()
+            recv, send = mp.Pipe(duplex=False)
+            p = mp.Process(target=_worker, args=(path, send, memory_limit, options))
+            p.daemon = True
+            p.start()
+            send.close()
+            running[recv] = (p, path, _timer() + timeout if timeout is not None else None)
+        deadlines = [d for _,_,d in running.values() if d is not None]
+        wait_time = max(0, min(deadlines) - _timer()) if deadlines else None
+        # A closed pipe is also ready, so a crashed process is noticed as well
+        for recv in wait(list(running), wait_time):
+            p, path, _ = running.pop(recv)
+            try:
+                result = recv.recv()
+            except (EOFError, OSError):
+                p.join()
+                result = {'circuit': path, 'name': os.path.basename(path),
+                          'status': 'crashed', 'exitcode': p.exitcode}
+            recv.close()
+            p.join()
+            yield result
+        now = _timer()
+        for recv, (p, path, deadline) in list(running.items()):
+            if deadline is not None and now >= deadline:
+                p.terminate()
+                p.join()
+                recv.close()
+                del running[recv]
+                yield {'circuit': path, 'name': os.path.basename(path),
+                       'status': 'timeout', 'time': timeout}
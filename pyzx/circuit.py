@@ -16,6 +16,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import re
 from fractions import Fraction
 import copy
 import math
@@ -33,10 +34,19 @@ class Circuit(object):
 
     The methods in this class that convert a specification of a circuit into an instance of this class,
     generally do not check whether the specification is well-defined. If a bad input is given, 
-    the behaviour is undefined."""
-    def __init__(self, qubit_amount, name=''):
+    the behaviour is undefined.
+
+    If ``compact`` is True, the gates are stored in a :class:`~gatelist.GateList` instead
+    of a list, which uses a lot less memory for long circuits. It still behaves like a
+    list of gates: changing a gate that was taken from it changes the circuit as well.
+    This raises a RuntimeError if gates were inserted, removed or replaced since the gate
+    was taken, as its position may have changed; assign it with ``gates[i] = g`` then."""
+    def __init__(self, qubit_amount, name='', compact=False):
         self.qubits = qubit_amount
-        self.gates = []
+        if compact:
+            from .gatelist import GateList
+            self.gates = GateList()
+        else: self.gates = []
         self.name = name
 
     def __str__(self):
@@ -47,7 +57,19 @@ class Circuit(object):
 
     def copy(self):
         c = Circuit(self.qubits, self.name)
-        c.gates = [g.copy() for g in self.gates]
+        if self.is_compact(): c.gates = self.gates.copy()
+        else: c.gates = [g.copy() for g in self.gates]
+        return c
+
+    def is_compact(self):
+        """Returns whether the gates are stored in a :class:`~gatelist.GateList`."""
+        return type(self.gates) is not list
+
+    def to_compact(self):
+        """Returns a copy of the circuit that stores its gates in a :class:`~gatelist.GateList`."""
+        c = Circuit(self.qubits, self.name, compact=True)
+        c.gates.extend(self.gates)
+        c.gates = c.gates.copy()
         return c
 
     def adjoint(self):
@@ -138,15 +160,14 @@ class Circuit(object):
         
 
     @staticmethod
-    def from_qasm_file(fname):
+    def from_qasm_file(fname, compact=False):
         """Produces a :class:`Circuit` based on a QASM description of a circuit.
         It ignores all the non-unitary instructions like measurements in the file. 
-        It currently doesn't support custom gates that have parameters."""
-        f = open(fname, 'r')
-        s = f.read()
-        f.close()
+        It currently doesn't support custom gates that have parameters.
+        The file is parsed while it is read, see :meth:`QASMParser.parse_stream`."""
         p = QASMParser()
-        c = p.parse(s)
+        with open(fname, 'r') as f:
+            c = p.parse_stream(f, compact)
         c.name = os.path.basename(fname)
         return c
 
@@ -263,6 +284,9 @@ class Circuit(object):
         """Returns a new circuit with every gate expanded in terms of X/Z phases, Hadamards
         and the 2-qubit gates CNOT, CZ, CX."""
         c = Circuit(self.qubits, name=self.name)
+        if self.is_compact():
+            c.gates = self.gates.to_basic_gates()
+            return c
         for g in self.gates:
             c.gates.extend(g.to_basic_gates())
         return c
@@ -270,31 +294,7 @@ class Circuit(object):
     def split_phase_gates(self):
         c = Circuit(self.qubits, name=self.name)
         for g in self.gates:
-            if isinstance(g, (ZPhase, XPhase)):
-                if not g.phase: continue
-                if g.phase == 1:
-                    if isinstance(g, ZPhase): c.add_gate("Z", g.target)
-                    else: c.add_gate("NOT", g.target)
-                    continue
-                if isinstance(g, XPhase):
-                    c.add_gate("HAD", g.target)
-                if g.phase.denominator == 2:
-                    if g.phase.numerator % 4 == 1:
-                        c.add_gate("S", g.target)
-                    else: c.add_gate("S", g.target, adjoint=True)
-                elif g.phase.denominator == 4:   
-                    n = g.phase.numerator % 8
-                    if n == 3 or n == 5:
-                        c.add_gate("Z", g.target)
-                        n = (n-4)%8
-                    if n == 1: c.add_gate("T", g.target)
-                    if n == 7: c.add_gate("T", g.target, adjoint=True)
-                else:
-                    c.add_gate("ZPhase", g.target, g.phase)
-                if isinstance(g, XPhase):
-                    c.add_gate("HAD", g.target) 
-            else:
-                c.add_gate(g)
+            c.gates.extend(_split_phase(g))
         return c
 
     def to_graph(self, compress_rows=True, backend=None):
@@ -352,55 +352,94 @@ class Circuit(object):
 
         return g
 
+    def iter_quipper(self):
+        """Generates the lines of the Quipper ASCII description of the circuit.
+        The last line doesn't end with a newline."""
+        yield "Inputs: " + ", ".join("{!s}Qbit".format(i) for i in range(self.qubits)) + "\n"
+        for g in self.gates:
+            yield g.to_quipper() + "\n"
+        yield "Outputs: " + ", ".join("{!s}Qbit".format(i) for i in range(self.qubits))
+
+    def iter_qasm(self):
+        """Generates the lines of the QASM description of the circuit."""
+        yield "OPENQASM 2.0;\n"
+        yield "include \"qelib1.inc\";\n"
+        yield "qreg q[{!s}];\n".format(self.qubits)
+        for g in self.gates:
+            yield g.to_qasm() + "\n"
+
+    def iter_qc(self):
+        """Generates the lines of the .qc description of the circuit."""
+        yield ".v " + " ".join("q{:d}".format(i) for i in range(self.qubits)) + "\n"
+        yield "\n"
+        yield "BEGIN\n"
+        for g in self.gates:
+            for h in _split_phase(g):
+                yield h.to_qc() + "\n"
+        yield "END\n"
+
     def to_quipper(self):
         """Produces a Quipper ASCII description of the circuit."""
-        s = "Inputs: " + ", ".join("{!s}Qbit".format(i) for i in range(self.qubits)) + "\n"
-        for g in self.gates:
-            s += g.to_quipper() + "\n"
-        s += "Outputs: " + ", ".join("{!s}Qbit".format(i) for i in range(self.qubits))
-        return s
+        return "".join(self.iter_quipper())
 
     def to_qasm(self):
         """Produces a QASM description of the circuit."""
-        s = """OPENQASM 2.0;\ninclude "qelib1.inc";\n"""
-        s += "qreg q[{!s}];\n".format(self.qubits)
-        for g in self.gates:
-            s += g.to_qasm() + "\n"
-        return s
+        return "".join(self.iter_qasm())
 
     def to_qc(self):
         """Produces a .qc description of the circuit."""
-        s = ".v " + " ".join("q{:d}".format(i) for i in range(self.qubits))
-        s += "\n\nBEGIN\n"
-        c = self.split_phase_gates()
-        for g in c.gates:
-            s += g.to_qc() + "\n"
-        s += "END\n"
-        return s
-
+        return "".join(self.iter_qc())
+
+    def write(self, f, format='qasm', buffer_size=1<<16):
+        """Writes the description of the circuit in the given ``format`` (``'qasm'``,
+        ``'qc'`` or ``'quipper'``) to the file object ``f``. The lines are generated
+        one gate at a time and written in chunks of about ``buffer_size`` characters,
+        so that the whole description is never in memory at once."""
+        if format not in _writers:
+            raise TypeError("Unsupported circuit format {}. Please use qasm, qc or quipper".format(format))
+        lines = _writers[format](self)
+        chunk = []
+        size = 0
+        for l in lines:
+            chunk.append(l)
+            size += len(l)
+            if size >= buffer_size:
+                f.write("".join(chunk))
+                chunk = []
+                size = 0
+        if chunk: f.write("".join(chunk))
+
+    def save(self, fname, format=None, buffer_size=1<<16):
+        """Writes the circuit to the file ``fname`` with :meth:`write`. If ``format`` is
+        not given it is taken from the extension of ``fname``, where ``.quipper`` and
+        ``.quip`` are Quipper, ``.qc`` is .qc and everything else QASM."""
+        if format is None:
+            ext = os.path.splitext(fname)[1].lower()
+            format = 'qc' if ext == '.qc' else 'quipper' if ext in ('.quipper', '.quip') else 'qasm'
+        with open(fname, 'w') as f:
+            self.write(f, format, buffer_size)
 
     def to_tensor(self):
         """Returns a numpy tensor describing the circuit."""
         return self.to_graph().to_tensor()
 
-    def verify_equality(self, other):
-        """Composes the other circuit with the adjoint of this circuit, and tries to reduce
-        it to the identity using :func:`simplify.full_reduce``. If successful returns True,
-        if not returns None. 
+    def verify_equality(self, other, budget=None, report=False):
+        """Composes the other circuit with the adjoint of this circuit, and tries to show
+        it is the identity. First the gates the circuits have in common at their start and
+        at their end are cancelled. What is left is reduced using :func:`simplify.full_reduce`,
+        for at most ``budget`` seconds if given, and when that is not conclusive and the
+        circuit is small the tensors are compared. See :mod:`verify` for the details.
+        Returns True if the circuits were shown to be equal and False otherwise.
+        If ``report`` is True a :class:`verify.VerificationReport` is returned instead,
+        which also says which of these steps decided the result.
 
         Note that while a successful reduction to the identity is strong evidence that the two
         circuits are equal, if this function is not able to reduce the graph to the identity
         this does not prove anything. """
-        from .simplify import full_reduce
-        c = self.adjoint()
-        c.add_circuit(other)
-        g = c.to_graph()
-        full_reduce(g)
-        if g.num_vertices() == self.qubits*2:
-            return True
-        else:
-            return False
-                    
+        from .verify import verify_equality
+        r = verify_equality(self, other, budget=budget)
+        if report: return r
+        return bool(r)
 
     def add_gate(self, gate, *args, **kwargs):
         """Adds a gate to the circuit. ``gate`` can either be 
@@ -453,36 +492,23 @@ class Circuit(object):
 
     def tcount(self):
         """Returns the amount of T-gates necessary to implement this circuit."""
+        if self.is_compact(): return self.gates.tcount()
         return sum(g.tcount() for g in self.gates)
         #return sum(1 for g in self.gates if isinstance(g, (ZPhase, XPhase, ParityPhase)) and g.phase.denominator >= 4)
     
     def twoqubitcount(self):
         """Returns the amount of 2-qubit gates necessary to implement this circuit."""
+        if self.is_compact(): return self.gates.twoqubitcount()
         c = self.to_basic_gates()
         return sum(1 for g in c.gates if g.name in ('CNOT','CZ'))
 
     def stats(self):
         """Returns statistics on the amount of gates in the circuit, separated into different classes 
         (such as amount of T-gates, two-qubit gates, Hadamard gates)."""
-        total = 0
-        tcount = 0
-        twoqubit = 0
-        hadamard = 0
-        clifford = 0
-        other = 0
-        for g in self.gates:
-            total += 1
-            tcount += g.tcount()
-            if isinstance(g, (ZPhase, XPhase)):
-                if g.phase.denominator <= 2: clifford += 1
-            elif isinstance(g, HAD):
-                hadamard += 1
-                clifford += 1
-            elif isinstance(g, (CZ,CX, CNOT)):
-                twoqubit += 1
-                clifford += 1
-            else:
-                other += 1
+        if self.is_compact():
+            total, tcount, clifford, twoqubit, hadamard, other = self.gates.counts()
+        else:
+            total, tcount, clifford, twoqubit, hadamard, other = _gate_counts(self.gates)
         s = """Circuit {} on {} qubits with {} gates.
         {} is the T-count
         {} Cliffords among which 
@@ -492,6 +518,57 @@ class Circuit(object):
             s += "\nThere are {} gates of a different type".format(other)
         return s
 
+def _gate_counts(gates):
+    """Returns the total number of gates, the T-count and the number of Clifford gates,
+    two-qubit gates, Hadamard gates and other gates. See :meth:`Circuit.stats`."""
+    total = 0
+    tcount = 0
+    twoqubit = 0
+    hadamard = 0
+    clifford = 0
+    other = 0
+    for g in gates:
+        total += 1
+        tcount += g.tcount()
+        if isinstance(g, (ZPhase, XPhase)):
+            if g.phase.denominator <= 2: clifford += 1
+        elif isinstance(g, HAD):
+            hadamard += 1
+            clifford += 1
+        elif isinstance(g, (CZ,CX, CNOT)):
+            twoqubit += 1
+            clifford += 1
+        else:
+            other += 1
+    return total, tcount, clifford, twoqubit, hadamard, other
+
+_writers = {'qasm': Circuit.iter_qasm, 'qc': Circuit.iter_qc, 'quipper': Circuit.iter_quipper}
+
+def _split_phase(g):
+    """Generates the gates that :meth:`Circuit.split_phase_gates` replaces the gate ``g`` with."""
+    if not isinstance(g, (ZPhase, XPhase)):
+        yield g
+        return
+    if not g.phase: return
+    if g.phase == 1:
+        yield Z(g.target) if isinstance(g, ZPhase) else NOT(g.target)
+        return
+    if isinstance(g, XPhase):
+        yield HAD(g.target)
+    if g.phase.denominator == 2:
+        yield S(g.target, adjoint=(g.phase.numerator % 4 != 1))
+    elif g.phase.denominator == 4:
+        n = g.phase.numerator % 8
+        if n == 3 or n == 5:
+            yield Z(g.target)
+            n = (n-4)%8
+        if n == 1: yield T(g.target)
+        if n == 7: yield T(g.target, adjoint=True)
+    else:
+        yield ZPhase(g.target, g.phase)
+    if isinstance(g, XPhase):
+        yield HAD(g.target)
+
 def determine_file_type(circuitfile):
         """Tries to figure out in which format the file is given (quipper, qasm or qc)"""
         fname = circuitfile
@@ -622,6 +699,20 @@ def quipper_center_block(fname):
     lines = text.splitlines()[3:]
     return parse_quipper_block(lines)
 
+# Splits a line of QASM on the characters that end a statement or a gate body
+_qasm_delimiters = re.compile(r'([;{}])')
+
+def _parse_qasm_angle(val):
+    """Returns the angle ``val`` as a multiple of pi. This is either a number in radians
+    or an expression like ``pi/4``, ``-3*pi/4`` or ``0.5*pi``."""
+    val = val.replace(' ', '')
+    if 'pi' not in val:
+        return Fraction(float(val)/math.pi).limit_denominator(100000000)
+    num, _, den = val.partition('/')
+    num = num.replace('*pi', '').replace('pi*', '').replace('pi', '')
+    num = Fraction(-1 if num == '-' else 1 if num in ('', '+') else num)
+    return num / Fraction(den) if den else num
+
 class QASMParser(object):
     """Class for parsing QASM source files into circuit descriptions."""
     def __init__(self):
@@ -632,40 +723,75 @@ class QASMParser(object):
         self.circuit = None
 
     def parse(self, s):
-        lines = s.splitlines()
-        r = []
-        #strip comments
-        for s in lines:
-            if s.find("//")!=-1:
-                t = s[0:s.find("//")].strip()
-            else: t = s.strip()
-            if t: r.append(t)
-        if not r[0].startswith("OPENQASM"):
-            raise TypeError("File does not start with OPENQASM descriptor")
-        if not r[1].startswith('include "qelib1.inc";'):
-            raise TypeError("File is not importing standard library")
-        data = "\n".join(r[2:])
-        # Strip the custom command definitions from the normal commands
-        while True:
-            i = data.find("gate ")
-            if i == -1: break
-            j = data.find("}", i)
-            self.parse_custom_gate(data[i:j+1])
-            data = data[:i] + data[j+1:]
-        #parse the regular commands
-        commands = [s.strip() for s in data.split(";") if s.strip()]
-        gates = []
-        for c in commands:
-            self.gates.extend(self.parse_command(c, self.registers))
-
-        circ = Circuit(self.qubit_count)
-        circ.gates = self.gates
+        """Parses the QASM program ``s`` and returns it as a :class:`Circuit`."""
+        return self.parse_stream(s.splitlines())
+
+    def parse_stream(self, lines, compact=False):
+        """Parses a QASM program given as an iterable of lines, like an open file, and
+        returns it as a :class:`Circuit`. The lines are read one by one, so that the text
+        of the program is never kept in memory as a whole. If ``compact`` is True, the
+        gates are stored in a :class:`~gatelist.GateList` as soon as they are read."""
+        circ = Circuit(0, compact=compact)
+        circ.gates.extend(self.iter_gates(lines))
+        circ.qubits = self.qubit_count
+        self.gates = circ.gates
         self.circuit = circ
         return self.circuit
 
+    def iter_gates(self, lines):
+        """Generates the gates of a QASM program given as an iterable of lines, as soon as
+        they are read. Statements can span several lines, and a line can contain
+        several statements. Custom gate definitions are stored in ``customgates`` and
+        :attr:`qubit_count` is updated whenever a register is declared, so that when the
+        generator is exhausted it holds the number of qubits of the circuit."""
+        header = 0 # the number of statements of the header that were read
+        pending = [] # the parts of the statement that is being read
+        spec = None # the start of the custom gate definition that is being read
+        body = []
+        for line in lines:
+            i = line.find("//")
+            if i != -1: line = line[:i]
+            for part in _qasm_delimiters.split(line):
+                if part == ';':
+                    c = " ".join(pending).strip()
+                    pending = []
+                    if not c: continue
+                    if spec is not None: body.append(c)
+                    elif header == 0:
+                        if not c.startswith("OPENQASM"):
+                            raise TypeError("File does not start with OPENQASM descriptor")
+                        header = 1
+                    elif header == 1:
+                        if c != 'include "qelib1.inc"':
+                            raise TypeError("File is not importing standard library")
+                        header = 2
+                    else:
+                        for g in self.parse_command(c, self.registers): yield g
+                elif part == '{':
+                    spec = " ".join(pending).strip()
+                    pending = []
+                    if header < 2 or not spec.startswith("gate "):
+                        raise TypeError("Unexpected {{ after {}".format(spec))
+                    body = []
+                elif part == '}':
+                    if spec is None: raise TypeError("Unexpected }")
+                    self._add_custom_gate(spec, body)
+                    spec = None
+                elif part.strip(): pending.append(part)
+        if header == 0: raise TypeError("File does not start with OPENQASM descriptor")
+        if header == 1: raise TypeError("File is not importing standard library")
+        if spec is not None or pending:
+            raise TypeError("Unexpected end of file after {}".format(spec or " ".join(pending)))
+
     def parse_custom_gate(self, data):
-        data = data[5:]
+        """Parses the definition ``gate name args { body }`` of a custom gate."""
         spec, body = data.split("{",1)
+        body = body.strip()[:-1]
+        self._add_custom_gate(spec.strip(), [s.strip() for s in body.split(";") if s.strip()])
+
+    def _add_custom_gate(self, spec, commands):
+        data = spec
+        spec = spec[5:]
         if "(" in spec:
             i = spec.find("(")
             j = spec.find(")")
@@ -690,8 +816,6 @@ class QASMParser(object):
             registers[a] = (qubit_count,1)
             qubit_count += 1
 
-        body = body[:-1].strip()
-        commands = [s.strip() for s in body.split(";") if s.strip()]
         circ = Circuit(qubit_count)
         for c in commands:
             for g in self.parse_command(c, registers):
@@ -751,16 +875,10 @@ class QASMParser(object):
                 i = name.find('(')
                 j = name.find(')')
                 if i == -1 or j == -1: raise TypeError("Invalid specification {}".format(name))
-                val = name[i+1:j]
                 try:
-                    phase = float(val)/math.pi
-                except ValueError:
-                    if not val.find('pi'): raise TypeError("Invalid specification {}".format(name))
-                    val.replace('pi', '')
-                    val.replace('*','')
-                    try: phase = float(val)
-                    except: raise TypeError("Invalid specification {}".format(name))
-                phase = Fraction(phase).limit_denominator(100000000)
+                    phase = _parse_qasm_angle(name[i+1:j])
+                except (ValueError, ZeroDivisionError):
+                    raise TypeError("Invalid specification {}".format(name))
                 if name.startswith('rx'): g = XPhase(argset[0],phase=phase)
                 else: g = ZPhase(argset[0],phase=phase)
                 gates.append(g)
@@ -20,11 +20,6 @@ from fractions import Fraction
 
 __all__ = ['init', 'draw']
 
-try:
-    from IPython.display import display, HTML
-except ImportError:
-    pass
-
 # Provides functions for displaying pyzx graphs in jupyter notebooks using d3
 
 _d3_display_seq = 0
@@ -43,6 +38,7 @@ def phase_to_s(a):
 
 def draw(g, scale=None):
     global _d3_display_seq
+    from IPython.display import display, HTML
 
     if not hasattr(g, 'vertices'):
         g = g.to_graph()
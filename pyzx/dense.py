@@ -0,0 +1,164 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""This module contains :class:`DenseCore`, a representation of the Z-spiders of a graph-like
+ZX-diagram and the Hadamard edges between them as a bit-packed adjacency matrix.
+In a graph-like diagram, local complementation and pivoting only toggle Hadamard edges
+between the neighbours of the vertices involved, which on this matrix comes down to
+XOR-ing a single bitmask into the row of every neighbour. This makes the rewrites cheap
+on the dense graph states produced by :func:`~simplify.interior_clifford_simp`.
+See :func:`~simplify.dense_pass` for how it is used."""
+
+from fractions import Fraction
+
+__all__ = ['DenseCore']
+
+
+def _bits(mask):
+    """Generates the indices of the bits that are set in ``mask``."""
+    while mask:
+        b = mask & -mask
+        yield b.bit_length() - 1
+        mask ^= b
+
+
+class DenseCore(object):
+    """The Z-spiders of a graph-like diagram ``g``, indexed ``0,...,n-1``, together with
+    the Hadamard edges between them. Spiders that are connected to anything else,
+    like a boundary, are *pinned*: their edges and phase can be changed by the rewrites,
+    but they are never removed. Every other spider is *interior*.
+
+    :ivar verts: The vertex of ``g`` corresponding to every index.
+    :ivar rows: For every index ``i`` an integer whose bit ``j`` is set when spiders
+        ``i`` and ``j`` are connected.
+    :ivar phases: The phase of every spider as an integer numerator over ``den``.
+    :ivar alive: A bitmask of the spiders that have not been removed.
+    :ivar pinned: A bitmask of the pinned spiders.
+    """
+    def __init__(self, g):
+        types = g.types()
+        ph = g.int_phases()
+        self.den = g.phase_denominator()
+        self.verts = [v for v in g.vertices() if types[v] == 1]
+        index = {v: i for i,v in enumerate(self.verts)}
+        self.phases = [ph[v] for v in self.verts]
+        self.rows = []
+        self.pinned = 0
+        for i,v in enumerate(self.verts):
+            row = 0
+            for w in g.neighbours(v):
+                j = index.get(w)
+                if j is not None and g.edge_type(g.edge(v,w)) == 2:
+                    row |= 1 << j
+                elif j is not None:
+                    raise ValueError("Diagram is not graph-like: spiders {} and {} "
+                                     "are connected by a regular edge".format(v, w))
+                else:
+                    self.pinned |= 1 << i
+            self.rows.append(row)
+        self._original = list(self.rows)
+        self._original_phases = list(self.phases)
+        self.alive = (1 << len(self.verts)) - 1
+
+    def _remove(self, mask):
+        rows = self.rows
+        for k in _bits(mask):
+            for l in _bits(rows[k] & ~mask):
+                rows[l] &= ~mask
+            rows[k] = 0
+        self.alive &= ~mask
+
+    def lcomp(self, i):
+        """Removes the interior spider ``i``, which should have phase ``pi/2`` or
+        ``3pi/2``, by complementing the edges of its neighbourhood."""
+        rows, phases = self.rows, self.phases
+        nb = rows[i]
+        a = phases[i]
+        mod = 2*self.den
+        for k in _bits(nb):
+            rows[k] ^= nb & ~(1 << k)
+            phases[k] = (phases[k] - a) % mod
+        self._remove(1 << i)
+
+    def pivot(self, i, j):
+        """Removes the connected interior spiders ``i`` and ``j``, which should both have
+        phase 0 or ``pi``, by toggling the edges between their neighbourhoods."""
+        rows, phases = self.rows, self.phases
+        den = self.den
+        mod = 2*den
+        ij = (1 << i) | (1 << j)
+        ni = rows[i] & ~ij
+        nj = rows[j] & ~ij
+        n2 = ni & nj
+        n0 = ni & ~n2
+        n1 = nj & ~n2
+        a, b = phases[i], phases[j]
+        for k in _bits(n0):
+            rows[k] ^= n1 | n2
+            phases[k] = (phases[k] + b) % mod
+        for k in _bits(n1):
+            rows[k] ^= n0 | n2
+            phases[k] = (phases[k] + a) % mod
+        for k in _bits(n2):
+            rows[k] ^= n0 | n1
+            phases[k] = (phases[k] + a + b + den) % mod
+        self._remove(ij)
+
+    def simplify(self):
+        """Keeps applying :meth:`lcomp` and :meth:`pivot` to interior spiders until
+        none are left that these apply to. Returns the number of rewrites."""
+        rows, phases = self.rows, self.phases
+        den = self.den
+        todo = set(_bits(self.alive & ~self.pinned))
+        count = 0
+        while todo:
+            i = todo.pop()
+            if not (self.alive >> i) & 1: continue
+            p = phases[i]
+            if 2*p == den or 2*p == 3*den:
+                touched = rows[i]
+                self.lcomp(i)
+            elif p % den == 0:
+                j = next((k for k in _bits(rows[i] & ~self.pinned) if phases[k] % den == 0), None)
+                if j is None: continue
+                touched = (rows[i] | rows[j]) & ~((1 << i) | (1 << j))
+                self.pivot(i, j)
+            else: continue
+            count += 1
+            todo.update(_bits(touched & ~self.pinned))
+        return count
+
+    def write_back(self, g):
+        """Changes ``g``, the graph this was made from, so that its spiders, phases and
+        Hadamard edges match those of this core again. Vertices of ``g`` that are not part
+        of the core are left alone."""
+        verts = self.verts
+        add, remove = [], []
+        for i in _bits(self.alive):
+            diff = (self.rows[i] ^ self._original[i]) & self.alive
+            for j in _bits(diff >> (i+1)):
+                j += i+1
+                e = g.edge(verts[i], verts[j])
+                if (self.rows[i] >> j) & 1: add.append(e)
+                else: remove.append(e)
+            if self.phases[i] != self._original_phases[i]:
+                g.set_phase(verts[i], Fraction(self.phases[i], self.den))
+        g.remove_edges(remove)
+        g.add_edges(add, 2)
+        g.remove_vertices([verts[i] for i in range(len(verts)) if not (self.alive >> i) & 1])
+        self._original = list(self.rows)
+        self._original_phases = list(self.phases)
@@ -17,11 +17,6 @@
 
 __all__ = ['draw', 'pack_circuit_nf']
 
-try:
-    import matplotlib.pyplot as plt
-    from matplotlib import patches, lines, path
-except:
-    plt = None
 from fractions import Fraction
 import math
 
@@ -121,6 +116,9 @@ def circuit_layout(g,keys = ('r','q')):
 def draw(g, layout=None, labels=False, figsize=(8,2), h_edge_draw='blue', rows=None):
     if not isinstance(g, BaseGraph):
         g = g.to_graph()
+    # matplotlib is only imported when something is drawn, as importing it is slow
+    import matplotlib.pyplot as plt
+    from matplotlib import patches, lines, path
     fig1 = plt.figure(figsize=figsize)
     ax = fig1.add_axes([0, 0, 1, 1], frameon=False)
     ax.xaxis.set_visible(False)
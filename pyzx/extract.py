@@ -22,7 +22,7 @@ __all__ = ['clifford_extract', 'streaming_extract']
 from fractions import Fraction
 import itertools
 
-from .linalg import Mat2, greedy_reduction, column_optimal_swap
+from .linalg import Mat2, Mat2Packed, IncrementalBasis, greedy_reduction, column_optimal_swap
 from .graph import Graph
 from .simplify import id_simp, tcount
 from .rules import match_spider_parallel, spider
@@ -30,7 +30,11 @@ from .circuit import Circuit, ParityPhase, CNOT, HAD, ZPhase, CZ, InitAncilla
 
 
 def bi_adj(g, vs, ws):
-    return Mat2([[1 if g.connected(v,w) else 0 for v in vs] for w in ws])
+    rows = []
+    for w in ws:
+        nw = set(g.neighbours(w))
+        rows.append([1 if v in nw else 0 for v in vs])
+    return Mat2(rows)
 
 def cut_rank(g, left, right):
     return bi_adj(g, left, right).rank()
@@ -42,7 +46,8 @@ def cut_edges(g, left, right, available=None):
         r = g.row(v)
         if (r > max_r):
             g.set_row(v, r+2)
-    x,y = m.factor()
+    x,y = Mat2Packed(m.data).factor()
+    x,y = x.to_mat2(), y.to_mat2()
 
     for v1 in left:
         for v2 in right:
@@ -104,9 +109,83 @@ def connectivity_from_biadj(g, m, left, right, edgetype=2):
             elif not m.data[i][j] and g.connected(right[i],left[j]):
                 g.remove_edge((right[i],left[j]))
 
+class FrontierMatrix(object):
+    """The biadjacency matrix between the frontier of :func:`streaming_extract` (the rows)
+    and its neighbours on the right (the columns), together with a row-reduced basis of its
+    row space. Between calls to :meth:`update` only the rows of the vertices that entered
+    the frontier or whose connectivity changed are reduced again, instead of doing the
+    whole Gaussian elimination from scratch.
+    Columns are identified by a bit that stays the same as long as the vertex remains a
+    neighbour of the frontier, so the column order is not that of ``right``."""
+    def __init__(self, g):
+        self.g = g
+        self.basis = IncrementalBasis()
+        self.bit = {}       # right vertex -> column bit
+        self.colvert = {}   # column bit -> right vertex
+        self._free = []
+
+    def update(self, left, right):
+        """Brings the matrix up to date with the connectivity between ``left`` and ``right``."""
+        bit, colvert = self.bit, self.colvert
+        right = set(right)
+        for w in [w for w in bit if w not in right]:
+            b = bit.pop(w)
+            del colvert[b]
+            self._free.append(b)
+        for w in right:
+            if w not in bit:
+                b = self._free.pop() if self._free else len(bit) + len(self._free)
+                bit[w] = b
+                colvert[b] = w
+        rows = self.basis.rows
+        if len(rows) > len(left) or any(v not in rows for v in left):
+            l = set(left)
+            for v in [v for v in rows if v not in l]: self.basis.remove_row(v)
+        for v in left:
+            row = 0
+            for w in self.g.neighbours(v):
+                if w in bit: row |= 1 << bit[w]
+            self.basis.update_row(v, row)
+
+    def has_unit_row(self):
+        """Whether some combination of frontier vertices is connected to a single vertex on the right."""
+        return self.basis.has_unit_vector()
+
+    def packed(self, left):
+        """Returns the matrix with its rows in the order of ``left`` as a :class:`~linalg.Mat2Packed`."""
+        return Mat2Packed([self.basis.rows[v] for v in left], len(self.bit) + len(self._free))
+
+    def replace_column(self, w, w2):
+        """The frontier is now connected to ``w2`` where it was connected to ``w``."""
+        b = self.bit.pop(w)
+        self.bit[w2] = b
+        self.colvert[b] = w2
+
+    def row_add(self, v1, v2):
+        """Adds the row of ``v1`` to that of ``v2``, and toggles the corresponding Hadamard
+        edges in the graph, which is what extracting a CNOT between them does."""
+        row1, row2 = self.basis.rows[v1], self.basis.rows[v2]
+        g = self.g
+        r = row1
+        while r:
+            b = (r & -r).bit_length() - 1
+            r &= r - 1
+            w = self.colvert[b]
+            if (row2 >> b) & 1: g.remove_edge(g.edge(v2,w))
+            else: g.add_edge((v2,w), 2)
+        self.basis.row_add(v1, v2)
+
+
 def streaming_extract(g, allow_ancillae=False, quiet=True, stopcount=-1):
     """Given a graph put into semi-normal form by :func:`simplify.full_reduce`, 
     it extracts its equivalent set of gates into an instance of :class:`circuit.Circuit`.
+
+    The vertices on the row ``leftrow`` form the frontier of the extraction. Everything on
+    a lower row has already been extracted, while the vertices on the higher rows still have
+    to be. The frontier is kept as an explicit list, so that advancing it only touches
+    the frontier and its neighbours. Instead of pushing every unextracted vertex one row
+    up when the frontier advances, the vertices that leave the frontier are moved one row
+    down. Both keep the same rows relative to the frontier.
     """
     g.normalise()
     qs = g.qubits() # We are assuming that these are objects that update...
@@ -129,10 +208,12 @@ def streaming_extract(g, allow_ancillae=False, quiet=True, stopcount=-1):
             special_nodes[n] = v
         if rs[v] > 1:
             g.set_row(v, rs[v]+20)
+    frontier = [v for v in g.vertices() if rs[v] == leftrow]
+    frontier_matrix = FrontierMatrix(g)
     
     tried_id_simp = False
     while True:
-        left = [v for v in g.vertices() if rs[v] == leftrow]
+        left = list(frontier)
         boundary_verts = []
         right = set()
         good_verts = []
@@ -220,10 +301,8 @@ def streaming_extract(g, allow_ancillae=False, quiet=True, stopcount=-1):
             if stopcount != -1 and len(c.gates) > stopcount: return c
             if have_removed_gadgets: continue
             right = list(right)
-            m = bi_adj(g,right,left)
-            m2 = m.copy()
-            m2.gauss(full_reduce=True)
-            if not any(sum(l)==1 for l in m2.data):
+            frontier_matrix.update(left, right)
+            if not frontier_matrix.has_unit_row():
                 if not tried_id_simp:
                     tried_id_simp = True
                     i = id_simp(g, matchf=lambda v: rs[v]>leftrow, quiet=True)
@@ -252,8 +331,10 @@ def streaming_extract(g, allow_ancillae=False, quiet=True, stopcount=-1):
                     for v in boundary_verts:
                         g.set_row(v, lr)
                     leftrow = lr
+                    near = set(frontier).union(*(g.neighbours(v) for v in frontier if v in rs))
+                    frontier = sorted(v for v in near if rs.get(v) == leftrow)
                 continue
-            sequence = greedy_reduction(m) # Find the optimal set of CNOTs we can apply to get a frontier we can work with
+            sequence = greedy_reduction(frontier_matrix.packed(left)) # Find the optimal set of CNOTs we can apply to get a frontier we can work with
             if not isinstance(sequence, list): # Couldn't find any reduction, hopefully we can fix this
                 right = set(right)
                 gates, success = try_greedy_cut(g, left, right, right.difference(special_nodes), quiet=quiet)
@@ -277,14 +358,10 @@ def streaming_extract(g, allow_ancillae=False, quiet=True, stopcount=-1):
                         g.remove_edge(e)
                         g.add_edge((left[control],w),2)
                         g.add_edge((w,v),3-et)
-                        k = right.index(v)
-                        right[k] = w
+                        frontier_matrix.replace_column(v, w)
                         break
-                for k in range(len(m.data[control])): # We update the graph to represent the extraction of a CNOT
-                    if not m.data[control][k]: continue
-                    if m.data[target][k]: g.remove_edge((left[target],right[k]))
-                    else: g.add_edge((left[target],right[k]), 2)
-                m.row_add(control, target)
+                # We update the graph to represent the extraction of a CNOT
+                frontier_matrix.row_add(left[control], left[target])
             for v in left:
                 d = [w for w in g.neighbours(v) if rs[w]>leftrow]
                 if len(d) == 1 and ty[d[0]] != 0:
@@ -292,13 +369,12 @@ def streaming_extract(g, allow_ancillae=False, quiet=True, stopcount=-1):
                     good_neighs.append(d[0])
             if not good_verts: continue
         
-        for v in g.vertices():
-            if rs[v] < leftrow: continue
-            if v in good_verts: continue
-            g.set_row(v,rs[v]+1) # Push the frontier one layer up
+        for v in good_verts:
+            g.set_row(v,leftrow-1) # Move the processed nodes out of the frontier
         for i,v in enumerate(good_neighs): 
-            g.set_row(v,leftrow+1) # Bring the new nodes of the frontier to the correct position
+            g.set_row(v,leftrow) # Bring the new nodes of the frontier to the correct position
             g.set_qubit(v,qs[good_verts[i]])
+        frontier = sorted(v for v in set(frontier).union(good_neighs) if rs[v] == leftrow)
 
         tried_id_simp = False
 
@@ -306,7 +382,6 @@ def streaming_extract(g, allow_ancillae=False, quiet=True, stopcount=-1):
             print("{:d}/{:d}".format(nodesparsed, nodestotal))
             nodesmarker = int(round(nodesparsed-5,-1))
             nodesmarker += 10
-        leftrow += 1
         if stopcount != -1 and len(c.gates) > stopcount: return c
             
     swap_map = {}
@@ -381,7 +456,7 @@ def try_greedy_cut(g, left, right, candidates, quiet=True):
         g.set_qubit(new_right[i],qs[j])
     new_right.sort(key=g.qubit)
     m = bi_adj(g, new_right, left)
-    gates = m.to_cnots(optimize=True)
+    gates = Mat2Packed(m.data).to_cnots(optimize=True)
     for cnot in gates:
         cnot.target = qs[cnot.target]
         cnot.control = qs[cnot.control]
@@ -0,0 +1,325 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""This module contains :class:`GateDAG`, which stores a circuit as a directed acyclic
+graph of gates. On every qubit the gates acting on it form a doubly linked list, and
+the first and last gate on every qubit are kept as well, so that gates can be added,
+removed and replaced anywhere in constant time.
+
+Which gates commute is read off from the lists: on a qubit, a gate is either Z-like
+(phase gates, CZs and the control of a CNOT), X-like (X phase gates and the target of a
+CNOT), or commutes with nothing (such as a Hadamard). Consecutive gates of the same
+type on a qubit commute with each other there, and two gates commute if they do so on
+every qubit they share. These runs of commuting gates are what :meth:`GateDAG.to_gates`
+and :meth:`GateDAG.simplify` use."""
+
+from collections import deque
+
+from fractions import Fraction
+
+from .circuit import ZPhase, Z, S, T, XPhase, NOT, HAD, CNOT, CZ
+
+__all__ = ['GateDAG', 'gate_qubits']
+
+# The types of a gate on one of its qubits
+_OTHER, _ZLIKE, _XLIKE = 0, 1, 2
+
+def gate_qubits(g):
+    """Returns the qubits the gate ``g`` acts on."""
+    qs = [getattr(g, a) for a in ("ctrl1", "ctrl2", "control", "target") if hasattr(g, a)]
+    if hasattr(g, "targets"): qs.extend(g.targets)
+    return qs
+
+# The types of the gates that are the same on all of their qubits, by name
+_TYPES = {'ZPhase': _ZLIKE, 'Z': _ZLIKE, 'S': _ZLIKE, 'T': _ZLIKE, 'CZ': _ZLIKE,
+          'CCZ': _ZLIKE, 'ParityPhase': _ZLIKE, 'XPhase': _XLIKE, 'NOT': _XLIKE,
+          'CX': _XLIKE, 'HAD': _OTHER, 'SWAP': _OTHER}
+
+def _gate_type(g, q):
+    t = _TYPES.get(g.name)
+    if t is not None: return t
+    if g.name in ('CNOT', 'Tof'): return _XLIKE if q == g.target else _ZLIKE
+    if isinstance(g, ZPhase): return _ZLIKE
+    if isinstance(g, XPhase): return _XLIKE
+    return _OTHER
+
+def _phase_gate(cls, q, phase):
+    """Returns the gate for the phase, or None if it is zero."""
+    if phase == 0: return None
+    if cls is XPhase: return NOT(q) if phase == 1 else XPhase(q, phase)
+    if phase == 1: return Z(q)
+    if phase.denominator == 2: return S(q, adjoint=(phase == Fraction(3,2)))
+    if phase.denominator == 4 and phase.numerator in (1, 7): return T(q, adjoint=(phase == Fraction(7,4)))
+    return ZPhase(q, phase)
+
+
+class GateDAG(object):
+    """A circuit on ``qubits`` qubits stored as a graph of gates, see the description
+    of this module. Every gate is a node, given by an integer.
+
+    :ivar gates: A dictionary from the nodes to their gates.
+    :ivar wires: A dictionary from the nodes to the tuple of qubits of their gate.
+    :ivar prev: For every node a dictionary from its qubits to the node before it on
+        that qubit, or None if it is the first.
+    :ivar next: The same for the node after it.
+    :ivar first: The first node on every qubit, or None if there is none.
+    :ivar last: The last node on every qubit, or None if there is none.
+    """
+    def __init__(self, qubits):
+        self.qubits = qubits
+        self.gates = {}
+        self.wires = {}
+        self.prev = {}
+        self.next = {}
+        self.first = [None]*qubits
+        self.last = [None]*qubits
+        self._nodes = 0
+
+    @staticmethod
+    def from_circuit(circuit):
+        """Returns a :class:`GateDAG` containing copies of the gates of ``circuit``."""
+        dag = GateDAG(circuit.qubits)
+        for g in circuit.gates: dag.add_gate(g.copy())
+        return dag
+
+    @staticmethod
+    def from_qubit_lists(qubits, gates):
+        """Returns a :class:`GateDAG` made from a ``{qubit: [list of gates]}`` dictionary,
+        where every gate is in the lists of all of its qubits. The gates on every qubit
+        only need to be in the right order up to commuting gates."""
+        dag = GateDAG(qubits)
+        nodes = {}
+        for q, gs in gates.items():
+            prev = None
+            for g in gs:
+                n = nodes.get(id(g))
+                if n is None:
+                    n = nodes[id(g)] = dag._new_node(g, ())
+                dag.prev[n][q] = prev
+                dag.next[n][q] = None
+                if prev is None: dag.first[q] = n
+                else: dag.next[prev][q] = n
+                prev = n
+            if prev is not None: dag.last[q] = prev
+        for n, p in dag.prev.items():
+            dag.wires[n] = tuple(p)
+        return dag
+
+    def __len__(self):
+        return len(self.gates)
+
+    def _new_node(self, g, wires):
+        n = self._nodes
+        self._nodes += 1
+        self.gates[n] = g
+        self.wires[n] = tuple(wires)
+        self.prev[n] = dict.fromkeys(wires)
+        self.next[n] = dict.fromkeys(wires)
+        return n
+
+    def add_gate(self, g):
+        """Adds the gate ``g`` at the end of the circuit and returns its node."""
+        n = self._new_node(g, gate_qubits(g))
+        for q in self.wires[n]:
+            p = self.last[q]
+            self.prev[n][q] = p
+            if p is None: self.first[q] = n
+            else: self.next[p][q] = n
+            self.last[q] = n
+        return n
+
+    def remove(self, n):
+        """Removes the node ``n``, connecting its neighbours on every qubit."""
+        for q in self.wires[n]:
+            p, s = self.prev[n][q], self.next[n][q]
+            if p is None: self.first[q] = s
+            else: self.next[p][q] = s
+            if s is None: self.last[q] = p
+            else: self.prev[s][q] = p
+        del self.gates[n], self.wires[n], self.prev[n], self.next[n]
+
+    def replace(self, n, g):
+        """Replaces the gate of ``n`` by ``g``, which must act on the same qubits."""
+        self.gates[n] = g
+        self.wires[n] = tuple(gate_qubits(g))
+
+    def gate_type(self, n, q):
+        """Returns 1 if the gate of ``n`` is Z-like on qubit ``q``, 2 if it is X-like, and 0
+        if it commutes with neither."""
+        return _gate_type(self.gates[n], q)
+
+    def commuting_after(self, n, q):
+        """Generates the nodes after ``n`` on qubit ``q`` up to the first one that doesn't
+        commute with it there."""
+        ty = _gate_type(self.gates[n], q)
+        if not ty: return
+        m = self.next[n][q]
+        while m is not None and _gate_type(self.gates[m], q) == ty:
+            yield m
+            m = self.next[m][q]
+
+    def neighbours(self, n):
+        """Returns the nodes right before and after ``n`` on its qubits."""
+        ns = [m for m in self.prev[n].values() if m is not None]
+        ns.extend(m for m in self.next[n].values() if m is not None)
+        return ns
+
+    def to_gates(self):
+        """Returns the gates in an order in which they can be applied. On every qubit the
+        runs of commuting gates are done one after the other, and a gate is placed as soon
+        as the runs it is in on all of its qubits are being done."""
+        runs = []
+        for q in range(self.qubits):
+            rs = []
+            ty = None
+            n = self.first[q]
+            while n is not None:
+                t = _gate_type(self.gates[n], q)
+                if not rs or not t or t != ty: rs.append([])
+                ty = t
+                rs[-1].append(n)
+                n = self.next[n][q]
+            runs.append(rs)
+        position = [0]*self.qubits
+        remaining = [len(rs[0]) if rs else 0 for rs in runs]
+        count = {}
+        ready = deque()
+        def start_run(q):
+            for n in runs[q][position[q]]:
+                c = count.get(n, 0) + 1
+                count[n] = c
+                if c == len(self.wires[n]): ready.append(n)
+        for q in range(self.qubits):
+            if runs[q]: start_run(q)
+        for n, ws in self.wires.items():
+            if not ws: ready.append(n)
+        output = []
+        while ready:
+            n = ready.popleft()
+            output.append(self.gates[n])
+            for q in self.wires[n]:
+                remaining[q] -= 1
+                if remaining[q] == 0:
+                    position[q] += 1
+                    if position[q] < len(runs[q]):
+                        remaining[q] = len(runs[q][position[q]])
+                        start_run(q)
+        if len(output) != len(self.gates):
+            raise ValueError("The order of the gates on different qubits is inconsistent")
+        return output
+
+    def simplify(self):
+        """Does local rewrites until none apply anymore, and returns the number of rewrites.
+        It cancels pairs of equal CNOTs or CZs and fuses phase gates, as long as only
+        commuting gates are in between. Pairs of Hadamards are removed, and Hadamards
+        are moved through CNOTs and CZs when that removes them:
+        H-CZ-H on one qubit becomes a CNOT, H-CNOT-H on its target a CZ, and a CNOT with
+        Hadamards on both sides of both qubits a reversed CNOT. H-S-H is turned into
+        S*-H-S*. After every rewrite only the nodes around it are looked at again."""
+        todo = deque(self.gates)
+        queued = set(todo)
+        rewrites = 0
+        while todo:
+            n = todo.popleft()
+            queued.discard(n)
+            if n not in self.gates: continue
+            touched = self._rewrite(n)
+            if touched is None: continue
+            rewrites += 1
+            for m in touched:
+                if m is not None and m in self.gates and m not in queued:
+                    todo.append(m)
+                    queued.add(m)
+        return rewrites
+
+    def _rewrite(self, n):
+        """Tries the rewrites that start at node ``n``. Returns the nodes that should be
+        looked at again if one applied, and None otherwise."""
+        g = self.gates[n]
+        if g.name == 'HAD': return self._rewrite_hadamard(n, g.target)
+        if isinstance(g, (ZPhase, XPhase)): return self._fuse_phases(n, g.target)
+        if g.name in ('CNOT', 'CZ'): return self._cancel_pair(n)
+        return None
+
+    def _remove_all(self, nodes):
+        touched = []
+        for m in nodes:
+            touched.extend(self.neighbours(m))
+            self.remove(m)
+        return touched
+
+    def _fuse_phases(self, n, q):
+        g = self.gates[n]
+        cls = ZPhase if isinstance(g, ZPhase) else XPhase
+        for m in self.commuting_after(n, q):
+            h = self.gates[m]
+            if isinstance(h, cls):
+                touched = self._remove_all([m])
+                p = _phase_gate(cls, q, (g.phase + h.phase) % 2)
+                if p is None: touched.extend(self._remove_all([n]))
+                else:
+                    self.replace(n, p)
+                    touched.append(n)
+                return touched
+        return None
+
+    def _cancel_pair(self, n):
+        g = self.gates[n]
+        a, b = g.control, g.target
+        if g.name == 'CZ':
+            def same(h): return h.name == 'CZ' and {h.control, h.target} == {a, b}
+        else:
+            def same(h): return h.name == 'CNOT' and h.control == a and h.target == b
+        candidates = set(m for m in self.commuting_after(n, a) if same(self.gates[m]))
+        if not candidates: return None
+        for m in self.commuting_after(n, b):
+            if m in candidates:
+                return self._remove_all([n, m])
+        return None
+
+    def _rewrite_hadamard(self, n, q):
+        m = self.next[n][q]
+        if m is None: return None
+        h = self.gates[m]
+        after = self.next[m][q]
+        h2 = self.gates[after] if after is not None else None
+        if h.name == 'HAD':
+            return self._remove_all([n, m])
+        if isinstance(h, ZPhase) and h.phase.denominator == 2 and h2 is not None and h2.name == 'HAD':
+            # H-S-H = S*-H-S*, up to global phase
+            phase = (-h.phase) % 2
+            self.replace(n, _phase_gate(ZPhase, q, phase))
+            self.replace(m, HAD(q))
+            self.replace(after, _phase_gate(ZPhase, q, phase))
+            return [n, m, after] + self.neighbours(n) + self.neighbours(after)
+        if h.name == 'CZ' and h2 is not None and h2.name == 'HAD':
+            other = h.control if h.target == q else h.target
+            self.replace(m, CNOT(other, q))
+            return self._remove_all([n, after]) + [m]
+        if h.name == 'CNOT':
+            other = h.control if h.target == q else h.target
+            if q == h.target and h2 is not None and h2.name == 'HAD':
+                self.replace(m, CZ(h.control, q))
+                return self._remove_all([n, after]) + [m]
+            before = self.prev[m][other]
+            after2 = self.next[m][other]
+            if (h2 is not None and h2.name == 'HAD' and
+                    before is not None and self.gates[before].name == 'HAD' and
+                    after2 is not None and self.gates[after2].name == 'HAD'):
+                self.replace(m, CNOT(h.target, h.control))
+                return self._remove_all([n, after, before, after2]) + [m]
+        return None
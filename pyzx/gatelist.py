@@ -0,0 +1,394 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""This module contains :class:`GateList`, a compact replacement for the list of gates
+of a :class:`~circuit.Circuit`. Instead of one Python object per gate, it stores the
+gates in parallel arrays: an opcode, up to three qubits and the numerator of the phase
+over a common denominator. This takes about 20 bytes per gate instead of several hundred.
+It behaves like a list of :class:`~circuit.Gate` objects, which are made on demand,
+so that code that reads or builds the gates of a circuit works unchanged. Changing a
+gate that was read from the list changes the list as well.
+Circuits using it are made with ``Circuit(qubits, compact=True)`` or
+:meth:`~circuit.Circuit.to_compact`."""
+
+from array import array
+from fractions import Fraction
+from math import gcd
+try:
+    from collections.abc import MutableSequence
+except ImportError:
+    from collections import MutableSequence
+
+from .circuit import ZPhase, Z, S, T, XPhase, NOT, HAD, CNOT, CZ, CX, SWAP, Tofolli, CCZ
+from .graph.base import phase_fractions, DEFAULT_PHASE_DENOMINATOR
+
+__all__ = ['GateList']
+
+# The shapes of the gates that can be stored in the arrays, given by the attributes they have
+_PHASE, _ADJOINT, _ONE, _TWO, _THREE = range(5)
+_FIELDS = [{'target', 'phase'}, {'target', 'phase', 'adjoint'}, {'target'},
+           {'control', 'target'}, {'ctrl1', 'ctrl2', 'target'}]
+_QUBIT_FIELDS = [f - {'phase', 'adjoint'} for f in _FIELDS]
+# Every opcode stands for a gate class, together with the value of ``adjoint`` for S and T
+_KINDS = [(ZPhase, None, _PHASE), (Z, None, _PHASE), (S, False, _ADJOINT), (S, True, _ADJOINT),
+          (T, False, _ADJOINT), (T, True, _ADJOINT), (XPhase, None, _PHASE), (NOT, None, _PHASE),
+          (HAD, None, _ONE), (CNOT, None, _TWO), (CZ, None, _TWO), (CX, None, _TWO),
+          (SWAP, None, _TWO), (Tofolli, None, _THREE), (CCZ, None, _THREE)]
+_OPCODES = {(cls, adj): op for op, (cls, adj, _) in enumerate(_KINDS)}
+# Gates that can't be stored in the arrays are kept as they are, and get this opcode
+_OBJECT = 255
+# The opcodes of the gates that are already basic gates, see Circuit.to_basic_gates
+_BASIC = {op for op, (cls, _, _) in enumerate(_KINDS) if cls not in (SWAP, Tofolli, CCZ)}
+# The opcodes that Circuit.stats counts as two-qubit Clifford gates
+_CLIFFORD_TWOQUBIT = [op for op, (cls, _, _) in enumerate(_KINDS) if issubclass(cls, (CZ, CX, CNOT))]
+_PHASE_GATES = {op for op, (_, _, shape) in enumerate(_KINDS) if shape in (_PHASE, _ADJOINT)}
+_MAX_PHASE = 2**62
+
+
+def _plain_gate(cls, d):
+    g = cls.__new__(cls)
+    g.__dict__ = dict(d)
+    return g
+
+_set_attribute = object.__setattr__
+
+def _view_setattr(self, name, value):
+    object.__setattr__(self, name, value)
+    self._write_back()
+
+def _view_delattr(self, name):
+    object.__delattr__(self, name)
+    self._write_back()
+
+def _write_back(self):
+    l, position, version = self._source
+    if l._version != version:
+        raise RuntimeError("The GateList has changed since this gate was read from it, "
+                           "so it can't be updated anymore. Assign it with gates[i] = g instead.")
+    l._store(position, _plain_gate(self._gate_class, self.__dict__))
+
+def _view_class(cls):
+    """Returns the class of the gates read from a :class:`GateList` with gate class ``cls``.
+    These behave like gates of class ``cls``, except that changing their attributes also
+    changes the entry of the list they were read from. Their copies are ordinary gates."""
+    return type(cls.__name__, (cls,), {
+        '__slots__': ('_source',),
+        '_gate_class': cls,
+        '__setattr__': _view_setattr,
+        '__delattr__': _view_delattr,
+        '_write_back': _write_back,
+        '__eq__': lambda self, other: _plain_gate(cls, self.__dict__) == other,
+        '__ne__': lambda self, other: not self == other,
+        '__hash__': None,
+        '__copy__': lambda self: _plain_gate(cls, self.__dict__),
+        '__reduce_ex__': lambda self, protocol: (_plain_gate, (cls, self.__dict__)),
+        })
+
+_VIEWS = [_view_class(cls) for cls, _, _ in _KINDS]
+
+
+class GateList(MutableSequence):
+    """A list of gates stored as parallel arrays. Getting a gate returns a new
+    :class:`~circuit.Gate` object made from the arrays. Setting an attribute of that
+    object updates the list, as long as no gates were inserted, removed or replaced in
+    the meantime, since then its position may have changed; this raises a RuntimeError.
+    Copies of these objects are independent of the list.
+    Gates that can't be represented in the arrays, like those of type
+    :class:`~circuit.ParityPhase` or gates that carry extra attributes,
+    are stored as objects, and returned as they are.
+
+    :ivar opcodes: The kind of every gate.
+    :ivar targets: The target of every gate.
+    :ivar controls: The control of every gate, or its first control if it has two.
+    :ivar controls2: The second control of every gate that has two.
+    :ivar phases: The phase of every gate as the numerator of a fraction over
+        :attr:`denominator`.
+    """
+    def __init__(self, gates=()):
+        self.opcodes = array('B')
+        self.targets = array('i')
+        self.controls = array('i')
+        self.controls2 = array('i')
+        self.phases = array('q')
+        self.denominator = DEFAULT_PHASE_DENOMINATOR
+        self._fractions = phase_fractions(self.denominator)
+        self._objects = []
+        # Increased whenever the positions of the gates may change, see _write_back
+        self._version = 0
+        self.extend(gates)
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def _set_denominator(self, den):
+        """Changes the common denominator of the phases to ``den``, a multiple of the
+        current one. Raises OverflowError if the numerators don't fit anymore."""
+        k = den // self.denominator
+        if den >= _MAX_PHASE: raise OverflowError("Phase denominator too large")
+        self.phases = array('q', [n*k for n in self.phases])
+        self.denominator = den
+        self._fractions = phase_fractions(den)
+
+    def _encode(self, g):
+        """Returns the entries of the arrays for the gate ``g``."""
+        d = g.__dict__
+        op = _OPCODES.get((getattr(g, '_gate_class', type(g)), d.get('adjoint')))
+        if op is not None:
+            shape = _KINDS[op][2]
+            # An index of 0 is the default of every gate, so it doesn't need to be kept
+            size = len(d) - (1 if d.get('index', None) == 0 else 0)
+            if size == len(_FIELDS[shape]) and all(type(d.get(f)) is int for f in
+                                                     _QUBIT_FIELDS[shape]):
+                if shape == _ONE: return op, d['target'], -1, -1, 0
+                if shape == _TWO: return op, d['target'], d['control'], -1, 0
+                if shape == _THREE: return op, d['target'], d['ctrl1'], d['ctrl2'], 0
+                n = self._encode_phase(d['phase'])
+                if n is not None: return op, d['target'], -1, -1, n
+        self._objects.append(g)
+        return _OBJECT, len(self._objects) - 1, -1, -1, 0
+
+    def _encode_phase(self, phase):
+        if type(phase) is int: return phase*self.denominator
+        if type(phase) is not Fraction: return None
+        den = phase.denominator
+        if self.denominator % den:
+            try: self._set_denominator(self.denominator*den//gcd(self.denominator, den))
+            except OverflowError: return None
+        n = phase.numerator * (self.denominator // den)
+        return n if -_MAX_PHASE < n < _MAX_PHASE else None
+
+    def _attributes(self, op, t, c, c2, n):
+        """Returns the attributes of the gate given by the entries of the arrays."""
+        adjoint, shape = _KINDS[op][1:]
+        if shape == _PHASE: d = {'target': t, 'phase': self._fractions[n]}
+        elif shape == _ADJOINT: d = {'target': t, 'phase': self._fractions[n], 'adjoint': adjoint}
+        elif shape == _ONE: d = {'target': t}
+        elif shape == _TWO: d = {'target': t, 'control': c}
+        else: d = {'target': t, 'ctrl1': c, 'ctrl2': c2}
+        return d
+
+    def _view(self, i, entries):
+        """Returns the gate given by the entries of the arrays at position ``i``."""
+        op = entries[0]
+        if op == _OBJECT: return self._objects[entries[1]]
+        view = _VIEWS[op]
+        g = view.__new__(view)
+        _set_attribute(g, '__dict__', self._attributes(*entries))
+        _set_attribute(g, '_source', (self, i, self._version))
+        return g
+
+    def _decode(self, i):
+        """Returns the gate at position ``i`` as an ordinary gate, not connected to the list."""
+        entries = self._entries(i)
+        if entries[0] == _OBJECT: return self._objects[entries[1]]
+        return _plain_gate(_KINDS[entries[0]][0], self._attributes(*entries))
+
+    def _store(self, i, g):
+        op, t, c, c2, n = self._encode(g)
+        self.opcodes[i] = op
+        self.targets[i] = t
+        self.controls[i] = c
+        self.controls2[i] = c2
+        self.phases[i] = n
+
+    def _entries(self, i):
+        return (self.opcodes[i], self.targets[i], self.controls[i], self.controls2[i], self.phases[i])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._view(j, self._entries(j)) for j in range(*i.indices(len(self)))]
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError("gate index out of range")
+        return self._view(i, self._entries(i))
+
+    def __iter__(self):
+        view = self._view
+        for i, entries in enumerate(zip(self.opcodes, self.targets, self.controls,
+                                        self.controls2, self.phases)):
+            yield view(i, entries)
+
+    def __setitem__(self, i, g):
+        self._version += 1
+        if isinstance(i, slice):
+            gates = [self._decode(j) for j in range(len(self))]
+            gates[i] = g
+            self.clear()
+            self.extend(gates)
+            return
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError("gate index out of range")
+        self._store(i, g)
+
+    def __delitem__(self, i):
+        self._version += 1
+        for a in (self.opcodes, self.targets, self.controls, self.controls2, self.phases):
+            del a[i]
+
+    def insert(self, i, g):
+        self._version += 1
+        op, t, c, c2, n = self._encode(g)
+        self.opcodes.insert(i, op)
+        self.targets.insert(i, t)
+        self.controls.insert(i, c)
+        self.controls2.insert(i, c2)
+        self.phases.insert(i, n)
+
+    def append(self, g):
+        op, t, c, c2, n = self._encode(g)
+        self.opcodes.append(op)
+        self.targets.append(t)
+        self.controls.append(c)
+        self.controls2.append(c2)
+        self.phases.append(n)
+
+    def extend(self, gates):
+        if isinstance(gates, GateList):
+            self._extend_arrays(gates)
+            return
+        for g in gates: self.append(g)
+
+    def clear(self):
+        version = self._version + 1
+        self.__init__()
+        self._version = version
+
+    def _extend_arrays(self, other, start=0, end=None):
+        """Appends the gates ``start,...,end-1`` of the GateList ``other``."""
+        if end is None: end = len(other)
+        if self.denominator % other.denominator:
+            try:
+                self._set_denominator(self.denominator*other.denominator//
+                                      gcd(self.denominator, other.denominator))
+            except OverflowError:
+                for i in range(start, end): self.append(other._decode(i))
+                return
+        k = self.denominator // other.denominator
+        if k != 1 and any(not -_MAX_PHASE < n*k < _MAX_PHASE for n in other.phases[start:end]):
+            for i in range(start, end): self.append(other._decode(i))
+            return
+        ops = other.opcodes[start:end]
+        targets = other.targets[start:end]
+        if _OBJECT in ops:
+            for i, op in enumerate(ops):
+                if op == _OBJECT:
+                    self._objects.append(other._objects[targets[i]])
+                    targets[i] = len(self._objects) - 1
+        self.opcodes.extend(ops)
+        self.targets.extend(targets)
+        self.controls.extend(other.controls[start:end])
+        self.controls2.extend(other.controls2[start:end])
+        if k == 1: self.phases.extend(other.phases[start:end])
+        else: self.phases.extend(n*k for n in other.phases[start:end])
+
+    def __eq__(self, other):
+        if isinstance(other, GateList) and self._objects == other._objects == []:
+            return (self.opcodes == other.opcodes and self.targets == other.targets and
+                    self.controls == other.controls and self.controls2 == other.controls2 and
+                    [self._fractions[n] for n in self.phases] ==
+                    [other._fractions[n] for n in other.phases])
+        try: return len(self) == len(other) and all(g == h for g,h in zip(self, other))
+        except TypeError: return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __repr__(self):
+        return "GateList({!r})".format([self._decode(i) for i in range(len(self))])
+
+    def copy(self):
+        """Returns a copy of the list. The gates stored as objects are copied as well."""
+        l = GateList()
+        l._extend_arrays(self)
+        l._objects = [g.copy() for g in l._objects]
+        return l
+
+    def to_basic_gates(self):
+        """Returns a new GateList in which every gate is expanded into basic gates, see
+        :meth:`~circuit.Circuit.to_basic_gates`. Runs of gates that are already basic
+        are copied from the arrays directly."""
+        l = GateList()
+        ops = self.opcodes
+        start = 0
+        for i in range(len(ops)):
+            if ops[i] in _BASIC: continue
+            if start < i: l._extend_arrays(self, start, i)
+            l.extend(self._decode(i).to_basic_gates())
+            start = i + 1
+        if start < len(ops): l._extend_arrays(self, start)
+        return l
+
+    def tcount(self):
+        """Returns the T-count of the gates, see :meth:`~circuit.Circuit.tcount`."""
+        ops = self.opcodes
+        # Only the phase gates have a nonzero phase
+        total = self._non_clifford_phases()
+        total += sum(_TCOUNT[op]*ops.count(op) for op in _TCOUNT_OPS)
+        return total + sum(g.tcount() for g in self._stored_objects())
+
+    def _non_clifford_phases(self):
+        den = self.denominator
+        return sum(1 for n in self.phases if (2*n) % den)
+
+    def _stored_objects(self):
+        if _OBJECT not in self.opcodes: return []
+        return [self._objects[t] for op, t in zip(self.opcodes, self.targets) if op == _OBJECT]
+
+    def counts(self):
+        """Returns the numbers of gates of :meth:`~circuit.Circuit.stats`: the total, the
+        T-count, and the number of Clifford, two-qubit, Hadamard and other gates."""
+        from .circuit import _gate_counts
+        ops = self.opcodes
+        phases = sum(ops.count(op) for op in _PHASE_GATES)
+        tcount = self._non_clifford_phases()
+        clifford = phases - tcount
+        tcount += sum(_TCOUNT[op]*ops.count(op) for op in _TCOUNT_OPS)
+        twoqubit = sum(ops.count(op) for op in _CLIFFORD_TWOQUBIT)
+        hadamard = ops.count(_OPCODES[(HAD, None)])
+        clifford += twoqubit + hadamard
+        objects = self._stored_objects()
+        other = len(ops) - phases - twoqubit - hadamard - len(objects)
+        if objects:
+            counts = _gate_counts(objects)
+            tcount += counts[1]
+            clifford += counts[2]
+            twoqubit += counts[3]
+            hadamard += counts[4]
+            other += counts[5]
+        return len(ops), tcount, clifford, twoqubit, hadamard, other
+
+    def twoqubitcount(self):
+        """Returns the number of CNOT and CZ gates after :meth:`to_basic_gates`."""
+        ops = self.opcodes
+        total = sum(_TWOQUBIT[op]*ops.count(op) for op in range(len(_KINDS)) if _TWOQUBIT[op])
+        for g in self._stored_objects():
+            total += sum(1 for h in g.to_basic_gates() if h.name in ('CNOT', 'CZ'))
+        return total
+
+
+def _example(op):
+    cls, adjoint, shape = _KINDS[op]
+    if shape == _THREE: return cls(0, 1, 2)
+    if shape == _TWO: return cls(0, 1)
+    if shape == _ONE: return cls(0)
+    return None
+
+# The T-count and two-qubit gate count of the gates without a phase, for every opcode
+_TCOUNT = [_example(op).tcount() if _example(op) else 0 for op in range(len(_KINDS))]
+_TWOQUBIT = [sum(1 for g in _example(op).to_basic_gates() if g.name in ('CNOT', 'CZ'))
+             if _example(op) else 0 for op in range(len(_KINDS))]
+_TCOUNT_OPS = [op for op in range(len(_KINDS)) if _TCOUNT[op]]
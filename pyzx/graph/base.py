@@ -16,8 +16,9 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import abc
+from fractions import Fraction
+from math import gcd
 
-from pyzx.tensor import tensorfy
 
 class DocstringMeta(abc.ABCMeta):
     """Metaclass that allows docstring 'inheritance'."""
@@ -49,6 +50,91 @@ def pack_indices(lst):
             i += 1
     return d
 
+# Backends that store phases as integers keep the numerator ``n`` of the phase ``n/d``
+# over a common denominator ``d`` of the graph, with ``0 <= n < 2*d``. It starts out at 4
+# so that all Clifford+T phases are encoded without rescaling, and it only grows when a
+# phase with a new denominator is set.
+DEFAULT_PHASE_DENOMINATOR = 4
+
+class PhaseFractions(dict):
+    """Maps a numerator ``n`` to the (shared) Fraction ``n/den``, creating them on demand."""
+    def __init__(self, den):
+        dict.__init__(self)
+        self.den = den
+    def __missing__(self, n):
+        f = Fraction(n, self.den)
+        self[n] = f
+        return f
+
+_phase_fractions = {}
+
+def phase_fractions(den):
+    """Returns the :class:`PhaseFractions` for the denominator ``den``. These are shared
+    between graphs for small denominators."""
+    if den > 1024: return PhaseFractions(den)
+    try: return _phase_fractions[den]
+    except KeyError:
+        f = _phase_fractions[den] = PhaseFractions(den)
+        return f
+
+def position_value(x):
+    """Turns a qubit or row index read from an array of doubles back into an ``int``
+    if it is integral."""
+    i = int(x)
+    return i if i == x else x
+
+def encode_phase(phase, den):
+    """Returns the integer ``n`` with ``0 <= n < 2*den`` such that ``phase`` is equal to
+    ``n/den`` modulo 2, or None if ``den`` is not a multiple of the denominator of ``phase``."""
+    if type(phase) is int: return phase*den % (2*den)
+    if type(phase) is not Fraction: phase = Fraction(phase)
+    d = phase.denominator
+    if den % d: return None
+    return phase.numerator*(den//d) % (2*den)
+
+def phase_denominator(phase):
+    """Returns the denominator of ``phase`` as a fraction."""
+    if type(phase) is int: return 1
+    return Fraction(phase).denominator
+
+
+class PhaseView(object):
+    """Live mapping-like view of the integer phases of a graph that presents them as
+    Fractions, so that :meth:`BaseGraph.phases` keeps returning the same values for
+    backends that store integers."""
+    def __init__(self, g):
+        self._g = g
+
+    def __getitem__(self, v):
+        return self._g.phase(v)
+
+    def get(self, v, default=None):
+        try: return self._g.phase(v)
+        except (KeyError, IndexError): return default
+
+    def __contains__(self, v):
+        try: self._g._phase[v]
+        except (KeyError, IndexError, TypeError): return False
+        return True
+
+    def keys(self):
+        return list(self._g.vertices())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return self._g.num_vertices()
+
+    def values(self):
+        phase = self._g.phase
+        return [phase(v) for v in self._g.vertices()]
+
+    def items(self):
+        phase = self._g.phase
+        return [(v,phase(v)) for v in self._g.vertices()]
+
+
 class BaseGraph(object):
     """Base class for letting graph backends interact with PyZX.
     For a backend to work with PyZX, there should be a class that implements
@@ -191,6 +277,7 @@ class BaseGraph(object):
 
     def to_tensor(self):
         """Returns a representation of the graph as a tensor using :func:`~pyzx.tensor.tensorfy`"""
+        from ..tensor import tensorfy # Imported here as it needs numpy
         return tensorfy(self)
 
     def vindex(self):
@@ -303,6 +390,20 @@ class BaseGraph(object):
             self.phase_mult[v] = 1
         return v
 
+    def add_vertex_arrays(self, types, phases, qubits, rows, denominator=1):
+        """Adds ``len(types)`` vertices at once and returns their indices, like
+        :meth:`add_vertices`. The phase of the ``i``-th vertex is
+        ``phases[i]/denominator``, with integer ``phases[i]``. Its qubit and row index are
+        ``qubits[i]`` and ``rows[i]``, where NaN means that it has none. The arguments can
+        be any sequences, like arrays or memoryviews, which the backend can copy in bulk."""
+        vs = self.add_vertices(len(types))
+        for v,t,n,q,r in zip(vs, types, phases, qubits, rows):
+            if t: self.set_type(v, t)
+            if n: self.set_phase(v, Fraction(n, denominator))
+            if q == q: self.set_qubit(v, position_value(q))
+            if r == r: self.set_row(v, position_value(r))
+        return vs
+
     def add_edges(self, edges, edgetype=1):
         """Adds a list of edges to the graph. 
         If edgetype is 1 (the default), these will be regular edges.
@@ -434,6 +535,12 @@ class BaseGraph(object):
         Should be overloaded if the backend supplies a cheaper version than this."""
         return set(self.edges())
 
+    def edges_of_type(self, t):
+        """Returns the set of edges of type t (1=regular, 2=Hadamard edge). Backends that
+        keep this set up to date return it directly, in which case it should not be
+        modified, and it changes along with the graph."""
+        return {e for e in self.edges() if self.edge_type(e) == t}
+
     def edge(self, s, t):
         """Returns the edge object with the given source/target."""
         raise NotImplementedError("Not implemented on backend " + type(self).backend)
@@ -479,6 +586,12 @@ class BaseGraph(object):
     def types(self):
         """Returns a mapping of vertices to their types."""
         raise NotImplementedError("Not implemented on backend " + type(self).backend)
+    def vertices_of_type(self, t):
+        """Returns the set of vertices of type t. Backends that keep this set up to date
+        return it directly, in which case it should not be modified, and it changes along
+        with the graph."""
+        ty = self.types()
+        return {v for v in self.vertices() if ty[v] == t}
     def set_type(self, vertex, t):
         """Sets the type of the given vertex to t."""
         raise NotImplementedError("Not implemented on backend" + type(self).backend)
@@ -495,6 +608,60 @@ class BaseGraph(object):
     def add_to_phase(self, vertex, phase):
         """Add the given phase to the phase value of the given vertex."""
         self.set_phase(vertex,self.phase(vertex)+phase)
+    def phase_denominator(self):
+        """Returns a common denominator ``d`` of all the phases in the graph, so that
+        the phase of every vertex ``v`` is equal to ``int_phases()[v]/d``. Backends that
+        store their phases as integers over ``d`` return it directly, and it is always a
+        multiple of 4 for those."""
+        d = 1
+        for v in self.vertices():
+            e = phase_denominator(self.phase(v))
+            d = d*e//gcd(d,e)
+        return d
+    def int_phases(self):
+        """Returns a mapping of vertices to the integer numerators of their phases over
+        :meth:`phase_denominator`. The rewrite rules use these to recognise Pauli and
+        Clifford phases without doing any Fraction arithmetic. The mapping should not be
+        modified."""
+        d = self.phase_denominator()
+        return {v: encode_phase(self.phase(v),d) for v in self.vertices()}
+
+    def pauli_vertices(self):
+        """Returns the set of vertices whose phase is 0 or pi. Backends that keep this set
+        up to date return it directly, in which case it should not be modified, and it
+        changes along with the phases of the graph."""
+        d = self.phase_denominator()
+        ph = self.int_phases()
+        return {v for v in self.vertices() if not ph[v] % d}
+    def clifford_vertices(self):
+        """Returns the set of vertices whose phase is a multiple of pi/2.
+        See :meth:`pauli_vertices` for when this set is live."""
+        d = self.phase_denominator()
+        ph = self.int_phases()
+        return {v for v in self.vertices() if not (2*ph[v]) % d}
+
+    def _index_phase(self, vertex, n):
+        """Updates the sets of Pauli and Clifford vertices of a backend that stores
+        integer phases after the phase of ``vertex`` is set to ``n/self._pden``."""
+        d = self._pden
+        if n % d:
+            self._pauli.discard(vertex)
+            if (2*n) % d: self._clifford.discard(vertex)
+            else: self._clifford.add(vertex)
+        else:
+            self._pauli.add(vertex)
+            self._clifford.add(vertex)
+
+    def _encode_phase(self, phase):
+        """Returns the numerator of ``phase`` over the denominator ``self._pden`` of a
+        backend that stores integer phases, growing the denominator with
+        ``self._set_phase_denominator`` if ``phase`` can't be written over it."""
+        n = encode_phase(phase, self._pden)
+        if n is None:
+            d = phase_denominator(phase)
+            self._set_phase_denominator(self._pden*d//gcd(self._pden,d))
+            n = encode_phase(phase, self._pden)
+        return n
 
     def qubit(self, vertex):
         """Returns the qubit index associated to the vertex. 
@@ -15,7 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-backends = {'simple': True}
+backends = {'simple': True, 'array': True}
 
 typeB = 0
 typeZ = 1
@@ -25,6 +25,7 @@ def Graph(backend=None):
 	"""Returns an instance of an implementation of :class:`~graph.base.BaseGraph`. 
 	By default :class:`~graph.graph_s.GraphS` is used. 
 	Currently ``backend`` is allowed to be `simple` (for the default),
+	`array` (for the memory-compact :class:`~graph.graph_array.GraphArray`),
 	or 'graph_tool' and 'igraph'.
 	**Note**: graph_tool is currently not fully supported."""
 	if not backend: backend = 'simple'
@@ -32,12 +33,14 @@ def Graph(backend=None):
 		if backend not in backends:
 			raise KeyError("Unavailable backend '{}'".format(backend))
 		if backend == 'simple': return GraphS()
+		if backend == 'array': return GraphArray()
 		if backend == 'graph_tool': 
 			return GraphGT()
 		if backend == 'igraph': return GraphIG()
 	return GraphS()
 
 from .graph_s import GraphS
+from .graph_array import GraphArray
 
 try:
 	import graph_tool.all as gt
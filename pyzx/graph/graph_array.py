@@ -0,0 +1,306 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from array import array
+from bisect import bisect_left
+from itertools import compress
+from math import gcd
+from .base import BaseGraph, PhaseView, phase_fractions, DEFAULT_PHASE_DENOMINATOR
+from .base import position_value as _to_number
+
+_UNSET = float('nan')
+
+
+class _PositionView(object):
+	"""Live mapping-like view of the qubit or row array of a :class:`GraphArray`.
+	Only the vertices for which a value has been set are considered keys,
+	mimicking the dictionaries returned by :class:`~graph.graph_s.GraphS`."""
+	def __init__(self, g, arr):
+		self._g = g
+		self._arr = arr
+
+	def __getitem__(self, v):
+		x = self._arr[v]
+		if x != x: raise KeyError(v)
+		return _to_number(x)
+
+	def get(self, v, default=None):
+		x = self._arr[v]
+		if x != x: return default
+		return _to_number(x)
+
+	def __contains__(self, v):
+		try: x = self._arr[v]
+		except (IndexError, TypeError): return False
+		return x == x and bool(self._g._alive[v])
+
+	def keys(self):
+		arr = self._arr
+		return [v for v in self._g.vertices() if arr[v] == arr[v]]
+
+	def __iter__(self):
+		return iter(self.keys())
+
+	def __len__(self):
+		return len(self.keys())
+
+	def values(self):
+		arr = self._arr
+		return [_to_number(arr[v]) for v in self._g.vertices() if arr[v] == arr[v]]
+
+	def items(self):
+		arr = self._arr
+		return [(v,_to_number(arr[v])) for v in self._g.vertices() if arr[v] == arr[v]]
+
+
+class GraphArray(BaseGraph):
+	"""Implementation of :class:`~graph.base.BaseGraph` that stores its vertex data in
+	flat arrays indexed by vertex number instead of in dictionaries.
+	Types live in a byte array, qubit and row indices in arrays of doubles and phases
+	in a list of integer numerators over a common denominator. The adjacency of each vertex is stored as a
+	sorted integer array of neighbours with a parallel byte array of edge types.
+	This uses a fraction of the memory of :class:`~graph.graph_s.GraphS` on large graphs."""
+	backend = 'array'
+
+	#The documentation of what these methods do
+	#can be found in base.BaseGraph
+	def __init__(self):
+		BaseGraph.__init__(self)
+		self._vindex = 0
+		self.nverts = 0
+		self.nedges = 0
+		self._alive = bytearray()
+		self._nbrs = []
+		self._etys = []
+		self.ty = array('b')
+		self._phase = []
+		self._pden = DEFAULT_PHASE_DENOMINATOR
+		self._pfrac = phase_fractions(self._pden)
+		self._phaseview = PhaseView(self)
+		self._qindex = array('d')
+		self._rindex = array('d')
+		self._qview = _PositionView(self, self._qindex)
+		self._rview = _PositionView(self, self._rindex)
+
+		self.inputs = []
+		self.outputs = []
+		self._vdata = dict()
+
+	def vindex(self): return self._vindex
+	def depth(self):
+		rs = self._rview.values()
+		return max(rs) if rs else -1
+	def qubit_count(self):
+		qs = self._qview.values()
+		return max(qs) + 1 if qs else 0
+
+	def add_vertices(self, amount):
+		self._alive.extend(b'\x01'*amount)
+		self.ty.frombytes(bytes(amount))
+		self._phase.extend([0]*amount)
+		self._qindex.extend(array('d',[_UNSET])*amount)
+		self._rindex.extend(array('d',[_UNSET])*amount)
+		for _ in range(amount):
+			self._nbrs.append(array('l'))
+			self._etys.append(array('b'))
+		self._vindex += amount
+		self.nverts += amount
+		return range(self._vindex - amount, self._vindex)
+
+	def add_vertex_arrays(self, types, phases, qubits, rows, denominator=1):
+		amount = len(types)
+		den = self._pden*denominator//gcd(self._pden, denominator)
+		if den != self._pden: self._set_phase_denominator(den)
+		k = den//denominator
+		self._alive.extend(b'\x01'*amount)
+		self.ty.extend(types)
+		self._phase.extend([n*k for n in phases] if k != 1 else phases)
+		self._qindex.extend(qubits)
+		self._rindex.extend(rows)
+		for _ in range(amount):
+			self._nbrs.append(array('l'))
+			self._etys.append(array('b'))
+		self._vindex += amount
+		self.nverts += amount
+		return range(self._vindex - amount, self._vindex)
+
+	def _insert_half_edge(self, s, t, edgetype):
+		nb = self._nbrs[s]
+		i = bisect_left(nb, t)
+		if i < len(nb) and nb[i] == t:
+			self._etys[s][i] = edgetype
+			return False
+		nb.insert(i, t)
+		self._etys[s].insert(i, edgetype)
+		return True
+
+	def _delete_half_edge(self, s, t):
+		nb = self._nbrs[s]
+		i = bisect_left(nb, t)
+		if i == len(nb) or nb[i] != t:
+			raise KeyError((s,t))
+		del nb[i]
+		del self._etys[s][i]
+
+	def add_edges(self, edges, edgetype=1):
+		for s,t in edges:
+			if self._insert_half_edge(s, t, edgetype):
+				self.nedges += 1
+			self._insert_half_edge(t, s, edgetype)
+
+	def remove_vertices(self, vertices):
+		for v in vertices:
+			if not self._alive[v]: raise KeyError(v)
+			nb = self._nbrs[v]
+			# remove all edges
+			for v1 in nb:
+				self._delete_half_edge(v1, v)
+			self.nedges -= len(nb)
+			# remove the vertex
+			self._alive[v] = 0
+			self._nbrs[v] = None
+			self._etys[v] = None
+			self._qindex[v] = _UNSET
+			self._rindex[v] = _UNSET
+			self.nverts -= 1
+			try: del self.phase_index[v]
+			except: pass
+			self._vdata.pop(v,None)
+
+	def remove_vertex(self, vertex):
+		self.remove_vertices([vertex])
+
+	def remove_isolated_vertices(self):
+		nbrs = self._nbrs
+		self.remove_vertices([v for v in self.vertices() if not nbrs[v]])
+
+	def remove_edges(self, edges):
+		for s,t in edges:
+			self._delete_half_edge(s, t)
+			self._delete_half_edge(t, s)
+			self.nedges -= 1
+
+	def remove_edge(self, edge):
+		self.remove_edges([edge])
+
+	def num_vertices(self):
+		return self.nverts
+
+	def num_edges(self):
+		return self.nedges
+
+	def vertices(self):
+		return compress(range(self._vindex), self._alive)
+
+	def edges(self):
+		nbrs = self._nbrs
+		for v0 in self.vertices():
+			nb = nbrs[v0]
+			for v1 in nb[bisect_left(nb, v0):]:
+				yield (v0,v1)
+
+	def edge(self, s, t):
+		return (s,t) if s < t else (t,s)
+	def edge_set(self):
+		return set(self.edges())
+	def edge_st(self, edge):
+		return edge
+
+	def neighbours(self, vertex):
+		return self._nbrs[vertex]
+
+	def vertex_degree(self, vertex):
+		return len(self._nbrs[vertex])
+
+	def incident_edges(self, vertex):
+		return [(vertex, v1) if v1 > vertex else (v1, vertex) for v1 in self._nbrs[vertex]]
+
+	def connected(self,v1,v2):
+		nb = self._nbrs[v1]
+		i = bisect_left(nb, v2)
+		return i < len(nb) and nb[i] == v2
+
+	def edge_type(self, e):
+		v1,v2 = e
+		try:
+			nb = self._nbrs[v1]
+			i = bisect_left(nb, v2)
+		except (IndexError, TypeError):
+			return 0
+		if i < len(nb) and nb[i] == v2:
+			return self._etys[v1][i]
+		return 0
+
+	def set_edge_type(self, e, t):
+		v1,v2 = e
+		if self._insert_half_edge(v1, v2, t):
+			self.nedges += 1
+		self._insert_half_edge(v2, v1, t)
+
+	def type(self, vertex):
+		return self.ty[vertex]
+	def types(self):
+		return self.ty
+	def set_type(self, vertex, t):
+		self.ty[vertex] = t
+
+	def phase(self, vertex):
+		return self._pfrac[self._phase[vertex]]
+	def phases(self):
+		return self._phaseview
+	def set_phase(self, vertex, phase):
+		self._phase[vertex] = self._encode_phase(phase)
+	def add_to_phase(self, vertex, phase):
+		n = self._encode_phase(phase)
+		self._phase[vertex] = (self._phase[vertex] + n) % (2*self._pden)
+	def phase_denominator(self):
+		return self._pden
+	def int_phases(self):
+		return self._phase
+
+	def _set_phase_denominator(self, den):
+		k = den // self._pden
+		self._phase[:] = [n*k for n in self._phase]
+		self._pden = den
+		self._pfrac = phase_fractions(den)
+
+	def qubit(self, vertex):
+		return self._qview.get(vertex, -1)
+	def qubits(self):
+		return self._qview
+	def set_qubit(self, vertex, q):
+		self._qindex[vertex] = q
+
+	def row(self, vertex):
+		return self._rview.get(vertex, -1)
+	def rows(self):
+		return self._rview
+	def set_row(self, vertex, r):
+		self._rindex[vertex] = r
+
+	def vdata_keys(self, vertex):
+		return self._vdata.get(vertex, {}).keys()
+	def vdata(self, vertex, key, default=0):
+		if vertex in self._vdata:
+			return self._vdata[vertex].get(key,default)
+		else:
+			return default
+	def set_vdata(self, vertex, key, val):
+		if vertex in self._vdata:
+			self._vdata[vertex][key] = val
+		else:
+			self._vdata[vertex] = {key:val}
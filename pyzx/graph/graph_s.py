@@ -15,8 +15,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from fractions import Fraction
-from .base import BaseGraph
+from math import gcd
+from .base import BaseGraph, PhaseView, phase_fractions, position_value
+from .base import DEFAULT_PHASE_DENOMINATOR
 
 class GraphS(BaseGraph):
 	"""Purely Pythonic implementation of :class:`~graph.base.BaseGraph`."""
@@ -31,6 +32,14 @@ class GraphS(BaseGraph):
 		self.nedges = 0
 		self.ty = dict()
 		self._phase = dict()
+		self._pden = DEFAULT_PHASE_DENOMINATOR
+		self._pfrac = phase_fractions(self._pden)
+		self._phaseview = PhaseView(self)
+		# Indexes that are kept up to date by every change to the graph
+		self._etype_index = {1: set(), 2: set()}
+		self._vtype_index = {0: set(), 1: set(), 2: set()}
+		self._pauli = set()
+		self._clifford = set()
 		self._qindex = dict()
 		self._maxq = -1
 		self._rindex = dict()
@@ -56,12 +65,42 @@ class GraphS(BaseGraph):
 			self.graph[i] = dict()
 			self.ty[i] = 0
 			self._phase[i] = 0
+		vs = range(self._vindex, self._vindex + amount)
+		self._vtype_index[0].update(vs)
+		self._pauli.update(vs)
+		self._clifford.update(vs)
 		self._vindex += amount
-		return range(self._vindex - amount, self._vindex)
+		return vs
+
+	def add_vertex_arrays(self, types, phases, qubits, rows, denominator=1):
+		vs = range(self._vindex, self._vindex + len(types))
+		den = self._pden*denominator//gcd(self._pden, denominator)
+		if den != self._pden: self._set_phase_denominator(den)
+		k = den//denominator
+		graph, ty, phase = self.graph, self.ty, self._phase
+		vtype_index, pauli, clifford = self._vtype_index, self._pauli, self._clifford
+		for v,t,n in zip(vs, types, phases):
+			graph[v] = dict()
+			ty[v] = t
+			vtype_index.setdefault(t, set()).add(v)
+			n *= k
+			phase[v] = n
+			if n % den == 0: pauli.add(v)
+			if (2*n) % den == 0: clifford.add(v)
+		self._qindex.update((v,position_value(q)) for v,q in zip(vs, qubits) if q == q)
+		self._rindex.update((v,position_value(r)) for v,r in zip(vs, rows) if r == r)
+		self._vindex += len(vs)
+		return vs
 
 	def add_edges(self, edges, edgetype=1):
+		index = self._etype_index
+		es = index.setdefault(edgetype, set())
 		for s,t in edges:
 			self.nedges += 1
+			e = (s,t) if s < t else (t,s)
+			old = self.graph[s].get(t)
+			if old is not None: index[old].discard(e)
+			es.add(e)
 			self.graph[s][t] = edgetype
 			self.graph[t][s] = edgetype
 
@@ -71,9 +110,13 @@ class GraphS(BaseGraph):
 			# remove all edges
 			for v1 in vs:
 				self.nedges -= 1
+				self._etype_index[self.graph[v][v1]].discard((v,v1) if v < v1 else (v1,v))
 				del self.graph[v][v1]
 				del self.graph[v1][v]
 			# remove the vertex
+			self._vtype_index[self.ty[v]].discard(v)
+			self._pauli.discard(v)
+			self._clifford.discard(v)
 			del self.graph[v]
 			del self.ty[v]
 			del self._phase[v]
@@ -94,6 +137,7 @@ class GraphS(BaseGraph):
 	def remove_edges(self, edges):
 		for s,t in edges:
 			self.nedges -= 1
+			self._etype_index[self.graph[s][t]].discard((s,t) if s < t else (t,s))
 			del self.graph[s][t]
 			del self.graph[t][s]
 
@@ -147,7 +191,9 @@ class GraphS(BaseGraph):
 	def edge(self, s, t):
 		return (s,t) if s < t else (t,s)
 	def edge_set(self):
-		return set(self.edges())
+		return set().union(*self._etype_index.values())
+	def edges_of_type(self, t):
+		return self._etype_index.setdefault(t, set())
 	def edge_st(self, edge):
 		return edge
 
@@ -172,6 +218,10 @@ class GraphS(BaseGraph):
 
 	def set_edge_type(self, e, t):
 		v1,v2 = e
+		e = (v1,v2) if v1 < v2 else (v2,v1)
+		old = self.graph[v1].get(v2)
+		if old is not None: self._etype_index[old].discard(e)
+		self._etype_index.setdefault(t, set()).add(e)
 		self.graph[v1][v2] = t
 		self.graph[v2][v1] = t
 
@@ -180,16 +230,39 @@ class GraphS(BaseGraph):
 	def types(self):
 		return self.ty
 	def set_type(self, vertex, t):
+		self._vtype_index[self.ty[vertex]].discard(vertex)
+		self._vtype_index.setdefault(t, set()).add(vertex)
 		self.ty[vertex] = t
+	def vertices_of_type(self, t):
+		return self._vtype_index.setdefault(t, set())
 
 	def phase(self, vertex):
-		return self._phase.get(vertex,Fraction(1))
+		return self._pfrac[self._phase.get(vertex,self._pden)]
 	def phases(self):
-		return self._phase
+		return self._phaseview
 	def set_phase(self, vertex, phase):
-		self._phase[vertex] = Fraction(phase) % 2
+		n = self._encode_phase(phase)
+		self._phase[vertex] = n
+		self._index_phase(vertex, n)
 	def add_to_phase(self, vertex, phase):
-		self._phase[vertex] = (self._phase.get(vertex,Fraction(1)) + phase) % 2
+		n = self._encode_phase(phase)
+		n = (self._phase.get(vertex,self._pden) + n) % (2*self._pden)
+		self._phase[vertex] = n
+		self._index_phase(vertex, n)
+	def phase_denominator(self):
+		return self._pden
+	def int_phases(self):
+		return self._phase
+	def pauli_vertices(self):
+		return self._pauli
+	def clifford_vertices(self):
+		return self._clifford
+
+	def _set_phase_denominator(self, den):
+		k = den // self._pden
+		for v in self._phase: self._phase[v] *= k
+		self._pden = den
+		self._pfrac = phase_fractions(den)
 
 	def qubit(self, vertex):
 		return self._qindex.get(vertex,-1)
@@ -16,6 +16,9 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import json
+from sys import byteorder as _byteorder
+import struct as _struct
+from array import array as _array
 from fractions import Fraction
 
 from .graph.graph import Graph
@@ -187,4 +190,156 @@ def graph_to_json(g):
 
     return json.dumps({"wire_vertices": wire_vs, 
             "node_vertices": node_vs, 
-            "undir_edges": edges})
\ No newline at end of file
+            "undir_edges": edges})
+
+
+# The binary format starts with a header, which is followed by the arrays described by
+# _BINARY_SECTIONS. Every array is stored little-endian and padded to a multiple of
+# 8 bytes, so that they can all be used directly from a memory-mapped file.
+_BINARY_MAGIC = b'PYZXGRPH'
+_BINARY_VERSION = 1
+# magic, version, flags (unused), phase denominator, vertices, edges, inputs, outputs
+_BINARY_HEADER = _struct.Struct('<8sIIQQQQQ')
+# name, typecode, which count from the header gives its length
+_BINARY_SECTIONS = [('types', 'b', 0), ('phases', 'q', 0), ('qubits', 'd', 0), ('rows', 'd', 0),
+                    ('sources', 'q', 1), ('targets', 'q', 1), ('edge_types', 'b', 1),
+                    ('inputs', 'q', 2), ('outputs', 'q', 3)]
+
+class GraphArrays(object):
+    """The contents of a graph in the binary format of :func:`graph_to_binary`, as
+    flat arrays. The vertices are numbered ``0,...,n-1``.
+
+    :ivar denominator: The phase of vertex ``v`` is ``phases[v]/denominator``.
+    :ivar types: The type of every vertex.
+    :ivar phases: The numerator of the phase of every vertex.
+    :ivar qubits: The qubit index of every vertex, NaN if it has none.
+    :ivar rows: The row index of every vertex, NaN if it has none.
+    :ivar sources: The first vertex of every edge.
+    :ivar targets: The second vertex of every edge.
+    :ivar edge_types: The type of every edge.
+    :ivar inputs: The inputs of the graph.
+    :ivar outputs: The outputs of the graph.
+
+    When these were read by :func:`read_binary_arrays` from a memory-mapped file, the
+    arrays are memoryviews into that file, which stay valid as long as this object exists.
+    """
+    def __init__(self, denominator, arrays, buffer=None):
+        self.denominator = denominator
+        for (name, _, _), a in zip(_BINARY_SECTIONS, arrays):
+            setattr(self, name, a)
+        self._buffer = buffer
+
+    def num_vertices(self):
+        return len(self.types)
+
+    def num_edges(self):
+        return len(self.sources)
+
+def _write_binary(g, f):
+    verts = list(g.vertices())
+    if verts == list(range(len(verts))): index = None
+    else: index = {v:i for i,v in enumerate(verts)}
+    types, phases, qs, rs = g.types(), g.int_phases(), g.qubits(), g.rows()
+    den = g.phase_denominator()
+    if 2*den >= 2**63:
+        raise ValueError("The phase denominator {:d} of the graph is too large".format(den))
+    unset = float('nan')
+    sources, targets, edge_types = _array('q'), _array('q'), _array('b')
+    for t in (1, 2):
+        es = list(g.edges_of_type(t))
+        st = [g.edge_st(e) for e in es]
+        if index is None:
+            sources.extend([s for s,_ in st])
+            targets.extend([v for _,v in st])
+        else:
+            sources.extend([index[s] for s,_ in st])
+            targets.extend([index[v] for _,v in st])
+        edge_types.extend([t]*len(es))
+    inputs, outputs = g.inputs, g.outputs
+    if index is not None:
+        inputs = [index[v] for v in inputs]
+        outputs = [index[v] for v in outputs]
+    arrays = [_array('b', [types[v] for v in verts]), _array('q', [phases[v] for v in verts]),
+              _array('d', [qs.get(v, unset) for v in verts]),
+              _array('d', [rs.get(v, unset) for v in verts]),
+              sources, targets, edge_types, _array('q', inputs), _array('q', outputs)]
+    f.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, 0, den, len(verts),
+                                len(sources), len(inputs), len(outputs)))
+    for a in arrays:
+        if _byteorder == 'big': a.byteswap()
+        f.write(a.tobytes())
+        f.write(bytes(-len(a)*a.itemsize % 8))
+
+def graph_to_binary(g):
+    """Converts a PyZX graph into the compact binary format read by :func:`binary_to_graph`.
+    This stores the type, phase, qubit and row of the vertices, the edges with their types,
+    and the inputs and outputs, each as a single array. The vertices are renumbered
+    to ``0,...,n-1`` in the order of ``g.vertices()``. Vertex data set with
+    :meth:`~graph.base.BaseGraph.set_vdata` is not stored."""
+    from io import BytesIO
+    f = BytesIO()
+    _write_binary(g, f)
+    return f.getvalue()
+
+def save_binary(g, fname):
+    """Writes the graph ``g`` to the file ``fname`` in the format of :func:`graph_to_binary`."""
+    with open(fname, 'wb') as f:
+        _write_binary(g, f)
+
+def _parse_binary(buf, keep=None):
+    if len(buf) < _BINARY_HEADER.size or bytes(buf[:8]) != _BINARY_MAGIC:
+        raise ValueError("Data is not a PyZX graph in binary format")
+    header = _BINARY_HEADER.unpack_from(buf)
+    if header[1] > _BINARY_VERSION:
+        raise ValueError("Unsupported version {:d} of the binary graph format".format(header[1]))
+    den, counts = header[3], header[4:]
+    arrays = []
+    pos = _BINARY_HEADER.size
+    for _, typecode, c in _BINARY_SECTIONS:
+        size = counts[c]*_array(typecode).itemsize
+        if pos + size > len(buf): raise ValueError("Binary graph data is truncated")
+        view = buf[pos:pos+size]
+        if _byteorder == 'big':
+            a = _array(typecode, bytes(view))
+            a.byteswap()
+            arrays.append(a)
+        else: arrays.append(view.cast(typecode))
+        pos += size + (-size % 8)
+    return GraphArrays(den, arrays, keep)
+
+def read_binary_arrays(fname, mmap=True):
+    """Reads the file ``fname`` written by :func:`save_binary`, and returns its contents as
+    a :class:`GraphArrays`. If ``mmap`` is True, the file is memory-mapped instead of read,
+    so that the arrays are only loaded from disk when they are used."""
+    with open(fname, 'rb') as f:
+        if not mmap:
+            return _parse_binary(memoryview(f.read()))
+        import mmap as _mmap
+        try:
+            m = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        except ValueError: # An empty file can't be mapped
+            return _parse_binary(memoryview(b''))
+    return _parse_binary(memoryview(m), m)
+
+def arrays_to_graph(arrays, backend=None):
+    """Builds a graph of the given backend from a :class:`GraphArrays`, using
+    :meth:`~graph.base.BaseGraph.add_vertex_arrays` so that the vertex data is copied
+    in bulk."""
+    g = Graph(backend)
+    g.add_vertex_arrays(arrays.types, arrays.phases, arrays.qubits, arrays.rows,
+                        arrays.denominator)
+    for t in (1, 2):
+        es = [(s,v) for s,v,et in zip(arrays.sources, arrays.targets, arrays.edge_types) if et == t]
+        if es: g.add_edges(es, t)
+    g.inputs = list(arrays.inputs)
+    g.outputs = list(arrays.outputs)
+    return g
+
+def binary_to_graph(data, backend=None):
+    """Converts data in the binary format of :func:`graph_to_binary` into a pyzx graph."""
+    return arrays_to_graph(_parse_binary(memoryview(data)), backend)
+
+def load_binary(fname, backend=None, mmap=True):
+    """Reads a graph written by :func:`save_binary` from the file ``fname``.
+    See :func:`read_binary_arrays` for the meaning of ``mmap``."""
+    return arrays_to_graph(read_binary_arrays(fname, mmap), backend)
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import math
+from timeit import default_timer as _timer
 try:
     from .linalg_c import do_gauss as gauss_fast
 except ImportError:
@@ -284,6 +285,398 @@ class Mat2(object):
             cn = best_cn
         return cn.cnots # list(reversed(cn.cnots)) 
 
+class _PackedRow(object):
+    """A row of a :class:`Mat2Packed` that can be used like a list of 0s and 1s.
+    Assigning to an entry changes the matrix."""
+    def __init__(self, m, i):
+        self._m = m
+        self._i = i
+    def __len__(self):
+        return self._m._cols
+    def __getitem__(self, j):
+        if isinstance(j, slice): return list(self)[j]
+        if j < 0: j += self._m._cols
+        if not 0 <= j < self._m._cols: raise IndexError("Column index out of range")
+        return (self._m.packed[self._i] >> j) & 1
+    def __setitem__(self, j, v):
+        if j < 0: j += self._m._cols
+        if not 0 <= j < self._m._cols: raise IndexError("Column index out of range")
+        if v: self._m.packed[self._i] |= 1 << j
+        else: self._m.packed[self._i] &= ~(1 << j)
+    def __iter__(self):
+        row = self._m.packed[self._i]
+        return iter([(row >> j) & 1 for j in range(self._m._cols)])
+    def __eq__(self, other):
+        return list(self) == list(other)
+    def __repr__(self):
+        return repr(list(self))
+
+class _PackedRows(object):
+    """The view on the rows of a :class:`Mat2Packed` given by :attr:`Mat2Packed.data`."""
+    def __init__(self, m):
+        self._m = m
+    def _pack(self, row):
+        if isinstance(row, _PackedRow): return row._m.packed[row._i]
+        if len(row) != self._m._cols:
+            if self._m.packed: raise ValueError("Row has the wrong length")
+            self._m._cols = len(row)
+        return sum(1 << j for j,v in enumerate(row) if v)
+    def __len__(self):
+        return len(self._m.packed)
+    def __getitem__(self, i):
+        if isinstance(i, slice): return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0: i += len(self._m.packed)
+        if not 0 <= i < len(self._m.packed): raise IndexError("Row index out of range")
+        return _PackedRow(self._m, i)
+    def __setitem__(self, i, row):
+        self._m.packed[i] = self._pack(row)
+    def __delitem__(self, i):
+        del self._m.packed[i]
+    def __iter__(self):
+        return (_PackedRow(self._m, i) for i in range(len(self._m.packed)))
+    def __eq__(self, other):
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+    def __repr__(self):
+        return repr([list(row) for row in self])
+    def append(self, row):
+        self._m.packed.append(self._pack(row))
+    def insert(self, i, row):
+        self._m.packed.insert(i, self._pack(row))
+    def pop(self, i=-1):
+        row = self._m.packed.pop(i)
+        return [(row >> j) & 1 for j in range(self._m._cols)]
+
+
+class Mat2Packed(object):
+    """A drop-in variant of :class:`Mat2` that stores every row as a single Python integer,
+    where bit ``j`` holds the entry in column ``j``. Row operations are then done on all
+    columns at once with a single XOR, which makes :meth:`gauss` and the methods built on
+    it a lot faster on large matrices.
+
+    It is constructed from the same list of lists as :class:`Mat2`, or from a list of
+    integers when the number of columns ``cols`` is given. The packed rows are stored in
+    :attr:`packed`. The attribute :attr:`data` is a view of them that behaves like the list
+    of lists of :class:`Mat2`: ``m.data[i][j]`` reads a single bit, and assigning to an
+    entry or a row, or appending a row, changes the matrix."""
+
+    @staticmethod
+    def id(n):
+        return Mat2Packed([1 << i for i in range(n)], n)
+
+    def __init__(self, data, cols=None):
+        if cols is None:
+            cols = len(data[0]) if data else 0
+            data = [sum(1 << j for j,v in enumerate(row) if v) for row in data]
+        self.packed = data
+        self._cols = cols
+    @property
+    def data(self):
+        return _PackedRows(self)
+    def __mul__(self, m):
+        rows = []
+        for row in self.packed:
+            r = 0
+            k = 0
+            while row:
+                if row & 1: r ^= m.packed[k]
+                row >>= 1
+                k += 1
+            rows.append(r)
+        return Mat2Packed(rows, m.cols())
+    def __eq__(self, other):
+        if isinstance(other, Mat2): other = Mat2Packed(other.data)
+        if not isinstance(other, Mat2Packed): return False
+        if self.rows() != other.rows() or self.cols() != other.cols(): return False
+        return self.packed == other.packed
+    def __str__(self):
+        return str(self.to_mat2())
+    def __repr__(self):
+        return str(self)
+    def copy(self):
+        return Mat2Packed(list(self.packed), self._cols)
+    def to_mat2(self):
+        """Returns the matrix as a list-based :class:`Mat2`."""
+        return Mat2([[(row >> j) & 1 for j in range(self._cols)] for row in self.packed])
+    def transpose(self):
+        return Mat2Packed([sum(((row >> j) & 1) << i for i, row in enumerate(self.packed))
+                            for j in range(self._cols)], self.rows())
+    def rows(self):
+        return len(self.packed)
+    def cols(self):
+        return self._cols if self.packed else 0
+    def row_add(self, r0, r1):
+        """Add r0 to r1"""
+        self.packed[r1] ^= self.packed[r0]
+    def col_add(self, c0, c1):
+        """Add c0 to c1"""
+        m = 1 << c1
+        for i, row in enumerate(self.packed):
+            if (row >> c0) & 1: self.packed[i] = row ^ m
+    def row_swap(self, r0, r1):
+        """Swap the rows r0 and r1"""
+        d = self.packed
+        d[r0], d[r1] = d[r1], d[r0]
+    def col_swap(self, c0, c1):
+        """Swap the columns c0 and c1"""
+        m = (1 << c0) | (1 << c1)
+        for i, row in enumerate(self.packed):
+            if ((row >> c0) ^ (row >> c1)) & 1: self.packed[i] = row ^ m
+
+    def gauss(self, full_reduce=False, x=None, y=None, blocksize=6):
+        """Compute the echelon form. Returns the number of non-zero rows in the result, i.e.
+        the rank of the matrix. This does exactly the same row operations as :meth:`Mat2.gauss`,
+        and the parameters have the same meaning."""
+        d = self.packed
+        rows = self.rows()
+        cols = self.cols()
+        pcols = []
+        pivot_row = 0
+        for sec in range(math.ceil(cols / blocksize)):
+            i0 = sec * blocksize
+            i1 = min(cols, (sec+1) * blocksize)
+            mask = (1 << (i1 - i0)) - 1
+
+            # search for duplicate chunks of 'blocksize' bits and eliminate them
+            chunks = dict()
+            for r in range(pivot_row, rows):
+                t = (d[r] >> i0) & mask
+                if not t: continue
+                if t in chunks:
+                    d[r] ^= d[chunks[t]]
+                    if x != None: x.row_add(chunks[t], r)
+                    if y != None: y.col_add(r, chunks[t])
+                else:
+                    chunks[t] = r
+
+            p = i0
+            while p < i1:
+                bit = 1 << p
+                for r0 in range(pivot_row, rows):
+                    if d[r0] & bit:
+                        if r0 != pivot_row:
+                            d[pivot_row] ^= d[r0]
+                            if x != None: x.row_add(r0, pivot_row)
+                            if y != None: y.col_add(pivot_row, r0)
+
+                        prow = d[pivot_row]
+                        for r1 in range(pivot_row+1, rows):
+                            if d[r1] & bit:
+                                d[r1] ^= prow
+                                if x != None: x.row_add(pivot_row, r1)
+                                if y != None: y.col_add(r1, pivot_row)
+                        if full_reduce: pcols.append(p)
+                        pivot_row += 1
+                        break
+                p += 1
+
+        rank = pivot_row
+
+        if full_reduce:
+            pivot_row -= 1
+
+            for sec in range(math.ceil(cols / blocksize) - 1, -1, -1):
+                i0 = sec * blocksize
+                i1 = min(cols, (sec+1) * blocksize)
+                mask = (1 << (i1 - i0)) - 1
+
+                # search for duplicate chunks of 'blocksize' bits and eliminate them
+                chunks = dict()
+                for r in range(pivot_row, -1, -1):
+                    t = (d[r] >> i0) & mask
+                    if not t: continue
+                    if t in chunks:
+                        d[r] ^= d[chunks[t]]
+                        if x != None: x.row_add(chunks[t], r)
+                        if y != None: y.col_add(r, chunks[t])
+                    else:
+                        chunks[t] = r
+
+                while len(pcols) != 0 and i0 <= pcols[-1] < i1:
+                    bit = 1 << pcols.pop()
+                    prow = d[pivot_row]
+                    for r in range(0, pivot_row):
+                        if d[r] & bit:
+                            d[r] ^= prow
+                            if x != None: x.row_add(pivot_row, r)
+                            if y != None: y.col_add(r, pivot_row)
+                    pivot_row -= 1
+
+        return rank
+
+    def rank(self):
+        """Returns the rank of the matrix."""
+        m = self.copy()
+        return m.gauss()
+
+    def factor(self):
+        """Produce a factorisation m = m0 * m1, where
+
+        m0.cols() = m1.rows() = m.rank()
+        """
+        m0 = Mat2Packed.id(self.rows())
+        m1 = self.copy()
+        rank = m1.gauss(y = m0)
+        mask = (1 << rank) - 1
+        m0 = Mat2Packed([row & mask for row in m0.packed], rank)
+        m1 = Mat2Packed(m1.packed[:rank], self.cols())
+        return (m0, m1)
+
+    def inverse(self):
+        """Returns the inverse of m is invertible and None otherwise."""
+        if self.rows() != self.cols(): return None
+        m = self.copy()
+        inv = Mat2Packed.id(self.rows())
+        rank = m.gauss(x=inv, full_reduce=True)
+        if rank < self.rows(): return None
+        else: return inv
+
+    def solve(self, b):
+        """Return a vector x such that M * x = b, or None if there is no solution."""
+        m = self.copy()
+        x = b.copy()
+        rank = m.gauss(x=x, full_reduce=True)
+
+        # check for inconsistencies, i.e. zero LHS with non-zero RHS
+        if any(x.packed[rank:]): return None
+        # the row with the pivot in column p gives the value of the p'th variable
+        sol = [0]*m.cols()
+        for i in range(rank):
+            row = m.packed[i]
+            p = (row & -row).bit_length() - 1
+            sol[p] = x.packed[i]
+        return Mat2Packed(sol, x.cols())
+
+    def nullspace(self, should_copy=True):
+        """Returns a list of non-zero vectors that span the nullspace
+        of the matrix. If the matrix has trivial kernel it returns the empty list."""
+        m = self.copy() if should_copy else self
+        m.gauss(full_reduce=True)
+        cols = self.cols()
+        pivots = []
+        for row in m.packed:
+            if row: pivots.append((row & -row).bit_length() - 1)
+        pivotset = set(pivots)
+        vectors = []
+        for n in range(cols):
+            if n in pivotset: continue
+            v = [0]*cols
+            v[n] = 1
+            for row, p in zip(m.packed, pivots):
+                if (row >> n) & 1: v[p] = 1
+            vectors.append(v)
+        return vectors
+
+    def to_cnots(self, optimize=False):
+        """Returns a list of CNOTs that implements the matrix as a reversible circuit of qubits."""
+        if not optimize:
+            cn = CNOTMaker()
+            self.copy().gauss(full_reduce=True,x=cn, blocksize=5)
+        else:
+            best = 1000000
+            best_cn = None
+            for size in range(1,self.rows()):
+                cn = CNOTMaker()
+                self.copy().gauss(full_reduce=True,x=cn, blocksize=size)
+                if len(cn.cnots) < best:
+                    best = len(cn.cnots)
+                    best_cn = cn
+            cn = best_cn
+        return cn.cnots
+
+
+class IncrementalBasis(object):
+    """Keeps a row-reduced basis of the row space of a changing set of packed rows
+    (integers whose bit ``j`` is the entry in column ``j``), so that rows can be added,
+    removed and added to each other without redoing Gaussian elimination from scratch.
+
+    Every basis vector has a pivot column in which it is the only basis vector with a 1.
+    Next to its value every basis vector remembers which of the current rows sum to it,
+    as do the combinations of rows that sum to zero. Removing a row then only takes a
+    single pass over the basis. Rows are identified by arbitrary hashable keys."""
+    def __init__(self):
+        self.rows = {}      # key -> packed row
+        self._rowbit = {}   # key -> bit identifying the row in the combinations
+        self._free = []
+        self.basis = {}     # pivot column -> [vector, combination]
+        self.kernel = []    # combinations of rows that sum to zero
+
+    def rank(self):
+        return len(self.basis)
+
+    def add_row(self, key, row):
+        """Adds a new row with the given key."""
+        if self._free: b = self._free.pop()
+        else: b = len(self._rowbit)
+        self._rowbit[key] = b
+        self.rows[key] = row
+        vec, comb = row, 1 << b
+        for p, (bvec, bcomb) in self.basis.items():
+            if (vec >> p) & 1:
+                vec ^= bvec
+                comb ^= bcomb
+        if not vec:
+            self.kernel.append(comb)
+            return
+        p = (vec & -vec).bit_length() - 1
+        for entry in self.basis.values():
+            if (entry[0] >> p) & 1:
+                entry[0] ^= vec
+                entry[1] ^= comb
+        self.basis[p] = [vec, comb]
+
+    def remove_row(self, key):
+        """Removes the row with the given key."""
+        b = self._rowbit.pop(key)
+        del self.rows[key]
+        self._free.append(b)
+        m = 1 << b
+        for i, comb in enumerate(self.kernel):
+            if comb & m:
+                # The row is dependent on the others, so the basis stays the same
+                del self.kernel[i]
+                self.kernel = [k ^ comb if k & m else k for k in self.kernel]
+                for entry in self.basis.values():
+                    if entry[1] & m: entry[1] ^= comb
+                return
+        pivot = min((p for p, entry in self.basis.items() if entry[1] & m),
+                    key=lambda p: bin(self.basis[p][1]).count('1'))
+        vec, comb = self.basis.pop(pivot)
+        for entry in self.basis.values():
+            if entry[1] & m:
+                entry[0] ^= vec
+                entry[1] ^= comb
+
+    def update_row(self, key, row):
+        """Replaces the row with the given key by ``row``."""
+        if self.rows.get(key) == row: return
+        if key in self.rows: self.remove_row(key)
+        self.add_row(key, row)
+
+    def row_add(self, key0, key1):
+        """Adds the row ``key0`` to the row ``key1``. This doesn't change the row space,
+        so only the combinations have to be rewritten in terms of the new row."""
+        self.rows[key1] ^= self.rows[key0]
+        m0, m1 = 1 << self._rowbit[key0], 1 << self._rowbit[key1]
+        for entry in self.basis.values():
+            if entry[1] & m1: entry[1] ^= m0
+        self.kernel = [k ^ m0 if k & m1 else k for k in self.kernel]
+
+    def has_unit_vector(self):
+        """Returns whether the row space contains a vector with a single 1. This is the
+        case exactly when one of the basis vectors has a single 1, since a vector in the
+        row space is the sum of the basis vectors whose pivot columns it has a 1 in."""
+        return any(vec & (vec - 1) == 0 for vec, _ in self.basis.values())
+
+    def unit_combination(self):
+        """Returns the keys of a set of rows that sum to a vector with a single 1,
+        or None if there is no such set. Of the sets making up a basis vector
+        the smallest one is returned, but there might be smaller ones."""
+        combs = [comb for vec, comb in self.basis.values() if vec & (vec - 1) == 0]
+        if not combs: return None
+        comb = min(combs, key=lambda c: bin(c).count('1'))
+        return [k for k, b in self._rowbit.items() if (comb >> b) & 1]
+
+
 from .circuit import CNOT
 class CNOTMaker:
     def __init__(self):
@@ -296,42 +689,86 @@ class CNOTMaker:
 def xor_rows(l1, l2):
     return [0 if l1[i]==l2[i] else 1 for i in range(len(l1))]
 
-def find_minimal_sums(m):
-    """Returns a list of rows in m that can be added together to reduce one of the rows so that
-    it only contains a single 1. Used in :func:`greedy_reduction`"""
-    r = m.rows()
-    d = m.data
-    if any(sum(r)==1 for r in d): return []
-    combs = {(i,):d[i] for i in range(r)}
-    combs2 = {}
-    iterations = 0
-    while True:
-        combs2 = {}
-        for index,l in combs.items():
-            for k in range(max(index)+1,r):
-                #Unrolled xor_rows(combs[index],d[k])
-                row = [0 if v1==v2 else 1 for v1,v2 in zip(combs[index],d[k])]
-                #row = xor_rows(combs[index],d[k])
-                if sum(row) == 1:
-                    return (*index,k)
-                combs2[(*index,k)] = row
-                iterations += 1
-            if iterations > 100000:
-                return None
-        if not combs2:
-            return None
-            #raise ValueError("Irreducible input has been given")
-        combs = combs2
+def _weight(row):
+    return bin(row).count('1')
+
+def _mask_to_indices(mask):
+    return tuple(i for i in range(mask.bit_length()) if (mask >> i) & 1)
 
-def greedy_reduction(m):
+def _unit_vectors(rows):
+    """Returns the vectors with a single 1 in the row space of ``rows``, together with
+    a bitmask of rows that sum to one of them (or None if there are none)."""
+    basis = IncrementalBasis()
+    for i, row in enumerate(rows): basis.add_row(i, row)
+    keys = basis.unit_combination()
+    if keys is None: return [], None
+    return [vec for vec, _ in basis.basis.values() if vec & (vec-1) == 0], sum(1 << i for i in keys)
+
+def find_minimal_sums(m, max_visited=50000, timeout=None):
+    """Returns a list of rows in m that can be added together to reduce one of the rows so that
+    it only contains a single 1. Used in :func:`greedy_reduction`. ``m`` can be a
+    :class:`Mat2` or a :class:`Mat2Packed`.
+
+    The smallest such set of rows is found with a meet-in-the-middle search on the packed
+    rows: the sums of up to ``h`` rows are found breadth-first, and a set of ``2h-1`` or
+    ``2h`` rows sums to a vector with a single 1 exactly when two of these sums differ in
+    a single column. Only the columns for which this vector is in the row space, which
+    Gaussian elimination tells us, have to be checked. When more than ``max_visited`` sums have been found, or the search
+    takes longer than ``timeout`` seconds, a not necessarily minimal set found by Gaussian
+    elimination is returned instead. Returns None if no set of rows works."""
+    if isinstance(m, Mat2Packed): rows = m.packed
+    else: rows = [sum(1 << j for j,v in enumerate(row) if v) for row in m.data]
+    for row in rows:
+        if row and not row & (row-1): return []
+    # Only the vectors with a single 1 that are in the row space can be reached
+    units, fallback = _unit_vectors(rows)
+    if fallback is None: return None
+    start = _timer()
+    dist = {0: 0}       # sum of rows -> number of rows needed
+    comb = {0: 0}       # sum of rows -> bitmask of those rows
+    layer = [0]
+    h = 0
+    while layer:
+        h += 1
+        new_layer = []
+        for v in layer:
+            cv = comb[v]
+            for i, row in enumerate(rows):
+                w = v ^ row
+                if w not in dist:
+                    dist[w] = h
+                    comb[w] = cv ^ (1 << i)
+                    new_layer.append(w)
+            if len(dist) > max_visited or (timeout is not None and _timer() - start > timeout):
+                return _mask_to_indices(fallback)
+        layer = new_layer
+        # First look for a set of 2h-1 rows, then for 2h rows
+        for d in (h-1, h):
+            for v in layer:
+                for e in units:
+                    w = v ^ e
+                    if dist.get(w, -1) == d:
+                        return _mask_to_indices(comb[v] ^ comb[w])
+    return _mask_to_indices(fallback)
+
+def greedy_reduction(m, max_visited=50000, timeout=None):
     """Returns a list of tuples (r1,r2) that specify which row should be added to which other row
-    in order to reduce one row of m to only contain a single 1. 
+    in order to reduce one row of m to only contain a single 1. ``m`` can be a :class:`Mat2`
+    or a :class:`Mat2Packed`. ``max_visited`` and ``timeout`` are passed to :func:`find_minimal_sums`.
     Used in :func:`extract.streaming_extract`"""
-    indices = find_minimal_sums(m)
+    indices = find_minimal_sums(m, max_visited, timeout)
     if not isinstance(indices, (list,tuple)): return indices
     indices = list(indices)
-    rows = {i:m.data[i] for i in indices}
-    weights = {i: sum(r) for i,r in rows.items()}
+    if isinstance(m, Mat2Packed):
+        rows = {i:m.packed[i] for i in indices}
+        weights = {i: _weight(r) for i,r in rows.items()}
+        xor_weight = lambda i, j: _weight(rows[i] ^ rows[j])
+        xor = lambda i, j: rows[i] ^ rows[j]
+    else:
+        rows = {i:m.data[i] for i in indices}
+        weights = {i: sum(r) for i,r in rows.items()}
+        xor_weight = lambda i, j: sum(xor_rows(rows[i],rows[j]))
+        xor = lambda i, j: xor_rows(rows[i],rows[j])
     result = []
     while len(indices)>1:
         best = (-1,-1)
@@ -339,7 +776,7 @@ def greedy_reduction(m):
         for i in indices:
             for j in indices:
                 if j <= i: continue
-                w = sum(xor_rows(rows[i],rows[j]))
+                w = xor_weight(i, j)
                 if weights[i] - w > reduction:
                     best = (j,i) # "Add row j to i"
                     reduction = weights[i] - w
@@ -348,7 +785,7 @@ def greedy_reduction(m):
                     reduction = weights[j] - w
         result.append(best)
         control, target = best
-        rows[target] = xor_rows(rows[control],rows[target])
+        rows[target] = xor(control, target)
         weights[target] = weights[target] - reduction
         indices.remove(control)
     return result
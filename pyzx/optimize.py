@@ -17,7 +17,7 @@
 
 from .circuit import Circuit, ZPhase, XPhase, CNOT, CZ, ParityPhase, NOT, HAD, SWAP, S, Z
 from .extract import permutation_as_swaps
-from .todd import todd_simp
+from .gatedag import GateDAG
 
 __all__ = ['basic_optimization', 'phase_block_optimize']
 
@@ -27,10 +27,18 @@ def full_optimize(circuit, quiet=True):
     return basic_optimization(c.to_basic_gates())
 
 def basic_optimization(circuit, quiet=True):
+    """Optimizes the circuit by moving Hadamards, Paulis and phase gates through it and
+    cancelling gates where possible. The gates are then put into a :class:`~gatedag.GateDAG`
+    for a final round of local rewrites, which cancels pairs of gates that only have
+    commuting gates in between them."""
     if not isinstance(circuit, Circuit):
         raise TypeError("Input must be a Circuit")
     o = Optimizer(circuit)
-    return o.parse_circuit(quiet=quiet)
+    c = o.parse_circuit(quiet=quiet)
+    dag = GateDAG.from_circuit(c)
+    if dag.simplify():
+        c.gates = dag.to_gates()
+    return c
 
 def toggle_element(l, e):
     if e in l: l.remove(e)
@@ -139,44 +147,11 @@ class Optimizer:
     def topological_sort_gates(self):
         """self.gates is a a {qubit:[list of gates]} dictionary. This function consumes this dictionary and outputs a
         single list of gates, with the gates in the correct order.
-        Note that 2-qubit gates are present in two entries in the dictionary and are identified with an ``index`` parameter."""
-        output = []
-        while any(self.gates.values()):
-            available_indices = set()
-            for q, gs in self.gates.items():
-                while gs:
-                    g = gs[0]
-                    if g.name not in ('CZ', 'CNOT'):
-                        output.append(gs.pop(0))
-                    elif g.index in available_indices:
-                        available_indices.remove(g.index)
-                        q2 = g.target if q == g.control else g.control
-                        self.gates[q2].remove(g)
-                        output.append(gs.pop(0))
-                    else:
-                        ty = 1 if (g.name == 'CZ' or g.control == q) else 2
-                        available_indices.add(g.index)
-                        remove = []
-                        for i, g2 in enumerate(gs[1:]):
-                            if (ty == 1 and isinstance(g2, ZPhase)) or (ty == 2 and isinstance(g2, XPhase)):
-                                output.append(g2)
-                                remove.append(i)
-                            elif g2.name not in ('CZ', 'CNOT'): break
-                            elif (ty == 1 and (g2.name == 'CZ' or g2.control == q)) or (ty == 2 and g2.name == 'CNOT' and g2.target == q):
-                                if g2.index in available_indices:
-                                    available_indices.remove(g2.index)
-                                    q2 = g2.target if q == g2.control else g2.control
-                                    self.gates[q2].remove(g2)
-                                    output.append(g2)
-                                    remove.append(i)
-                                else:
-                                    available_indices.add(g2.index)
-                            else:
-                                break
-                        for i in reversed(remove):
-                            gs.pop(i+1)
-                        break
-        return output
+        Note that 2-qubit gates are present in two entries in the dictionary. The ordering is done by a
+        :class:`~gatedag.GateDAG`, which only needs a single pass over the gates."""
+        dag = GateDAG.from_qubit_lists(self.qubits, self.gates)
+        self.gates = {i:list() for i in range(self.qubits)}
+        return dag.to_gates()
 
     
     def add_hadamard(self, t):
@@ -597,7 +572,21 @@ def greedy_consume_gates(gates, qubits):
     return block, hadamards
 
 
-def phase_block_optimize(circuit, pre_optimize=True, quiet=True):
+def phase_block_optimize(circuit, pre_optimize=True, quiet=True, **todd_options):
+    """Splits the circuit into blocks of CNOT, CZ and phase gates separated by Hadamards,
+    and reduces the T-count of every block with :func:`~todd.todd_simp`, to which the
+    ``todd_options`` are passed. For instance ``restarts=8, workers=4`` runs eight
+    randomised restarts of TODD on four processes for every block. These processes
+    are started once and used for all the blocks."""
+    from .todd import todd_simp # Imported here as it is only needed here
+    if (todd_options.get('workers', 1) > 1 and todd_options.get('restarts', 1) > 1
+            and todd_options.get('executor') is None):
+        from concurrent.futures import ProcessPoolExecutor
+        todd_options['executor'] = ProcessPoolExecutor(max_workers=todd_options['workers'])
+        try:
+            return phase_block_optimize(circuit, pre_optimize, quiet, **todd_options)
+        finally:
+            todd_options['executor'].shutdown()
     qubits = circuit.qubits
     o = Optimizer(circuit)
     if pre_optimize:
@@ -675,7 +664,7 @@ def phase_block_optimize(circuit, pre_optimize=True, quiet=True):
         newblock, hadamards = greedy_consume_gates(gates, qubits)
         block = list(reversed(revblock))
         block.extend(newblock)
-        block, permute = todd_simp(block, qubits, quiet=quiet)
+        block, permute = todd_simp(block, qubits, quiet=quiet, **todd_options)
         inverse = {v:k for k,v in permute.items()}
         gates = {inverse[t]:gs for t,gs in gates.items()}
         indices = set()
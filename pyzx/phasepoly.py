@@ -15,17 +15,21 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from collections import deque
+from timeit import default_timer as _timer
+
 from .circuit import Circuit, HAD, ZPhase, CNOT, CZ, S, NOT, Z
 from .linalg import Mat2
 
-def circuit_phase_polynomial_blocks(circuit, optimize=False, quiet=True):
+def circuit_phase_polynomial_blocks(circuit, optimize=False, quiet=True, workers=1, timeout=None):
         """Tries to moves gates around such that as many ZPhase, CZ and CNOT gates 
         are together, so that the resulting circuit can be seen as a sequence of 
         phase polynomials separated by Hadamard gates. Returns a tuple ``circuit, partition`` where
         the ``partition`` is a list, the odd elements of which are phase polynomials.
 
         If optimize is True then :func:`optimize_block` is called on every phase polynomial block to
-        optimize the gate count."""
+        optimize the gate count. This is done by :func:`optimize_blocks`, with the given
+        ``workers`` and ``timeout``."""
         gates = {i:list() for i in range(circuit.qubits)}
         for g in circuit.gates:
             if isinstance(g,ZPhase):
@@ -85,6 +89,7 @@ def circuit_phase_polynomial_blocks(circuit, optimize=False, quiet=True):
             else:
                 raise TypeError("Unsupported gate {!s}. Make sure you are in GH+CNOT form.".format(g))
         partition = []
+        blocks = [] # The indices of the phase polynomial blocks in the partition
         while any(gates.values()): # We keep parsing until all the gates have been consumed
             had_layer = []
             l = []
@@ -187,10 +192,13 @@ def circuit_phase_polynomial_blocks(circuit, optimize=False, quiet=True):
                 if not moved_gates: break
             
             if l: 
-                if optimize:
-                    l = optimize_block(l, circuit.qubits, quiet=quiet)
+                blocks.append(len(partition))
                 partition.append(l)
             
+        if optimize:
+            optimized = optimize_blocks([partition[i] for i in blocks], circuit.qubits,
+                                        workers=workers, timeout=timeout, quiet=quiet)
+            for i, l in zip(blocks, optimized): partition[i] = l
         c2 = Circuit(circuit.qubits)
         for gs in partition: c2.gates.extend(gs)
         return c2, partition
@@ -199,78 +207,44 @@ def circuit_phase_polynomial_blocks(circuit, optimize=False, quiet=True):
 
 def optimize_block(block, qubit_count, quiet=True):
     q = qubit_count
-    #First we construct the phase polynomial
-    variables = ['x{:03d}'.format(i) for i in range(q)]
-    phase_poly = BoolPolynomial()
-    expression_polys = []
-    for i in range(q):
-        p = BoolPolynomial()
-        p.add_term(variables[i],1)
-        expression_polys.append(p)
+    #First we construct the phase polynomial. The parity computed on every qubit is
+    #a bitmask over the input variables. Phases on parities of a single variable are
+    #terms of the polynomial, the others are kept apart by their parity.
+    phase_poly = BitPolynomial(modulus=2)
+    parity_phases = {}
+    expressions = [1 << i for i in range(q)]
 
     for g in block:
         if isinstance(g, ZPhase):
-            terms = expression_polys[g.target].terms
-            if len(terms) == 1:
-                term = list(terms.keys())[0]
-            else:
-                term = "({})".format("+".join(t[0] for t in terms.keys()))
-            phase_poly.add_term(term, g.phase)
+            par = expressions[g.target]
+            if par & (par - 1):
+                parity_phases[par] = (parity_phases.get(par, 0) + g.phase) % 2
+            else: phase_poly.add_term(par, g.phase)
         elif isinstance(g, CZ):
             tgt, ctrl = g.target, g.control
-            phase_poly.add_polynomial(expression_polys[tgt]*expression_polys[ctrl])
+            phase_poly.add_polynomial(BitPolynomial.parity(expressions[tgt])*BitPolynomial.parity(expressions[ctrl]))
         elif isinstance(g, CNOT):
             tgt, ctrl = g.target, g.control
-            expression_polys[tgt].add_polynomial(expression_polys[ctrl])
+            expressions[tgt] ^= expressions[ctrl]
 
-#     print(phase_poly)
-    #for p in expression_polys:
-    #    print(p)
-    
     # Then we extract the parities for the CZs and phases
     simple_phases = []
-    czs = []
-    parities = []
+    czs = set()
     for t, phase in phase_poly.terms.items():
-        if len(t) == 2:
-            czs.append((variables.index(t[0]),variables.index(t[1])))
-            continue
-        t = t[0]
-        if '+' in t:
-            l = []
-            for v in variables:
-                l.append(int(v in t[1:-1].split('+')))
-            parities.append((l,phase))
-        else: simple_phases.append((variables.index(t), phase))
-    
-    czs = set(czs)
-    
-    #print(simple_phases)
-    #print(czs)
-    #print(parities)
+        if t & (t - 1): czs.add(t) # A product of two variables
+        else: simple_phases.append((t.bit_length() - 1, phase))
+    parities = [(par, phase) for par, phase in parity_phases.items() if phase]
     
     # We try to make our cnots more efficient
     cnots = parity_network(q, [par for par,phase in parities])
-    #print("parity network cnots", cnots)
     m = Mat2.id(q)
     for cnot in cnots:
         m.row_add(cnot.control, cnot.target)
-    #print(m)
-    data = []
-    # for v in variables:
-    #     l = [int((v,) in p.terms) for p in expression_polys]
-    #     data.append(l)
-    for p in expression_polys:
-        l = [int((v,) in p.terms) for v in variables]
-        data.append(l)
-    #print(Mat2(data))
+    data = [[(e >> j) & 1 for j in range(q)] for e in expressions]
     target_matrix = Mat2(data) * m.inverse()
-    #print("target matrix")
-    #print(target_matrix)
     gates = target_matrix.to_cnots(optimize=True)
     for gate in reversed(gates):
         cnots.append(CNOT(gate.target,gate.control))
-    #cnots = cnots + target_matrix.to_cnots(optimize=True)
     old_cnots = [g for g in block if isinstance(g,CNOT)]
 
     if len(cnots) >= len(old_cnots):
@@ -279,26 +253,28 @@ def optimize_block(block, qubit_count, quiet=True):
         if not quiet: print("Optimized cnot count: {!s} -> {!s} ".format(len(old_cnots),len(cnots)))
 
     # Now we try to find good locations to put our CZs and phases, keeping track of the parities
-    # that the CNOTs are creating
-    m = Mat2.id(q)
-    cz_sites = {(0,r1,r2):[(r1,r2)] for r1 in range(q) for r2 in range(q) if r1<r2}
-    cz_parities = list(cz_sites.values())
+    # that the CNOTs are creating. A CZ between two qubits whose parities share no variables
+    # is the product of the CZs between every pair of their variables.
+    rows = [1 << i for i in range(q)]
+    cz_sites = {(0,r1,r2):frozenset([(1 << r1) | (1 << r2)]) for r1 in range(q) for r2 in range(q) if r1<r2}
+    cz_parities = set(cz_sites.values())
     phase_locations = []
     for i, cnot in enumerate(cnots):
-        m.row_add(cnot.control, cnot.target)
+        rows[cnot.target] ^= rows[cnot.control]
         for par, phase in parities:
-            if par in m.data: # The parity checks out, so put a phase here
-                phase_locations.append((i+1,m.data.index(par),phase))
+            if par in rows: # The parity checks out, so put a phase here
+                phase_locations.append((i+1,rows.index(par),phase))
                 parities.remove((par,phase))
                 break
         for r1 in range(q):
+            a = rows[r1]
             for r2 in range(r1+1, q):
-                if any(m.data[r1][j] and m.data[r2][j] for j in range(q)):
-                    continue
-                l = set([(min([j1,j2]),max([j1,j2])) for j1 in range(q) if m.data[r1][j1] for j2 in range(q) if m.data[r2][j2]])
+                b = rows[r2]
+                if a & b: continue
+                l = frozenset((1 << j1) | (1 << j2) for j1 in _bits(a) for j2 in _bits(b))
                 if l not in cz_parities:
                     cz_sites[(i+1,r1,r2)] = l
-                    cz_parities.append(l)
+                    cz_parities.add(l)
                     
     old_cz_count = sum(1 for g in block if isinstance(g,CZ))
     new_czs = []
@@ -344,6 +320,79 @@ def optimize_block(block, qubit_count, quiet=True):
 
 
 
+def _block_worker(conn, qubit_count, quiet):
+    while True:
+        job = conn.recv()
+        if job is None: break
+        i, block = job
+        try:
+            conn.send((i, optimize_block(block, qubit_count, quiet=quiet), None))
+        except Exception as e:
+            conn.send((i, None, e))
+    conn.close()
+
+def optimize_blocks(blocks, qubit_count, workers=1, timeout=None, quiet=True):
+    """Calls :func:`optimize_block` on every block in the list ``blocks``, and returns the
+    list of results in the same order.
+
+    If ``workers`` is larger than 1 or ``timeout`` is given, the blocks are optimized by
+    a pool of ``workers`` processes, each of which is sent one block at a time. A block
+    that takes longer than ``timeout`` seconds, or whose process dies, is left as it was.
+    Its process is then stopped and replaced by a new one."""
+    if workers <= 1 and timeout is None:
+        return [optimize_block(block, qubit_count, quiet=quiet) for block in blocks]
+    import multiprocessing as mp
+    from multiprocessing.connection import wait
+    results = list(blocks)
+    pending = deque(enumerate(blocks))
+    idle = []
+    busy = {} # connection --> (process, block index, deadline)
+    def stop(p, conn):
+        p.terminate()
+        p.join()
+        conn.close()
+    try:
+        while pending or busy:
+            while pending and len(busy) < workers:
+                if idle: p, conn = idle.pop()
+                else:
+                    conn, child = mp.Pipe()
+                    p = mp.Process(target=_block_worker, args=(child, qubit_count, quiet))
+                    p.daemon = True
+                    p.start()
+                    child.close()
+                i, block = pending.popleft()
+                conn.send((i, block))
+                busy[conn] = (p, i, _timer() + timeout if timeout is not None else None)
+            deadlines = [d for _,_,d in busy.values() if d is not None]
+            wait_time = max(0, min(deadlines) - _timer()) if deadlines else None
+            for conn in wait(list(busy), wait_time):
+                p, i, _ = busy.pop(conn)
+                try:
+                    _, result, error = conn.recv()
+                except (EOFError, OSError):
+                    if not quiet: print("Block {:d}: worker died".format(i))
+                    stop(p, conn)
+                    continue
+                idle.append((p, conn))
+                if error is not None: raise error
+                results[i] = result
+            now = _timer()
+            for conn, (p, i, deadline) in list(busy.items()):
+                if deadline is not None and now >= deadline:
+                    if not quiet: print("Block {:d}: out of time".format(i))
+                    del busy[conn]
+                    stop(p, conn)
+    finally:
+        for p, conn in idle:
+            conn.send(None)
+            conn.close()
+            p.join()
+        for conn, (p, _, _) in busy.items():
+            stop(p, conn)
+    return results
+
+
 class Polynomial:
     def __init__(self,poly=None):
         if poly:
@@ -424,8 +473,87 @@ class BoolPolynomial(Polynomial):
         else: self.terms[term] = val
 
 
+def _bits(x):
+    """Generates the indices of the bits that are set in ``x``, from low to high."""
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+class BitPolynomial(object):
+    """A polynomial in the Boolean variables ``x0, x1, ...`` in which every term is
+    a product of distinct variables. A term is stored as an integer bitmask, with bit
+    ``i`` set when ``xi`` appears in it, so that multiplying two terms is a bitwise
+    OR. If ``modulus`` is given, the coefficients are taken modulo it."""
+    def __init__(self, poly=None, modulus=None):
+        if poly:
+            self.terms = poly.terms.copy()
+            self.modulus = poly.modulus
+        else:
+            self.terms = {}
+            self.modulus = modulus
+
+    @classmethod
+    def parity(cls, mask, modulus=2):
+        """Returns the sum of the variables in the bitmask ``mask``."""
+        p = cls(modulus=modulus)
+        for i in _bits(mask): p.terms[1 << i] = 1
+        return p
+    
+    def copy(self):
+        return type(self)(self)
+    
+    def __str__(self):
+        l = []
+        for t in sorted(self.terms.keys()):
+            val = self.terms[t]
+            l.append("{!s}{}".format(val if val!=1 else "", "".join("x{:d}".format(i) for i in _bits(t)) or "1"))
+        return " + ".join(l)
+    
+    def __repr__(self):
+        return str(self)
+
+    def __eq__(self, other):
+        return isinstance(other, BitPolynomial) and self.terms == other.terms
+    
+    def add_term(self, term, value):
+        """Adds ``value`` times the product of the variables in the bitmask ``term``."""
+        if term in self.terms: value += self.terms[term]
+        if self.modulus is not None: value %= self.modulus
+        if value: self.terms[term] = value
+        elif term in self.terms: del self.terms[term]
+    
+    def add_polynomial(self, poly):
+        for term, value in poly.terms.items():
+            self.add_term(term, value)
+    
+    def __add__(self, other):
+        p = self.copy()
+        p.add_polynomial(other)
+        return p
+    
+    def __mul__(self, other):
+        if not isinstance(other, BitPolynomial):
+            return other * self
+        p = type(self)(modulus=self.modulus)
+        for t1, v1 in self.terms.items():
+            for t2, v2 in other.terms.items():
+                p.add_term(t1 | t2, v1*v2)
+        return p
+    
+    def __rmul__(self, other):
+        p = type(self)(modulus=self.modulus)
+        for t, v in self.terms.items():
+            p.add_term(t, other*v)
+        return p
+
+
 def parity_network(n, S):
-    # See page 14 of https://arxiv.org/pdf/1712.01859.pdf
+    """Returns a list of CNOT gates on ``n`` qubits such that every parity in ``S`` is
+    computed on some qubit at some point in the circuit, using the algorithm of
+    page 14 of https://arxiv.org/pdf/1712.01859.pdf. The parities are given as bitmasks
+    over the qubits, or as lists of bits."""
+    S = [y if isinstance(y, int) else sum(1 << j for j, v in enumerate(y) if v) for y in S]
     c = [] # List of cnots
     Q = [] # stack
     Q.append((S,list(range(n)),-1))
@@ -433,24 +561,29 @@ def parity_network(n, S):
         S, I, i = Q.pop()
         if not S or not I: continue
         if i != -1:
+            ibit = 1 << i
             while True:
                 for j in range(n):
                     if j==i: continue
-                    if all(y[j] for y in S):
+                    jbit = 1 << j
+                    if all(y & jbit for y in S):
                         c.append(CNOT(j,i))
                         for (Sp,Ip,ip) in (Q+[(S,I,i)]):
-                            for y in Sp:
-                                y[j] = (y[i]+y[j])%2
+                            Sp[:] = [y ^ jbit if y & ibit else y for y in Sp]
                         break
                 else:
                     break
-        j = max(I, key=lambda j: max([len([y for y in S if y[j]==0]),len([y for y in S if y[j]==1])]))
-        S0 = [y.copy() for y in S if y[j]==0]
-        S1 = [y.copy() for y in S if y[j]==1]
+        def split(j):
+            ones = sum(1 for y in S if (y >> j) & 1)
+            return max(len(S) - ones, ones)
+        j = max(I, key=split)
+        jbit = 1 << j
+        S0 = [y for y in S if not y & jbit]
+        S1 = [y for y in S if y & jbit]
         Iprime = [jp for jp in I if jp!=j]
         if i == -1:
             Q.append((S1,Iprime,j))
         else:
             Q.append((S1,[jp for jp in I if jp!=i],i))
         Q.append((S0,Iprime, i))
-    return c
\ No newline at end of file
+    return c
@@ -134,7 +134,7 @@ def match_spider(g):
             return [[v0,v1]]
     return []
 
-def match_spider_parallel(g, matchf=None, num=-1):
+def match_spider_parallel(g, matchf=None, num=-1, candidates=None):
     """Finds non-interacting matchings of the spider fusion rule.
     
     :param g: An instance of a ZX-graph.
@@ -143,16 +143,23 @@ def match_spider_parallel(g, matchf=None, num=-1):
        consider all edges.
     :param num: Maximal amount of matchings to find. If -1 (the default)
        tries to find as many as possible.
+    :param candidates: An optional collection of edges to restrict the search to.
+       Passing None will consider all edges of ``g``.
     :rtype: List of 2-tuples ``(v1, v2)``
     """
-    if matchf != None: candidates = set([e for e in g.edges() if matchf(e)])
-    else: candidates = g.edge_set()
+    if candidates is not None:
+        if matchf != None: candidates = set([e for e in candidates if matchf(e)])
+        else: candidates = set(candidates)
+    elif matchf != None: candidates = set([e for e in g.edges() if matchf(e)])
+    else: candidates = g.edges_of_type(1) # Not copied, as the graph isn't changed here
     types = g.types()
     
     i = 0
     m = []
-    while (num == -1 or i < num) and len(candidates) > 0:
-        e = candidates.pop()
+    excluded = set()
+    for e in candidates:
+        if num != -1 and i >= num: break
+        if e in excluded: continue
         if g.edge_type(e) != 1: continue
         v0, v1 = g.edge_st(e)
         v0t = types[v0]
@@ -160,9 +167,9 @@ def match_spider_parallel(g, matchf=None, num=-1):
         if (v0t == v1t and v0t!=0):
                 i += 1
                 for v in g.neighbours(v0):
-                    for c in g.incident_edges(v): candidates.discard(c)
+                    excluded.update(g.incident_edges(v))
                 for v in g.neighbours(v1):
-                    for c in g.incident_edges(v): candidates.discard(c)
+                    excluded.update(g.incident_edges(v))
                 m.append([v0,v1])
     return m
 
@@ -176,7 +183,7 @@ def spider(g, matches):
     for m in matches:
         v0 = m[0]
         v1 = m[1]
-        g.set_phase(v0, g.phase(v0) + g.phase(v1))
+        g.add_to_phase(v0, g.phase(v1))
         if g.track_phases:
             g.fuse_phases(v0,v1)
 
@@ -227,7 +234,24 @@ def match_pivot(g):
     return match_pivot_parallel(g, num=1, check_edge_types=True)
 
 
-def match_pivot_parallel(g, matchf=None, num=-1, check_edge_types=False):
+def _pauli_edges(g):
+    """Generates the edges between two Z-spiders with a Pauli phase, the only edges
+    that :func:`match_pivot_parallel` can match, without going over all the edges."""
+    zs = g.pauli_vertices() & g.vertices_of_type(1)
+    for v0 in zs:
+        for v1 in g.neighbours(v0):
+            if v1 > v0 and v1 in zs: yield g.edge(v0,v1)
+
+def _pauli_phase_edges(g):
+    """Generates the edges between a Z-spider with a Pauli phase and a Z-spider with
+    another phase, which are the edges :func:`match_pivot_gadget` looks at."""
+    types = g.types()
+    pauli = g.pauli_vertices()
+    for v0 in pauli & g.vertices_of_type(1):
+        for v1 in list(g.neighbours(v0)):
+            if types[v1] == 1 and v1 not in pauli: yield g.edge(v0,v1)
+
+def match_pivot_parallel(g, matchf=None, num=-1, check_edge_types=False, candidates=None):
     """Finds non-interacting matchings of the pivot rule.
     
     :param g: An instance of a ZX-graph.
@@ -238,25 +262,31 @@ def match_pivot_parallel(g, matchf=None, num=-1, check_edge_types=False):
     :param matchf: An optional filtering function for candidate edge, should
        return True if a edge should considered as a match. Passing None will
        consider all edges.
+    :param candidates: An optional collection of edges to restrict the search to.
+       Passing None will consider all edges of ``g``.
     :rtype: List of 4-tuples. See :func:`pivot` for the details.
     """
-    if matchf != None: candidates = set([e for e in g.edges() if matchf(e)])
-    else: candidates = g.edge_set()
+    if candidates is not None:
+        if matchf != None: candidates = set([e for e in candidates if matchf(e)])
+        else: candidates = set(candidates)
+    elif matchf != None: candidates = set([e for e in g.edges() if matchf(e)])
+    else: candidates = _pauli_edges(g)
     types = g.types()
-    phases = g.phases()
+    phases = g.int_phases()
+    d = g.phase_denominator()
     
     i = 0
     m = []
-    while (num == -1 or i < num) and len(candidates) > 0:
-        e = candidates.pop()
+    excluded = set()
+    for e in candidates:
+        if num != -1 and i >= num: break
+        if e in excluded: continue
         if not check_edge_types and g.edge_type(e) != 2: continue
         v0, v1 = g.edge_st(e)
 
         if not (types[v0] == 1 and types[v1] == 1): continue
 
-        v0a = phases[v0]
-        v1a = phases[v1]
-        if not ((v0a in (0,1)) and (v1a in (0,1))): continue
+        if phases[v0] % d or phases[v1] % d: continue # Both need a Pauli phase
 
         invalid_edge = False
 
@@ -287,9 +317,9 @@ def match_pivot_parallel(g, matchf=None, num=-1, check_edge_types=False):
 
         i += 1
         for v in v0n:
-            for c in g.incident_edges(v): candidates.discard(c)
+            excluded.update(g.incident_edges(v))
         for v in v1n:
-            for c in g.incident_edges(v): candidates.discard(c)
+            excluded.update(g.incident_edges(v))
         b0 = list(v0b)
         b1 = list(v1b)
         m.append([v0,v1,b0,b1])
@@ -300,33 +330,28 @@ def match_pivot_gadget(g, matchf=None, num=-1):
     Pauli vertices, it looks for a pair of an interior Pauli vertex and an
     interior non-Clifford vertex in order to gadgetize the non-Clifford vertex."""
     if matchf != None: candidates = set([e for e in g.edges() if matchf(e)])
-    else: candidates = g.edge_set()
+    else: candidates = _pauli_phase_edges(g)
     types = g.types()
-    phases = g.phases()
+    phases = g.int_phases()
+    d = g.phase_denominator()
     rs = g.rows()
     
     edge_list = []
     i = 0
     m = []
-    while (num == -1 or i < num) and len(candidates) > 0:
-        e = candidates.pop()
+    excluded = set()
+    for e in candidates:
+        if num != -1 and i >= num: break
+        if e in excluded: continue
         v0, v1 = g.edge_st(e)
 
         if not (types[v0] == 1 and types[v1] == 1): continue
 
-        v0a = phases[v0]
-        v1a = phases[v1]
-        
-        if v0a not in (0,1):
-            if v1a in (0,1):
-                t = v0
-                v0 = v1
-                v1 = t
-                t = v0a
-                v0a = v1a
-                v1a = t
+        if phases[v0] % d:
+            if not phases[v1] % d:
+                v0, v1 = v1, v0
             else: continue
-        elif v1a in (0,1): continue
+        elif not phases[v1] % d: continue
         # Now v0 has a Pauli phase and v1 has a non-Pauli phase
         
         v0n = list(g.neighbours(v0))
@@ -351,7 +376,7 @@ def match_pivot_gadget(g, matchf=None, num=-1):
         if any(types[w]!=1 for w in v1n): continue
         # Both v0 and v1 are interior
         
-        v = g.add_vertex(1,-2,rs[v0],v1a)
+        v = g.add_vertex(1,-2,rs[v0],g.phase(v1))
         g.set_phase(v1, 0)
         g.set_qubit(v0,-1)
         g.update_phase_index(v1,v)
@@ -359,7 +384,7 @@ def match_pivot_gadget(g, matchf=None, num=-1):
         
         m.append([v0,v1,[],[v]])
         i += 1
-        for c in discard_edges: candidates.discard(c)
+        excluded.update(discard_edges)
     g.add_edges(edge_list,1)
     return m
 
@@ -369,9 +394,10 @@ def match_pivot_boundary(g, matchf=None, num=-1):
     Pauli vertices, it looks for a pair of an interior Pauli vertex and a
     boundary non-Pauli vertex in order to gadgetize the non-Pauli vertex."""
     if matchf != None: candidates = set([v for v in g.vertices() if matchf(v)])
-    else: candidates = g.vertex_set()
+    else: candidates = g.pauli_vertices() & g.vertices_of_type(1)
     types = g.types()
-    phases = g.phases()
+    phases = g.int_phases()
+    d = g.phase_denominator()
     rs = g.rows()
     
     edge_list = []
@@ -380,7 +406,7 @@ def match_pivot_boundary(g, matchf=None, num=-1):
     m = []
     while (num == -1 or i < num) and len(candidates) > 0:
         v = candidates.pop()
-        if types[v] != 1 or phases[v] not in (0,1): continue
+        if types[v] != 1 or phases[v] % d: continue
 
         good_vert = True
         w = None
@@ -398,7 +424,7 @@ def match_pivot_boundary(g, matchf=None, num=-1):
             boundaries = [b for b in g.neighbours(n) if types[b]==0]
             if len(boundaries) != 1: # n is not on the boundary
                 continue        #, or it is connected to both an input and an output
-            if phases[n] and phases[n].denominator == 2:
+            if phases[n] % d and not (2*phases[n]) % d: # phase of n is pi/2 or 3pi/2
                 w = n
                 bound = boundaries[0]
             if not w:
@@ -408,7 +434,7 @@ def match_pivot_boundary(g, matchf=None, num=-1):
         
         if bound in g.inputs: mod = 0.5
         else: mod = -0.5
-        v1 = g.add_vertex(1,-2,rs[w]+mod,phases[w])
+        v1 = g.add_vertex(1,-2,rs[w]+mod,g.phase(w))
         v2 = g.add_vertex(1,-1,rs[w]+mod,0)
         g.set_phase(w, 0)
         g.update_phase_index(w,v1)
@@ -489,7 +515,7 @@ def match_lcomp(g):
     """Same as :func:`match_lcomp_parallel`, but with ``num=1``"""
     return match_lcomp_parallel(g, num=1, check_edge_types=True)
 
-def match_lcomp_parallel(g, vertexf=None, num=-1, check_edge_types=False):
+def match_lcomp_parallel(g, vertexf=None, num=-1, check_edge_types=False, candidates=None):
     """Finds noninteracting matchings of the local complementation rule.
     
     :param g: An instance of a ZX-graph.
@@ -500,21 +526,26 @@ def match_lcomp_parallel(g, vertexf=None, num=-1, check_edge_types=False):
     :param vertexf: An optional filtering function for candidate vertices, should
        return True if a vertex should be considered as a match. Passing None will
        consider all vertices.
+    :param candidates: An optional collection of vertices to restrict the search to.
+       Passing None will consider all vertices of ``g``.
     :rtype: List of 2-tuples ``(vertex, neighbours)``.
     """
-    if vertexf != None: candidates = set([v for v in g.vertices() if vertexf(v)])
-    else: candidates = g.vertex_set()
+    if candidates is not None:
+        if vertexf != None: candidates = set([v for v in candidates if vertexf(v)])
+        else: candidates = set(candidates)
+    elif vertexf != None: candidates = set([v for v in g.vertices() if vertexf(v)])
+    else: candidates = g.clifford_vertices() - g.pauli_vertices()
     types = g.types()
-    phases = g.phases()
+    phases = g.int_phases()
+    d = g.phase_denominator()
     
     i = 0
     m = []
     while (num == -1 or i < num) and len(candidates) > 0:
         v = candidates.pop()
         vt = types[v]
-        va = g.phase(v)
         
-        if not (va == Fraction(1,2) or va == Fraction(3,2)): continue
+        if not (2*phases[v] == d or 2*phases[v] == 3*d): continue # phase is pi/2 or 3pi/2
 
         if check_edge_types and not (
             all(g.edge_type(e) == 2 for e in g.incident_edges(v))
@@ -552,7 +583,7 @@ def match_ids(g):
     """Finds a single identity node. See :func:`match_ids_parallel`."""
     return match_ids_parallel(g, num=1)
 
-def match_ids_parallel(g, vertexf=None, num=-1):
+def match_ids_parallel(g, vertexf=None, num=-1, candidates=None):
     """Finds non-interacting identity vertices.
     
     :param g: An instance of a ZX-graph.
@@ -561,12 +592,17 @@ def match_ids_parallel(g, vertexf=None, num=-1):
     :param vertexf: An optional filtering function for candidate vertices, should
        return True if a vertex should be considered as a match. Passing None will
        consider all vertices.
+    :param candidates: An optional collection of vertices to restrict the search to.
+       Passing None will consider all vertices of ``g``.
     :rtype: List of 4-tuples ``(identity_vertex, neighbour1, neighbour2, edge_type)``.
     """
-    if vertexf != None: candidates = set([v for v in g.vertices() if vertexf(v)])
-    else: candidates = g.vertex_set()
+    if candidates is not None:
+        if vertexf != None: candidates = set([v for v in candidates if vertexf(v)])
+        else: candidates = set(candidates)
+    elif vertexf != None: candidates = set([v for v in g.vertices() if vertexf(v)])
+    else: candidates = set(g.pauli_vertices())
     types = g.types()
-    phases = g.phases()
+    phases = g.int_phases()
 
     i = 0
     m = []
@@ -606,12 +642,14 @@ def match_phase_gadgets(g):
     :rtype: List of 5-tuples ``(axel,leaf, total combined phase, other axels with same targets, other leafs)``.
     """
     phases = g.phases()
+    iphases = g.int_phases()
+    d = g.phase_denominator()
 
     parities = dict()
     gadgets = dict()
     # First we find all the phase-gadgets, and the list of vertices they act on
     for v in g.vertices():
-        if phases[v] != 0 and phases[v].denominator > 2 and len(list(g.neighbours(v)))==1:
+        if (2*iphases[v]) % d and len(list(g.neighbours(v)))==1: # v has a non-Clifford phase
             n = list(g.neighbours(v))[0]
             gadgets[n] = v
             par = frozenset(set(g.neighbours(n)).difference({v}))
@@ -0,0 +1,87 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import sys
+import json
+
+from ..batch import batch_optimize, circuit_files
+
+description="""Optimises many circuits in parallel
+
+To optimise all the circuits in a directory run
+    python -m pyzx batch circuits/QFT_and_Adders
+
+Every circuit is handled in its own process. The results are written as one JSON
+object per line as soon as a circuit is done, either to standard output or to the
+file given by -o. With --resume the circuits already in that file are skipped, so
+that an interrupted run can be continued:
+    python -m pyzx batch -j 8 --timeout 600 -o results.jsonl --resume circuits/*
+"""
+
+import argparse
+parser = argparse.ArgumentParser(prog="pyzx batch", description=description, formatter_class=argparse.RawTextHelpFormatter)
+parser.add_argument('sources',type=str,nargs='+',help='circuit files or directories containing them')
+parser.add_argument('-j',type=int,default=None, dest='workers',
+    help='number of circuits to process at the same time (default is the number of CPUs)')
+parser.add_argument('--timeout',type=float,default=None,
+    help='maximum number of seconds per circuit')
+parser.add_argument('--memory',type=float,default=None,
+    help='maximum amount of memory per circuit in MB')
+parser.add_argument('--pattern',type=str,default=None,
+    help='only use the files in directories matching this glob pattern, e.g. "*_before"')
+parser.add_argument('-g',type=str,default='full', dest='simp',
+    help='ZX-simplifier to use. Options are full (default) or cliff')
+parser.add_argument('--dense',default=False, action='store_true',
+    help='do the Clifford simplifications on a dense bit matrix')
+parser.add_argument('-d',type=str,default=None, dest='output_dir',
+    help='directory to write the optimised circuits to as QASM files')
+parser.add_argument('-o',type=str,default=None, dest='output',
+    help='file to append the results to (default is standard output)')
+parser.add_argument('--resume',default=False, action='store_true',
+    help='skip the circuits that already have a result in the output file')
+
+def main(args):
+    options = parser.parse_args(args)
+    if options.simp not in ('full', 'cliff'):
+        print("Unsupported simplifier {}. Please use full or cliff".format(options.simp))
+        return
+    sources = circuit_files(options.sources, options.pattern)
+    missing = [s for s in sources if not os.path.exists(s)]
+    if missing:
+        print("File {} does not exist".format(missing[0]))
+        return
+    if options.resume and options.output and os.path.exists(options.output):
+        done = set()
+        with open(options.output) as f:
+            for line in f:
+                try: done.add(json.loads(line)['circuit'])
+                except (ValueError, KeyError): pass # A line cut off by an earlier crash
+        sources = [s for s in sources if s not in done]
+    if options.output_dir and not os.path.isdir(options.output_dir):
+        os.makedirs(options.output_dir)
+    memory = int(options.memory*1024*1024) if options.memory else None
+
+    out = open(options.output, 'a') if options.output else sys.stdout
+    try:
+        for result in batch_optimize(sources, workers=options.workers, timeout=options.timeout,
+                                     memory_limit=memory, simplifier=options.simp,
+                                     output_dir=options.output_dir, dense=options.dense):
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout: out.close()
@@ -61,7 +61,7 @@ def main(args):
     else:
         dtype = options.outformat
     if not options.dest:
-        base = os.path.splitext(options)[0]
+        base = os.path.splitext(options.source)[0]
         dest = base + "." + dtype
     else:
         dest = options.dest
@@ -92,9 +92,4 @@ def main(args):
     c3 = c3.split_phase_gates()
     if options.verbose: print(c3.stats())
     print("Writing output to {}".format(os.path.abspath(dest)))
-    if dtype == 'qc': output = c3.to_qc()
-    if dtype == 'qasm': output = c3.to_qasm()
-    if dtype == 'quipper': output = c3.to_quipper()
-    f = open(dest, 'w')
-    f.write(output)
-    f.close()
+    c3.save(dest, dtype)
@@ -23,22 +23,102 @@ use the power of :func:``full_reduce`` while not changing the structure of the g
 
 from __future__ import print_function
 
-try:
-    import multiprocessing as mp
-except ImportError:
-    pass
+import json
+from contextlib import contextmanager
+from timeit import default_timer as _timer
 
 __all__ = ['bialg_simp','spider_simp', 'id_simp', 'phase_free_simp', 'pivot_simp', 
         'pivot_gadget_simp', 'pivot_boundary_simp', 'gadget_simp',
-        'lcomp_simp', 'clifford_simp', 'tcount', 'to_gh', 'to_rg', 'full_reduce', 'teleport_reduce']
+        'lcomp_simp', 'clifford_simp', 'dense_pass', 'tcount', 'to_gh', 'to_rg', 'full_reduce', 'teleport_reduce',
+        'SimpStats', 'add_simp_hook', 'remove_simp_hook']
 
 from .rules import *
+from .dense import DenseCore
+
+# Callbacks that are called with a record of every rule run, see :func:`add_simp_hook`.
+_simp_hooks = []
+
+def add_simp_hook(hook):
+    """Registers a callback that is called after every run of a rewrite rule through
+    :func:`simp`, so also for all the rules applied by e.g. :func:`clifford_simp` and
+    :func:`full_reduce`. The callback gets a dictionary with the following keys:
+
+    - ``rule``: the name of the rule.
+    - ``iterations``: a list with for every iteration a dictionary giving the number of
+      ``matches``, the time spent in ``match`` and ``rewrite``, and the change in the number
+      of ``vertices`` and ``edges``.
+    - ``match_time``, ``rewrite_time``: the total time in seconds spent on matching and rewriting.
+    - ``vertices``, ``edges``, ``tcount``: the change in the number of vertices, edges
+      and non-Clifford phases caused by the run.
+
+    See :class:`SimpStats` for a collector of these records."""
+    _simp_hooks.append(hook)
+
+def remove_simp_hook(hook):
+    """Unregisters a callback previously registered with :func:`add_simp_hook`."""
+    _simp_hooks.remove(hook)
+
+
+class SimpStats(object):
+    """Collects the records of all the rule runs while it is registered as a hook.
+    It can be used as a context manager::
+
+        with SimpStats() as stats:
+            full_reduce(g)
+        print(stats.to_json())
+    """
+    def __init__(self):
+        self.runs = []
+
+    def __call__(self, record):
+        self.runs.append(record)
+
+    def __enter__(self):
+        add_simp_hook(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        remove_simp_hook(self)
+
+    def summary(self):
+        """Returns a dictionary mapping every rule name to its totals over all runs."""
+        rules = dict()
+        for r in self.runs:
+            d = rules.setdefault(r['rule'], {'runs': 0, 'iterations': 0, 'matches': 0,
+                            'match_time': 0.0, 'rewrite_time': 0.0,
+                            'vertices': 0, 'edges': 0, 'tcount': 0})
+            d['runs'] += 1
+            d['iterations'] += len(r['iterations'])
+            d['matches'] += sum(it['matches'] for it in r['iterations'])
+            for k in ('match_time', 'rewrite_time', 'vertices', 'edges', 'tcount'):
+                d[k] += r[k]
+        return rules
+
+    def to_json(self, indent=None):
+        """Returns a JSON string containing the :meth:`summary` and all the individual runs."""
+        return json.dumps({'rules': self.summary(), 'runs': self.runs}, indent=indent)
+
+
+# Matchers that can be restricted to a set of candidate edges (``'e'``) or
+# vertices (``'v'``), so that :func:`simp` only needs to rematch the part
+# of the graph touched by the previous rewrite.
+incremental_matchers = {
+    match_spider_parallel: 'e',
+    match_pivot_parallel: 'e',
+    match_lcomp_parallel: 'v',
+    match_ids_parallel: 'v',
+}
 
 def simp(g, name, match, rewrite, matchf=None, quiet=False):
     """Helper method for generating simplification strategies based on rules in rules_.
     It keeps matching and rewriting with the given methods until it can no longer do so.
     Example usage: ``simp(g, 'spider_simp', rules.match_spider_parallel, rules.spider)``
 
+    When ``match`` is one of the matchers in :data:`incremental_matchers`, only the first
+    iteration matches on the whole graph. Every later iteration only looks at the
+    vertices touched by the previous rewrite and their neighbours, as nothing outside
+    of that region can have become a new match.
+
     :param g: The graph that needs to be simplified.
     :param str name: The name of this rewrite rule.
     :param match: One of the ``match_*`` functions of rules_.
@@ -46,30 +126,97 @@ def simp(g, name, match, rewrite, matchf=None, quiet=False):
     :param matchf: An optional filtering function on candidate vertices or edges, which
        is passed as the second argument to the match function.
     :param quiet: Suppress output on numbers of matches found during simplification."""
+    # The igraph backend renumbers vertices on removal, so we can't keep a worklist
+    kind = incremental_matchers.get(match) if g.backend != 'igraph' else None
+    if _simp_hooks: record = _start_record(g, name)
+    candidates = None
     i = 0
-    new_matches = True
-    while new_matches:
-        new_matches = False
-        if matchf != None:
+    while True:
+        if _simp_hooks: t0 = _timer()
+        if candidates is not None:
+            if not candidates: break
+            m = match(g, matchf, candidates=candidates)
+        elif matchf != None:
             m = match(g, matchf)
         else:
             m = match(g)
-        if len(m) > 0:
-            i += 1
-            if i == 1 and not quiet: print("{}: ".format(name),end='')
-            if not quiet: print(len(m), end='')
-            #print(len(m), end='', flush=True) #flush only supported on Python >3.3
-            etab, rem_verts, rem_edges, check_isolated_vertices = rewrite(g, m)
-            g.add_edge_table(etab)
-            g.remove_edges(rem_edges)
-            g.remove_vertices(rem_verts)
-            if check_isolated_vertices: g.remove_isolated_vertices()
-            if not quiet: print('. ', end='')
-            #print('. ', end='', flush=True)
-            new_matches = True
+        if _simp_hooks: t1 = _timer()
+        if len(m) == 0:
+            if _simp_hooks: record['match_time'] += t1 - t0
+            break
+        i += 1
+        if i == 1 and not quiet: print("{}: ".format(name),end='')
+        if not quiet: print(len(m), end='')
+        #print(len(m), end='', flush=True) #flush only supported on Python >3.3
+        if _simp_hooks: nv, ne = g.num_vertices(), g.num_edges()
+        etab, rem_verts, rem_edges, check_isolated_vertices = rewrite(g, m)
+        if kind: touched = _touched_vertices(g, etab, rem_verts, rem_edges)
+        g.add_edge_table(etab)
+        g.remove_edges(rem_edges)
+        g.remove_vertices(rem_verts)
+        if kind:
+            touched.difference_update(rem_verts)
+            if check_isolated_vertices:
+                if i == 1: g.remove_isolated_vertices()
+                else:
+                    # Only vertices we touched can have lost all their edges
+                    isolated = [v for v in touched if g.vertex_degree(v) == 0]
+                    g.remove_vertices(isolated)
+                touched = set(v for v in touched if g.vertex_degree(v) != 0)
+            if _simp_hooks: t2 = _timer()
+            candidates = _rematch_candidates(g, touched, kind)
+        elif check_isolated_vertices: g.remove_isolated_vertices()
+        if _simp_hooks:
+            # Computing the candidates for the next iteration counts as matching
+            t3 = _timer()
+            if not kind: t2 = t3
+            record['iterations'].append({'matches': len(m), 'match_time': t1 - t0 + t3 - t2,
+                'rewrite_time': t2 - t1, 'vertices': g.num_vertices() - nv, 'edges': g.num_edges() - ne})
+        if not quiet: print('. ', end='')
+        #print('. ', end='', flush=True)
     if not quiet and i>0: print(' {!s} iterations'.format(i))
+    if _simp_hooks: _finish_record(g, record)
     return i
 
+def _start_record(g, name):
+    return {'rule': name, 'iterations': [], 'match_time': 0.0, 'rewrite_time': 0.0,
+            'vertices': g.num_vertices(), 'edges': g.num_edges(), 'tcount': tcount(g)}
+
+def _finish_record(g, record):
+    for it in record['iterations']:
+        record['match_time'] += it['match_time']
+        record['rewrite_time'] += it['rewrite_time']
+    record['vertices'] = g.num_vertices() - record['vertices']
+    record['edges'] = g.num_edges() - record['edges']
+    record['tcount'] = tcount(g) - record['tcount']
+    for hook in list(_simp_hooks): hook(record)
+
+def _touched_vertices(g, etab, rem_verts, rem_edges):
+    """Returns the set of vertices whose neighbourhood or phase is changed by
+    applying the output of a rewrite rule. Should be called before the rewrite is applied."""
+    touched = set()
+    for e in etab:
+        touched.update(g.edge_st(e))
+    for e in rem_edges:
+        touched.update(g.edge_st(e))
+    for v in rem_verts:
+        touched.update(g.neighbours(v))
+    return touched
+
+def _rematch_candidates(g, touched, kind):
+    """Returns the vertices (``kind == 'v'``) or edges (``kind == 'e'``) that need
+    to be rematched after a rewrite touched the vertices in ``touched``. This includes
+    the neighbours of the touched vertices, as these could have been discarded as
+    overlapping with a match in the previous iteration."""
+    vs = set(touched)
+    for v in touched:
+        vs.update(g.neighbours(v))
+    if kind == 'v': return vs
+    es = set()
+    for v in vs:
+        es.update(g.incident_edges(v))
+    return es
+
 def pivot_simp(g, matchf=None, quiet=False):
     return simp(g, 'pivot_simp', match_pivot_parallel, pivot, matchf=matchf, quiet=quiet)
 
@@ -100,11 +247,23 @@ def phase_free_simp(g, quiet=False):
     spider_simp(g, quiet=quiet)
     bialg_simp(g, quiet=quiet)
 
-def interior_clifford_simp(g, quiet=False):
+def interior_clifford_simp(g, quiet=False, workers=1, dense=False, pool=None):
     """Keeps doing the simplifications ``id_simp``, ``spider_simp``, 
-    ``pivot_simp`` and ``lcomp_simp`` until none of them can be applied anymore."""
-    spider_simp(g, quiet=quiet)
-    to_gh(g)
+    ``pivot_simp`` and ``lcomp_simp`` until none of them can be applied anymore.
+    If ``workers`` is larger than 1, most of the rewrites are first done in parallel
+    using :func:`parallel_clifford_pass`, with the worker processes of ``pool`` if it is
+    given. If ``dense`` is True, the pivots and local complementations on interior
+    spiders are first done by :func:`dense_pass`."""
+    with _region_pool(g, workers, pool) as pool:
+        if pool is not None: pool.run(g, 'spider', quiet)
+        spider_simp(g, quiet=quiet)
+        to_gh(g)
+        if pool is not None: pool.run(g, 'interior', quiet)
+    if dense and g.backend != 'igraph' and not g.track_phases:
+        # to_gh and the parallel passes can leave regular edges between Z-spiders,
+        # which have to be fused before the diagram is graph-like
+        spider_simp(g, quiet=quiet)
+        dense_pass(g, quiet=quiet)
     i = 0
     while True:
         i1 = id_simp(g, quiet=quiet)
@@ -115,28 +274,59 @@ def interior_clifford_simp(g, quiet=False):
         i += 1
     return i
 
-def clifford_simp(g, quiet=False):
+def clifford_simp(g, quiet=False, workers=1, dense=False, pool=None):
     """Keeps doing rounds of :func:`interior_clifford_simp` and
-    :func:`pivot_boundary_simp` until they can't be applied anymore."""
-    while True:
-        interior_clifford_simp(g, quiet=quiet)
-        i = pivot_boundary_simp(g, quiet=quiet)
-        if i == 0:
-            break
-
-
-def full_reduce(g, quiet=True):
+    :func:`pivot_boundary_simp` until they can't be applied anymore.
+    The ``workers``, ``dense`` and ``pool`` arguments are passed on to
+    :func:`interior_clifford_simp`, where the worker processes are started once for
+    all the rounds."""
+    with _region_pool(g, workers, pool) as pool:
+        while True:
+            interior_clifford_simp(g, quiet=quiet, workers=workers, dense=dense, pool=pool)
+            i = pivot_boundary_simp(g, quiet=quiet)
+            if i == 0:
+                break
+
+
+def full_reduce(g, quiet=True, workers=1, dense=False):
     """The main simplification routine of PyZX. It uses a combination of :func:`clifford_simp` and
-    the gadgetization strategies :func:`pivot_gadget_simp` and :func:`gadget_simp`."""
-    interior_clifford_simp(g, quiet=quiet)
-    pivot_gadget_simp(g,quiet=quiet)
-    while True:
-        clifford_simp(g,quiet=quiet)
-        i = gadget_simp(g, quiet=quiet)
-        interior_clifford_simp(g,quiet=quiet)
-        j = pivot_gadget_simp(g,quiet=quiet)
-        if i+j == 0:
-            break
+    the gadgetization strategies :func:`pivot_gadget_simp` and :func:`gadget_simp`.
+    If ``workers`` is larger than 1, the Clifford simplifications, which do most of
+    the work, are parallelized over that many processes, which are started once for the
+    whole reduction. If ``dense`` is True they are
+    done with :func:`dense_pass` where possible, which is much faster on diagrams that
+    become dense."""
+    with _region_pool(g, workers) as pool:
+        interior_clifford_simp(g, quiet=quiet, workers=workers, dense=dense, pool=pool)
+        pivot_gadget_simp(g,quiet=quiet)
+        while True:
+            clifford_simp(g,quiet=quiet, workers=workers, dense=dense, pool=pool)
+            i = gadget_simp(g, quiet=quiet)
+            interior_clifford_simp(g,quiet=quiet, workers=workers, dense=dense, pool=pool)
+            j = pivot_gadget_simp(g,quiet=quiet)
+            if i+j == 0:
+                break
+
+def dense_pass(g, quiet=False):
+    """Does all the pivots and local complementations on interior spiders of the graph-like
+    diagram ``g`` on a :class:`~dense.DenseCore`, where each of them only costs a few
+    XORs of bitmasks, and then writes the result back into ``g``. This pays off on large
+    diagrams where these rewrites produce many edges. Rewrites involving spiders on the
+    boundary are left for :func:`pivot_simp` and the like. Returns the number of rewrites."""
+    if _simp_hooks:
+        record = _start_record(g, 'dense_pass')
+        nv, ne = g.num_vertices(), g.num_edges()
+        t0 = _timer()
+    core = DenseCore(g)
+    n = core.simplify()
+    core.write_back(g)
+    if _simp_hooks and n:
+        record['iterations'].append({'matches': n, 'match_time': 0.0,
+            'rewrite_time': _timer() - t0, 'vertices': g.num_vertices() - nv,
+            'edges': g.num_edges() - ne})
+    if _simp_hooks: _finish_record(g, record)
+    if not quiet and n: print("dense_pass: {:d} rewrites".format(n))
+    return n
 
 def teleport_reduce(g, quiet=True):
     """This simplification procedure runs :func:`full_reduce` in a way 
@@ -243,13 +433,195 @@ def tcount(g):
     if not hasattr(g, "vertices"): # It is probably a circuit
         return g.tcount()
     count = 0
-    phases = g.phases()
+    phases = g.int_phases()
+    d = g.phase_denominator()
     for v in g.vertices():
-        if phases[v]!=0 and phases[v].denominator > 2:
+        if (2*phases[v]) % d:
             count += 1
     return count
 
 
+def _region_payloads(g, workers, offset):
+    """Partitions the vertices of ``g`` into ``workers`` regions of consecutive rows
+    and returns for each region the data a worker needs to simplify it: the region itself
+    followed by its halo of neighbouring vertices, their types and phases, and all the edges
+    that touch the region. Vertices are renumbered ``0..n-1`` to keep the payload small."""
+    types = g.types()
+    phases = g.phases()
+    verts = sorted(g.vertices(), key=lambda v: (g.row(v), g.qubit(v), v))
+    size = len(verts)//workers + 1
+    cuts = [0] + [min(offset + k*size, len(verts)) for k in range(workers+1)] + [len(verts)]
+    payloads = []
+    for a, b in zip(cuts, cuts[1:]):
+        if a >= b: continue
+        region = verts[a:b]
+        index = {v: i for i, v in enumerate(region)}
+        halo = []
+        edges = []
+        for v in region:
+            for w in g.neighbours(v):
+                if w not in index:
+                    index[w] = len(index)
+                    halo.append(w)
+                elif w < v and index[w] < len(region): continue
+                edges.append((index[v], index[w], g.edge_type(g.edge(v,w))))
+        vs = region + halo
+        payloads.append((vs, [types[v] for v in vs], [phases[v] for v in vs], edges, len(region)))
+    return payloads
+
+def _region_simp(payload, stage):
+    """Worker routine for :func:`parallel_clifford_pass`. Rebuilds the region from ``payload``
+    and simplifies it with matches restricted to the interior of the region: the vertices that
+    are not adjacent to the halo. Every rewrite then only changes vertices and edges inside of
+    the region, so the results of different regions can be merged without conflicts.
+    Returns the number of matches rewritten and the changes to the region in global vertex indices."""
+    from .graph import Graph
+    verts, types, phases, edges, nregion = payload
+    g = Graph()
+    g.add_vertices(len(verts))
+    for v in range(len(verts)):
+        g.set_type(v, types[v])
+        g.set_phase(v, phases[v])
+    g.add_edges([(s,t) for s,t,et in edges if et == 1], 1)
+    g.add_edges([(s,t) for s,t,et in edges if et == 2], 2)
+    interior = set(range(nregion))
+    for v in range(nregion, len(verts)):
+        interior.difference_update(g.neighbours(v))
+    vertexf = lambda v: v in interior
+    edgef = lambda e: e[0] in interior and e[1] in interior
+    # Spiders are not fused across the border of the interior, so a vertex can still have
+    # regular edges to its neighbours, which pivoting and local complementation don't allow.
+    hadamard_only = lambda v: all(g.edge_type(e) == 2 for e in g.incident_edges(v))
+    lcompf = lambda v: v in interior and hadamard_only(v)
+    pivotf = lambda e: edgef(e) and hadamard_only(e[0]) and hadamard_only(e[1])
+    before = {g.edge(s,t): et for s,t,et in edges if t < nregion}
+
+    # Hooks inherited from the parent process would never be seen, so count the matches instead.
+    # The hooks are put back afterwards, in case this is not running in a worker process.
+    stats = SimpStats()
+    hooks = _simp_hooks[:]
+    _simp_hooks[:] = [stats]
+    try:
+        if stage == 'spider':
+            spider_simp(g, matchf=edgef, quiet=True)
+        else:
+            while True:
+                i1 = id_simp(g, matchf=vertexf, quiet=True)
+                i2 = spider_simp(g, matchf=edgef, quiet=True)
+                i3 = pivot_simp(g, matchf=pivotf, quiet=True)
+                i4 = lcomp_simp(g, matchf=lcompf, quiet=True)
+                if i1+i2+i3+i4 == 0: break
+    finally:
+        _simp_hooks[:] = hooks
+    i = sum(d['matches'] for d in stats.summary().values())
+
+    alive = g.vertex_set()
+    rem_verts = [verts[v] for v in range(nregion) if v not in alive]
+    new_phases = [(verts[v], g.phase(v)) for v in range(nregion)
+                    if v in alive and g.phase(v) != phases[v]]
+    after = {e: g.edge_type(e) for e in g.edges()}
+    rem_edges = [(verts[s],verts[t]) for (s,t) in before
+                    if (s,t) not in after and s in alive and t in alive]
+    new_edges = [(verts[s],verts[t],et) for (s,t),et in after.items()
+                    if t < nregion and s < nregion and before.get((s,t)) != et]
+    return i, rem_verts, new_phases, rem_edges, new_edges
+
+def _region_spider_simp(payload):
+    return _region_simp(payload, 'spider')
+
+def _region_interior_simp(payload):
+    return _region_simp(payload, 'interior')
+
+def parallel_clifford_pass(g, workers, stage='interior', quiet=True, pool=None):
+    """Does the bulk of the work of :func:`spider_simp` (if ``stage`` is ``'spider'``) or
+    of the rewrite loop of :func:`interior_clifford_simp` (if ``stage`` is ``'interior'``)
+    using a pool of ``workers`` processes. The graph is split into regions of consecutive
+    rows, and each worker receives only its own region together with a one vertex halo.
+    This is done twice, with the second partition shifted by half a region, so that
+    vertices on the border of a region in the first pass are interior in the second.
+    The results are merged in the order of the regions, so the outcome does not
+    depend on scheduling.
+    Matches spanning several regions are left alone, so this should be followed
+    by the serial version of the simplification. Returns the number of matches
+    rewritten by all workers together.
+    If ``pool`` is given, its processes are used instead of starting new ones."""
+    func = _region_spider_simp if stage == 'spider' else _region_interior_simp
+    if _simp_hooks: record = _start_record(g, 'parallel_' + stage)
+    total = 0
+    own_pool = pool is None
+    if own_pool:
+        import multiprocessing as mp
+        pool = mp.Pool(processes=workers)
+    try:
+        for p in range(2):
+            n = g.num_vertices()
+            offset = (n//workers + 1)//2 if p == 1 else 0
+            if _simp_hooks: t0, ne = _timer(), g.num_edges()
+            results = pool.map(func, _region_payloads(g, workers, offset), chunksize=1)
+            rem_verts = []
+            for i, rv, new_phases, rem_edges, new_edges in results:
+                total += i
+                for v, phase in new_phases: g.set_phase(v, phase)
+                g.remove_edges([g.edge(s,t) for s,t in rem_edges])
+                for s,t,et in new_edges:
+                    e = g.edge(s,t)
+                    if g.connected(s,t): g.set_edge_type(e, et)
+                    else: g.add_edge(e, et)
+                rem_verts.extend(rv)
+            g.remove_vertices(rem_verts)
+            if _simp_hooks:
+                # We can't separate matching and rewriting in the workers, so all of it counts as rewriting
+                record['iterations'].append({'matches': sum(r[0] for r in results), 'match_time': 0.0,
+                    'rewrite_time': _timer() - t0, 'vertices': g.num_vertices() - n, 'edges': g.num_edges() - ne})
+            if not quiet: print("{} pass {}: removed {:d} vertices".format(stage, p+1, len(rem_verts)))
+    finally:
+        if own_pool:
+            pool.close()
+            pool.join()
+    if _simp_hooks: _finish_record(g, record)
+    return total
+
+class _RegionPool(object):
+    """The worker processes used by :func:`parallel_clifford_pass` during a single
+    simplification. The passes of a stage are skipped from the moment one of them
+    removes less than a fraction ``min_removed`` of the vertices, since the serial
+    simplification that follows is then cheaper than sending the graph to the workers."""
+    def __init__(self, workers, min_removed=0.05):
+        import multiprocessing as mp
+        self.workers = workers
+        self.min_removed = min_removed
+        self.pool = mp.Pool(processes=workers)
+        self.active = {'spider': True, 'interior': True}
+
+    def run(self, g, stage, quiet=True):
+        if not self.active[stage] or not _can_parallelize(g, self.workers): return 0
+        n = g.num_vertices()
+        i = parallel_clifford_pass(g, self.workers, stage, quiet=quiet, pool=self.pool)
+        if n - g.num_vertices() < self.min_removed*n: self.active[stage] = False
+        return i
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+@contextmanager
+def _region_pool(g, workers, pool=None):
+    """Gives ``pool`` if it is not None, and otherwise a new :class:`_RegionPool` if the
+    graph is worth parallelizing, which is closed afterwards."""
+    if pool is not None or not _can_parallelize(g, workers):
+        yield pool
+        return
+    pool = _RegionPool(workers)
+    try:
+        yield pool
+    finally:
+        pool.close()
+
+def _can_parallelize(g, workers):
+    return (workers > 1 and g.backend != 'igraph' and not g.track_phases
+            and g.num_vertices() >= 100*workers)
+
+
 # def pivot_double_boundary(g, quiet=False):
 #     """Finds Pauli-phase interior non-phase gadget nodes that are connected
 #     to the boundary. It changes the boundary nodes so that a pivot can be done
@@ -438,146 +810,3 @@ def clifford_iter(g):
     #yield g, "to_rg"
     for d in id_iter(g): yield d
     for d in spider_iter(g): yield d
-
-
-
-
-def _worker(arg):
-    match, rewrite, g, kwargname, kwarg = arg
-    m =  match(g, **{kwargname:kwarg})
-    if m: return (len(m),rewrite(g, m))
-    return None
-
-def simp_threaded(g, name, match, rewrite, uses_verts=False,safe=False,skip_unthreaded_pass=False):
-    """Version of :func:`simp` that uses :mod:`multiprocessing`."""
-    nthreads = 5
-    i = 0
-    new_matches = True
-    sep = int(g.vindex / nthreads) + 1 #TODO: currently only works on graph_s
-    pool = mp.Pool(processes=nthreads)
-    #Threaded pass
-    print("Starting {} with {} threads".format(name,str(nthreads)))
-    while new_matches:
-        new_matches = False
-        if uses_verts:
-            chunks = [set(g.vertices_in_range(j*sep,(j+1)*sep)) for j in range(nthreads)]
-            for j in range(nthreads-1):
-                if chunks[j] & chunks[j+1]:
-                    raise Exception("overlapping chunks")
-            results = pool.map(_worker, ((match, rewrite, g, "vertexlist", chunks[j]) for j in range(nthreads)),
-                                        #set(g.vertices_in_range(j*sep,(j+1)*sep))) for j in range(nthreads)),
-                                chunksize=1)
-        else:
-            chunks = [set(g.edges_in_range(j*sep,(j+1)*sep,safe)) for j in range(nthreads)]
-            for j in range(nthreads-1):
-                if chunks[j] & chunks[j+1]:
-                    raise Exception("overlapping chunks")
-            results = pool.map(_worker, ((match, rewrite, g, "edgelist", chunks[j]) for j in range(nthreads)),
-                                        #set(g.edges_in_range(j*sep,(j+1)*sep,safe))) for j in range(nthreads)),
-                                chunksize=1)
-
-        check_isolated_vertices = False
-        for j,r in enumerate(results):
-            if not r: continue
-            new_matches = True
-            amount, (etab, rem_verts, rem_edges, check) = r
-            print(amount, end=',')
-            if uses_verts and not chunks[j].issuperset(set(rem_verts)):
-                raise Exception("Deleting vertices outside of chunk: ", chunks[j], set(rem_verts))
-            else:
-                for v in rem_verts:
-                    if not (j*sep<v<(j+1)*sep):
-                        raise Exception("Deleting vertices outside of chunk")
-            g.add_edge_table(etab)
-            g.remove_edges(rem_edges)
-            g.remove_vertices(rem_verts)
-            check_isolated_vertices = check
-        if check_isolated_vertices: g.remove_isolated_vertices() 
-        if new_matches: i += 1
-        print('. ', end='')
-    pool.close()
-    #Unthreaded pass
-    if not skip_unthreaded_pass:
-        new_matches = True
-        if i!=0: print("\nUnthreaded pass: ", end='')
-        else: print("Unthreaded pass: ", end='') 
-        while new_matches:
-            new_matches = False
-            m = match(g)
-            if len(m) > 0:
-                print(len(m), end='')
-                etab, rem_verts, rem_edges, check_isolated_vertices = rewrite(g, m)
-                g.add_edge_table(etab)
-                g.remove_edges(rem_edges)
-                g.remove_vertices(rem_verts)
-                if check_isolated_vertices: g.remove_isolated_vertices()
-                print('. ', end='')
-                new_matches = True
-            if new_matches: i += 1
-    if i!=0:  print('\nDid ' + str(i) + ' nonzero iterations')
-    else: print('Did ' + str(i) + ' nonzero iterations')
-
-
-def pivot_threaded(g):
-    return simp_threaded(g, 'pivot_simp', match_pivot_parallel, pivot, uses_verts=False,safe=True)
-
-def lcomp_threaded_old(g):
-    simp_threaded(g, 'lcomp_simp', match_lcomp_parallel, lcomp, uses_verts=True)
-
-def lcomp_threaded(g):
-    simp_threaded(g, 'lcomp_simp', match_lcomp_parallel, lcomp, uses_verts=True,skip_unthreaded_pass=True)
-    print("Full pass: ",end='')
-    nthreads = 5
-    pool = mp.Pool(processes=nthreads)
-    i = 0
-    new_matches = True
-    while new_matches:
-        i += 1
-        new_matches = False
-        matches = match_lcomp_parallel(g)
-        if len(matches) > 0:
-            print(len(matches), end='')
-            vs, ns = [], []
-            for v, neighbours in matches:
-                a = g.phase(v)
-                for v2 in neighbours: g.add_to_phase(v2, -a)
-                vs.append(v)
-                ns.append(neighbours)
-            for etab in pool.map(_lcomp_do, (ns[i:i + 10] for i in range(0, len(ns), 10))):
-                g.add_edge_table(etab)
-            g.remove_vertices(vs)
-            print('. ', end='')
-            new_matches = True
-    pool.close()
-    print('\nfinished in ' + str(i) + ' iterations')
-
-def _lcomp_do(matches):
-    etab = dict()
-    for neighbours in matches:
-        for i in range(len(neighbours)):
-            for j in range(i+1, len(neighbours)):
-                e = (neighbours[i],neighbours[j])
-                if (e[0] > e[1]): e = (e[1],e[0])
-                if e not in etab: etab[e] = [0,1]
-                else: etab[e][1] += 1
-
-    return etab
-
-def bialg_threaded(g):
-    return simp_threaded(g, 'bialg_simp', match_bialg_parallel, bialg, uses_verts=False)
-
-def spider_threaded(g):
-    return simp_threaded(g, 'spider_simp', match_spider_parallel, spider, uses_verts=False)
-
-def id_threaded(g):
-    return simp_threaded(g, 'id_simp', match_ids_parallel, remove_ids, uses_verts=True)
-
-def clifford_threaded(g):
-    spider_threaded(g)
-    to_gh(g)
-    lcomp_threaded(g)
-    pivot_threaded(g)
-    to_rg(g)
-    id_threaded(g)
-
-
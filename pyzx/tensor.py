@@ -15,7 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-__all__ = ['tensorfy', 'compare_tensors', 'compose_tensors', 'adjoint', 'is_unitary']
+__all__ = ['tensorfy', 'compare_tensors', 'compose_tensors', 'adjoint', 'is_unitary',
+        'plan_contraction', 'ContractionPlan']
 
 try:
     import numpy as np
@@ -23,6 +24,7 @@ try:
 except:
     np = None
 from math import pi, sqrt
+import heapq
 
 def Z_to_tensor(arity, phase):
     m = np.zeros([2]*arity, dtype = complex)
@@ -40,83 +42,314 @@ def X_to_tensor(arity, phase):
     return np.power(np.sqrt(0.5),arity)*m.reshape([2]*arity)
 
 
-def pop_and_shift(verts, indices):
-    res = []
-    for v in verts:
-        res.append(indices[v].pop())
-    for i in sorted(res,reverse=True):
-        for w,l in indices.items():
-            l2 = []
-            for j in l:
-                if j>i: l2.append(j-1)
-                else: l2.append(j)
-            indices[w] = l2
-    return res
-
-def tensorfy(g):
+if np:
+    _had = 1/sqrt(2)*np.array([[1,1],[1,-1]], dtype=complex)
+    _id2 = np.identity(2, dtype=complex)
+
+_letters = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class _TensorNetwork(object):
+    """The tensor network of a ZX-diagram, with one binary variable per spider. A Z-spider
+    is a copy tensor, so instead of giving it a leg per edge, every tensor touching it just
+    shares its variable. An X-spider is a Z-spider with a Hadamard on every leg. A plain
+    edge between two spiders of the same colour therefore just identifies their variables,
+    while other edges between spiders become Hadamard matrices. Phases become vectors
+    ``[1, exp(i*phase)]``. Every boundary vertex gets its own variable, which is an open leg.
+
+    :attr tensors: List of pairs ``(array, labels)`` where ``labels`` are the variables
+        of the axes of the array.
+    :attr open_legs: The labels of the variables of the boundaries, in the order in
+        which they should appear in the final tensor.
+    """
+    def __init__(self, g):
+        types = g.types()
+        phases = g.phases()
+        # A union-find structure to identify the variables of spiders
+        parent = {v: v for v in g.vertices()}
+        def find(v):
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            return v
+        factors = []
+        for e in g.edges():
+            s, t = g.edge_st(e)
+            flips = (g.edge_type(e) == 2) + (types[s] == 2) + (types[t] == 2)
+            if flips % 2 == 0 and types[s] != 0 and types[t] != 0:
+                parent[find(s)] = find(t)
+            else:
+                factors.append((s, t, _had if flips % 2 else _id2))
+
+        self.tensors = []
+        phase = {}
+        for v in g.vertices():
+            if types[v] != 0:
+                r = find(v)
+                phase[r] = phase.get(r, 0) + phases[v]
+        for r, a in phase.items():
+            if a % 2 != 0:
+                self.tensors.append((np.array([1, np.exp(1j*pi*a)]), [r]))
+            else:
+                # A spider without a phase still sums over its variable, so it needs a tensor
+                self.tensors.append((np.ones(2, dtype=complex), [r]))
+        for s, t, m in factors:
+            s, t = find(s), find(t)
+            if s == t: self.tensors.append((np.diagonal(m).copy(), [s]))
+            else: self.tensors.append((m, [s, t]))
+
+        inputs = sorted(g.inputs, key=g.qubit)
+        outputs = sorted(g.outputs, key=g.qubit)
+        if len(inputs) == len(outputs):
+            self.open_legs = [v for pair in zip(inputs, outputs) for v in pair]
+        else:
+            self.open_legs = inputs + outputs
+        io = set(inputs).union(outputs)
+        self.open_legs.extend(v for v in sorted(g.vertices()) if types[v] == 0 and v not in io)
+        for v in self.open_legs:
+            if g.vertex_degree(v) != 1:
+                raise ValueError("Boundary vertex {!s} should have exactly one edge".format(v))
+
+
+class ContractionPlan(object):
+    """An order in which to contract the tensor network of a ZX-diagram, as computed by
+    :func:`plan_contraction`. The cost estimates assume complex128 entries.
+
+    :attr steps: List of triples ``(i, j, labels)``. Tensor ``i`` and ``j`` are contracted,
+        leaving a tensor with the variables ``labels``, which is stored as tensor ``i``.
+    :attr sliced: The variables that are fixed to every combination of values, where the
+        results are summed afterwards. This trades time for memory.
+    :attr peak_memory: The predicted peak memory use in bytes of the tensors alive at any moment.
+    :attr largest: The number of entries of the largest intermediate tensor.
+    :attr flops: The predicted number of complex multiply-adds, including all slices.
+    """
+    def __init__(self, network, steps):
+        self.network = network
+        self.steps = steps
+        self.sliced = []
+        self._estimate()
+
+    def _estimate(self):
+        """Computes the cost estimates of the plan with the current slicing."""
+        sliced = set(self.sliced)
+        idx = [set(legs) - sliced for _, legs in self.network.tensors]
+        live = sum(2**len(i) for i in idx)
+        peak = live
+        largest = max([2**len(i) for i in idx] or [1])
+        flops = 0
+        for a, b, res in self.steps:
+            res = res - sliced
+            size = 2**len(res)
+            flops += 2**len(idx[a] | idx[b])
+            peak = max(peak, live + size)
+            live += size - 2**len(idx[a]) - (2**len(idx[b]) if a != b else 0)
+            largest = max(largest, size)
+            idx[a] = res
+        self.flops = flops * 2**len(self.sliced)
+        self.peak_memory = 16 * peak
+        self.largest = largest
+
+    def slice_to(self, max_memory, max_slices=32):
+        """Slices variables of the network until the predicted peak memory is at most
+        ``max_memory`` bytes. Returns whether this succeeded."""
+        open_legs = set(self.network.open_legs)
+        while self.peak_memory > max_memory and len(self.sliced) < max_slices:
+            sliced = set(self.sliced)
+            score = {}
+            for _, _, res in self.steps:
+                res = res - sliced
+                for l in res:
+                    if l not in open_legs: score[l] = score.get(l, 0) + 2**len(res)
+            if not score: break
+            self.sliced.append(max(sorted(score), key=lambda l: score[l]))
+            self._estimate()
+        return self.peak_memory <= max_memory
+
+    def __str__(self):
+        return "ContractionPlan({:d} steps, {:d} sliced, peak memory {:.3g} MB, {:.3g} flops)".format(
+                len(self.steps), len(self.sliced), self.peak_memory/2**20, float(self.flops))
+
+    def __repr__(self):
+        return str(self)
+
+
+def _greedy_order(net):
+    """Returns contraction steps for the network where every step contracts the pair of
+    tensors sharing a variable whose result is smallest compared to the pair itself."""
+    open_legs = set(net.open_legs)
+    idx = [set(legs) for _, legs in net.tensors]
+    holders = {}
+    for i, legs in enumerate(idx):
+        for l in legs: holders.setdefault(l, set()).add(i)
+    alive = set(range(len(idx)))
+
+    def result(a, b):
+        return set(l for l in idx[a] | idx[b]
+                   if l in open_legs or not holders[l] <= {a, b})
+    def cost(a, b):
+        return 2**len(result(a, b)) - 2**len(idx[a]) - 2**len(idx[b])
+    def pairs(a):
+        return set(b for l in idx[a] for b in holders[l] if b != a)
+
+    heap = [(cost(a,b), a, b) for a in alive for b in pairs(a) if a < b]
+    heapq.heapify(heap)
+    steps = []
+    while len(alive) > 1:
+        while heap:
+            c, a, b = heapq.heappop(heap)
+            if a in alive and b in alive and c == cost(a,b): break
+        else:
+            # What is left are disconnected components, which are combined smallest first
+            a, b = sorted(sorted(alive, key=lambda i: (len(idx[i]), i))[:2])
+        res = result(a, b)
+        steps.append((a, b, res))
+        for l in idx[a] | idx[b]:
+            holders[l].discard(b)
+            if l in res: holders[l].add(a)
+            else: holders[l].discard(a)
+        idx[a] = res
+        alive.remove(b)
+        for n in pairs(a):
+            heapq.heappush(heap, (cost(min(a,n), max(a,n)), min(a,n), max(a,n)))
+    if len(alive) == 1:
+        # Sum out the variables that are not open
+        a = alive.pop()
+        res = idx[a] & open_legs
+        if res != idx[a]: steps.append((a, a, res))
+    return steps
+
+def _fill_in(nbrs, l):
+    """Returns the number of edges that summing out variable ``l`` would add between its neighbours."""
+    ns = list(nbrs[l])
+    return sum(1 for i in range(len(ns)) for j in range(i+1, len(ns)) if ns[j] not in nbrs[ns[i]])
+
+def _elimination_order(net):
+    """Returns contraction steps for the network that sum out the variables one at a time,
+    each time picking the variable whose elimination adds the fewest new connections between
+    the other variables (breaking ties by the number of neighbours). This is the min-fill
+    heuristic for finding a tree decomposition of low width."""
+    open_legs = set(net.open_legs)
+    idx = [set(legs) for _, legs in net.tensors]
+    holders = {}
+    for i, legs in enumerate(idx):
+        for l in legs: holders.setdefault(l, set()).add(i)
+    nbrs = {l: set() for l in holders}
+    for legs in idx:
+        for l in legs: nbrs[l].update(legs)
+    for l in nbrs: nbrs[l].discard(l)
+    key = lambda l: (_fill_in(nbrs, l), len(nbrs[l]))
+    heap = [(key(l), l) for l in holders if l not in open_legs]
+    heapq.heapify(heap)
+    steps = []
+    while heap:
+        k, x = heapq.heappop(heap)
+        if x not in nbrs or k != key(x): continue
+        hs = sorted(holders[x], key=lambda i: (len(idx[i]), i))
+        a = hs[0]
+        for b in hs[1:]:
+            res = idx[a] | idx[b]
+            if b == hs[-1]: res.discard(x)
+            steps.append((a, b, res))
+            for l in idx[b]: holders[l].discard(b)
+            idx[a] = res
+        if len(hs) == 1:
+            steps.append((a, a, idx[a] - {x}))
+            idx[a] = steps[-1][2]
+        for l in idx[a]: holders[l].add(a)
+        del holders[x]
+        ns = nbrs.pop(x)
+        for l in ns:
+            nbrs[l].discard(x)
+            nbrs[l].update(ns - {l})
+        # The fill-in changes for the neighbours and for their neighbours
+        for l in ns.union(*[nbrs[l] for l in ns]):
+            if l not in open_legs: heapq.heappush(heap, (key(l), l))
+    # Only tensors on open variables are left, which are combined smallest first
+    alive = sorted(set(i for hs in holders.values() for i in hs), key=lambda i: (len(idx[i]), i))
+    for b in alive[1:]:
+        a = alive[0]
+        steps.append((a, b, idx[a] | idx[b]))
+        idx[a] = steps[-1][2]
+    return steps
+
+def plan_contraction(g, max_memory=None, slicing=True):
+    """Computes an order in which to contract the tensor network of the ZX-diagram ``g``
+    (see :class:`_TensorNetwork`). Two heuristics are tried: a greedy one that contracts the
+    pair of tensors whose result is smallest compared to the pair itself, and one that sums
+    out the variables in a min-fill order. Of the plans that fit in ``max_memory`` the one
+    with the lowest sum of predicted operations and peak memory in bytes is used.
+    If ``max_memory`` (in bytes) is given and the plan is predicted to use more than that, variables are sliced (if ``slicing`` is True) until it fits. If it still doesn't fit,
+    a :exc:`MemoryError` is raised before anything is contracted.
+
+    :rtype: :class:`ContractionPlan`"""
+    net = _TensorNetwork(g)
+    plans = [ContractionPlan(net, _greedy_order(net)), ContractionPlan(net, _elimination_order(net))]
+    plan = min(plans, key=lambda p: (max_memory is not None and p.peak_memory > max_memory,
+                                     p.flops + p.peak_memory))
+    if max_memory is not None and plan.peak_memory > max_memory:
+        if not slicing or not plan.slice_to(max_memory):
+            raise MemoryError("Contracting this diagram needs an estimated {:.3g} MB, "
+                              "which is more than the cap of {:.3g} MB".format(
+                                plan.peak_memory/2**20, max_memory/2**20))
+    return plan
+
+def _contract(net, steps, fixed):
+    """Executes the contraction ``steps`` on the network, where the variables in ``fixed``
+    are restricted to the given value. Returns the resulting tensor ``t``, its labels, and
+    a number ``s`` such that the actual result of the contraction is ``exp(s)*t``."""
+    tensors = []
+    for t, legs in net.tensors:
+        for l, val in fixed.items():
+            if l in legs:
+                i = legs.index(l)
+                t = np.take(t, val, axis=i)
+                legs = legs[:i] + legs[i+1:]
+        tensors.append((t, legs))
+    if not tensors: return np.ones(()), [], 0.0
+    logscale = 0.0
+    for a, b, res in steps:
+        ta, la = tensors[a]
+        if a == b: tb, lb = np.ones(()), []
+        else: tb, lb = tensors[b]
+        lres = sorted(l for l in res if l not in fixed)
+        letter = {l: _letters[i] for i, l in enumerate(set(la) | set(lb))}
+        subs = "{},{}->{}".format("".join(letter[l] for l in la), "".join(letter[l] for l in lb),
+                                  "".join(letter[l] for l in lres))
+        t = np.einsum(subs, ta, tb, optimize=len(la) + len(lb) > 4)
+        # Keep the numbers in a sensible range
+        m = np.abs(t).max() if t.size else 0
+        if m and (m < 10**-6 or m > 10**6):
+            t = t / m
+            logscale += np.log(m)
+        tensors[a] = (t, lres)
+        if a != b: tensors[b] = None
+    t, legs = tensors[steps[-1][0] if steps else 0]
+    return t, legs, logscale
+
+def tensorfy(g, max_memory=None, plan=None, quiet=True):
     """Takes in a Graph and outputs a multidimensional numpy array
     representing the linear map the ZX-diagram implements.
-    Beware that quantum circuits take exponential memory to represent."""
-    rows = g.rows()
-    phases = g.phases()
-    types = g.types()
-    depth = g.depth()
-    verts_row = {}
-    for v in g.vertices():
-        r = rows[v]
-        if r in verts_row: verts_row[r].append(v)
-        else: verts_row[r] = [v]
-    
-    had = 1/sqrt(2)*np.mat([[1,1],[1,-1]])
-    id2 = np.identity(2)
-    tensor = np.identity(2)
-    qubits = len(g.inputs)
-    for i in range(qubits-1): tensor = np.tensordot(tensor,id2,axes=0)
-    inputs = sorted(g.inputs,key=g.qubit)
-    indices = {}
-    for i, v in enumerate(inputs):
-        indices[v] = [1 + 2*i]
-    
-    for i,r in enumerate(sorted(verts_row.keys())):
-        if r == 0: continue #inputs already taken care of
-        for v in sorted(verts_row[r]):
-            neigh = list(g.neighbours(v))
-            d = len(neigh)
-            if v in g.outputs: 
-                #print("output")
-                if d != 1: raise ValueError("Weird output")
-                d += 1
-                t = id2
-            else:
-                phase = pi*phases[v]
-                t = Z_to_tensor(d,phase) if types[v] == 1 else X_to_tensor(d,phase)
-            nn = list(filter(lambda n: rows[n]<r or (rows[n]==r and n<v), neigh))
-            ety = {n:g.edge_type(g.edge(v,n)) for n in nn}
-            nn.sort(key=lambda n: ety[n])
-            for n in nn:
-                if ety[n] == 2: #Hadamard edge
-                    t = np.tensordot(t,had,(0,0)) # Hadamard edges are moved to the last index of t
-            #print(neigh, nn)
-            contr = pop_and_shift(nn,indices) #the last indices in contr correspond to hadamard contractions
-            #print(contr)
-            tensor = np.tensordot(tensor,t,axes=(contr,list(range(len(t.shape)-len(contr),len(t.shape)))))
-            indices[v] = list(range(len(tensor.shape)-d+len(contr), len(tensor.shape)))
-            
-            if i % 10 == 0:
-                if np.abs(tensor).max() < 10**-6: # Values are becoming too small
-                    tensor *= 10**4 # So scale all the numbers up
-            #print(indices)
-            #print(tensor)
-    
-    perm = []
-    for i,o in enumerate(sorted(g.outputs,key=g.qubit)):
-        if len(indices[o]) != 1: raise ValueError("Weird output")
-        perm.append(i)
-        perm.append(indices[o][0])
-    
-    tensor = np.transpose(tensor,perm)
-        
-    return tensor
+    For a circuit the indices are ordered as ``in0, out0, in1, out1, ...``.
+    Beware that quantum circuits take exponential memory to represent.
+
+    The tensors are contracted in the order given by :func:`plan_contraction`,
+    which is called with ``max_memory`` unless a ``plan`` for ``g`` is supplied.
+    If ``quiet`` is False the predicted cost is printed before contracting.
+    When the numbers become too small or too large during the contraction they are
+    rescaled, so that the result is only correct up to a positive number."""
+    if plan is None: plan = plan_contraction(g, max_memory)
+    if not quiet: print(plan)
+    net = plan.network
+    result, scale = None, 0.0
+    for k in range(2**len(plan.sliced)):
+        fixed = {l: (k >> i) & 1 for i, l in enumerate(plan.sliced)}
+        t, legs, s = _contract(net, plan.steps, fixed)
+        t = np.transpose(t, [legs.index(l) for l in net.open_legs])
+        # The slices can only be added once they are brought to the same scale
+        if result is None: result, scale = t, s
+        elif s > scale: result, scale = result*np.exp(scale - s) + t, s
+        else: result = result + t*np.exp(s - scale)
+    return result
 
 
 def compare_tensors(t1,t2):
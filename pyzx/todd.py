@@ -28,20 +28,21 @@ import tempfile
 import time
 import random
 
-import numpy as np
-
 from .circuit import T, S, Z, ZPhase, CZ, CNOT, ParityPhase
 from .linalg import Mat2, column_optimal_swap
 from .extract import permutation_as_swaps
-from .phasepoly import parity_network
+from .phasepoly import parity_network, _bits
 
 TOPT_LOCATION = None
 USE_REED_MULLER = False
+USE_PACKED = True
 
 
 class ParityPolynomial:
     """Class used to represent phase polynomials in the standard
-    ParityPhase view. For example: x1@x2 + 3x2 + 5x1@x2@x3"""
+    ParityPhase view. For example: x1@x2 + 3x2 + 5x1@x2@x3.
+    Every parity is stored as an integer bitmask over the variables, like the terms
+    of :class:`~phasepoly.BitPolynomial`."""
     def __init__(self,qubits, poly=None):
         self.qubits = qubits
         if poly:
@@ -55,14 +56,16 @@ class ParityPolynomial:
         l = []
         for t in sorted(self.terms.keys()):
             val = self.terms[t]
-            l.append("{!s}{}".format(val if val!=1 else "", "@".join("x{:d}".format(v) for v in sorted(list(t)))))
+            l.append("{!s}{}".format(val if val!=1 else "", "@".join("x{:d}".format(v) for v in _bits(t))))
         return " + ".join(l)
     
     def __repr__(self):
         return str(self)
     
     def add_term(self, term, value):
-        term = tuple(sorted(term))
+        """Adds ``value`` to the coefficient of the parity ``term``, which is either a
+        bitmask or an iterable of variables."""
+        if not isinstance(term, int): term = sum(1 << v for v in set(term))
         if term in self.terms:
             self.terms[term] = (self.terms[term] + value) % 8
         else: self.terms[term] = value % 8
@@ -82,7 +85,7 @@ class ParityPolynomial:
         """Converts the phase polynomial into a parity matrix."""
         cols = []
         for par, val in self.terms.items():
-            col = [1 if i in par else 0 for i in range(self.qubits)]
+            col = [(par >> i) & 1 for i in range(self.qubits)]
             for i in range(val): cols.append(col)
         return Mat2(cols).transpose()
 
@@ -171,35 +174,32 @@ def par_matrix_to_gates(a):
 
 def phase_gates_to_poly(gates, qubits):
     """Convert a CNOT+T+CZ circuit into a phase polynomial representation
-    using :class:`ParityPolynomial`."""
+    using :class:`ParityPolynomial`. Also returns the parities on the qubits at
+    the end of the circuit, as bitmasks over the variables."""
     phase_poly = ParityPolynomial(qubits)
-    expression_polys = []
-    for i in range(qubits):
-        expression_polys.append(ParitySingle(i))
+    expressions = [1 << i for i in range(qubits)]
     
     for g in gates:
         if isinstance(g, ZPhase):
-            par = expression_polys[g.target].par
-            phase_poly.add_term(par, int(g.phase*4))
+            phase_poly.add_term(expressions[g.target], int(g.phase*4))
         elif isinstance(g, CZ):
-            tgt, ctrl = g.target, g.control
-            par1 = expression_polys[tgt].par
-            par2 = expression_polys[ctrl].par
+            par1 = expressions[g.target]
+            par2 = expressions[g.control]
             phase_poly.add_term(par1, 2)
             phase_poly.add_term(par2, 2)
-            phase_poly.add_term(par1.symmetric_difference(par2), 6)
+            phase_poly.add_term(par1 ^ par2, 6)
         elif isinstance(g, CNOT):
-            tgt, ctrl = g.target, g.control
-            expression_polys[tgt].add_par(expression_polys[ctrl])
+            expressions[g.target] ^= expressions[g.control]
         else:
             raise TypeError("Unknown gate type {}".format(str(g)))
     
-    return phase_poly, expression_polys
+    return phase_poly, expressions
 
 
 
 def xi(m, z):
     """Constructs the \chi matrix from the TOpt paper."""
+    import numpy as np
     arr = np.asarray(m.data)
     rows = m.rows()
     data = []
@@ -307,9 +307,227 @@ def do_todd_single(m):
                 
     return m.transpose(), startcols - newcols
 
-def todd_iter(m, quiet=True):
+def _packed_rows(cols, qubits):
+    """Returns the rows of the parity matrix whose columns are the bitsets ``cols``,
+    as bitsets where bit ``j`` is the entry in column ``j``."""
+    rows = [0]*qubits
+    for j, c in enumerate(cols):
+        bit = 1 << j
+        while c:
+            low = c & -c
+            rows[low.bit_length()-1] |= bit
+            c ^= low
+    return rows
+
+def _basis_add(basis, r):
+    """Adds ``r`` to the row echelon basis ``basis``, a dictionary from the lowest bit of
+    every row to the row. Returns the lowest bit of the new row, or 0 if ``r`` was already
+    in the span of the basis."""
+    while r:
+        low = r & -r
+        row = basis.get(low)
+        if row is None:
+            basis[low] = r
+            return low
+        r ^= row
+    return 0
+
+def _basis_reduce(basis, r):
+    """Reduces ``r`` with the rows of ``basis`` until its lowest bit is not a pivot."""
+    while r:
+        row = basis.get(r & -r)
+        if row is None: return r
+        r ^= row
+    return 0
+
+def find_todd_match_packed(cols, qubits, deadline=None):
+    r"""Does the same as :func:`find_todd_match`, for the parity matrix on ``qubits`` rows
+    whose columns are given by the bitsets ``cols``, with bit ``i`` the entry in row ``i``.
+    Returns ``a,b,z,y`` where ``z`` and ``y`` are bitsets as well. If ``deadline`` is
+    given, the search gives up as if no match exists once :func:`time.time` has passed it.
+
+    Instead of building the \chi matrix and its nullspace for every pair of columns, its
+    rows are added one by one to a row echelon basis. A vector ``y`` in the nullspace with
+    ``y[a] != y[b]`` exists exactly when the vector with only entries ``a`` and ``b`` set
+    is not in the row space, so the pair is given up as soon as that vector is spanned.
+    When a match is found, ``y`` is the same vector :func:`find_todd_match` returns."""
+    ncols = len(cols)
+    rows = _packed_rows(cols, qubits)
+    prods = [[rows[i] & rows[j] for j in range(qubits)] for i in range(qubits)]
+    base = {}
+    for r in rows: _basis_add(base, r)
+    for a in range(ncols):
+        for b in range(a+1, ncols):
+            if deadline is not None and time.time() >= deadline:
+                return -1,-1,None,None
+            z = cols[a] ^ cols[b]
+            zs = [(z >> i) & 1 for i in range(qubits)]
+            basis = dict(base)
+            t = _basis_reduce(basis, (1 << a) | (1 << b))
+            for i in range(qubits):
+                if not t: break
+                pi = prods[i]
+                for j in range(i+1, qubits):
+                    if not t: break
+                    pij = pi[j]
+                    pj = prods[j]
+                    for k in range(j+1, qubits):
+                        r = 0
+                        if zs[i]: r = pj[k]
+                        if zs[j]: r ^= pi[k]
+                        if zs[k]: r ^= pij
+                        if r and _basis_add(basis, r) == t & -t:
+                            t = _basis_reduce(basis, t)
+                            if not t: break
+            if not t: continue
+            y = _nullspace_vector(basis, ncols, a, b)
+            return a, b, z, y
+    return -1,-1,None,None
+
+def _nullspace_vector(basis, ncols, a, b):
+    """Returns the first vector ``y`` of the nullspace basis of the row echelon ``basis``
+    (in the order of :meth:`~linalg.Mat2.nullspace`) for which ``y[a] != y[b]``."""
+    pivots = sorted(basis, reverse=True)
+    pivmask = sum(pivots)
+    reduced = {}
+    for p in pivots: # Bring the basis in reduced row echelon form
+        r = basis[p]
+        m = r & pivmask & ~p
+        while m:
+            low = m & -m
+            r ^= reduced[low]
+            m ^= low
+        reduced[p] = r
+    abit, bbit = 1 << a, 1 << b
+    for n in range(ncols):
+        nbit = 1 << n
+        if nbit & pivmask: continue
+        y = nbit
+        for p, r in reduced.items():
+            if r & nbit: y |= p
+        if bool(y & abit) != bool(y & bbit): return y
+    raise ValueError("No nullspace vector found") # Can't happen if the pair was a match
+
+def remove_trivial_cols_packed(cols):
+    """Does the same as :func:`remove_trivial_cols` on a list of bitset columns: zero
+    columns are removed, as are pairs of equal columns, and the order of the remaining
+    columns is kept."""
+    last = {}
+    for i, c in enumerate(cols):
+        if c: last[c] = i
+    counts = {}
+    for c in cols:
+        if c: counts[c] = counts.get(c, 0) ^ 1
+    keep = sorted(last[c] for c, odd in counts.items() if odd)
+    return [cols[i] for i in keep]
+
+def todd_packed(cols, qubits, quiet=True, deadline=None):
+    """Keeps finding TODD matches until nothing is found anymore, on the parity matrix
+    whose columns are given by the bitsets ``cols``. This applies the same matches as
+    repeated calls of :func:`do_todd_single`. Returns the new list of columns.
+    If ``deadline`` is given, it stops once :func:`time.time` has passed it, also in
+    the middle of the search for a match."""
+    cols = remove_trivial_cols_packed(cols)
+    while True:
+        if deadline is not None and time.time() >= deadline:
+            return cols
+        a, b, z, y = find_todd_match_packed(cols, qubits, deadline)
+        if z is None:
+            if not quiet: print()
+            return cols
+        start = len(cols)
+        cols = [c ^ z if (y >> i) & 1 else c for i, c in enumerate(cols)]
+        if bin(y).count('1') % 2 == 1:
+            cols.append(z)
+        cols.pop(b)
+        cols.pop(a)
+        cols = remove_trivial_cols_packed(cols)
+        if not quiet: print(start - len(cols), end='.')
+
+def _todd_descent(cols, qubits, seed, deadline=None):
+    """Runs :func:`todd_packed` on the columns shuffled with the given seed."""
+    cols = list(cols)
+    random.Random(seed).shuffle(cols)
+    return todd_packed(cols, qubits, deadline=deadline)
+
+def todd_restarts(m, restarts=8, workers=1, seed=None, budget=None, target=None, quiet=True,
+                  executor=None):
+    """Runs :func:`todd_packed` ``restarts`` times on the parity matrix ``m``, every
+    time with the columns in a different random order, and returns the result with
+    the fewest columns. Ties are won by the earliest restart.
+
+    The order of every restart is determined by a seed drawn from a random number
+    generator seeded with ``seed``, so that for a given ``seed`` the result is always
+    the same, however many ``workers`` are used. If ``seed`` is None, it is drawn from
+    the :mod:`random` module.
+
+    :param workers: If larger than 1, the restarts run in a
+        :class:`concurrent.futures.ProcessPoolExecutor` with this many processes.
+    :param executor: A :class:`concurrent.futures.ProcessPoolExecutor` to run the restarts
+        in, instead of starting a new one. This saves starting the processes again when
+        this is called for many matrices, as :func:`~optimize.phase_block_optimize` does.
+    :param budget: The number of seconds the restarts may take. Restarts that haven't
+        started by then are skipped, and running restarts stop, returning the best they
+        found so far, within the time it takes to try a single pair of columns.
+        Since this depends on timing, the result is then no longer reproducible.
+    :param target: Stop once a restart finds at most this many columns (T gates).
+        Only the restarts up to the first one that reaches the target are used, so this
+        doesn't change which restart is chosen depending on the order they finish in.
+    """
+    qubits = m.rows()
+    cols = [sum(1 << i for i, v in enumerate(col) if v) for col in m.transpose().data]
+    cols = remove_trivial_cols_packed(cols)
+    if seed is None: seed = random.getrandbits(64)
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(restarts)]
+    deadline = time.time() + budget if budget is not None else None
+    results = {}
+    last = restarts # Only the restarts before this one are still needed
+    if (workers <= 1 and executor is None) or restarts == 1:
+        for i, s in enumerate(seeds):
+            if i >= last or (deadline is not None and time.time() >= deadline): break
+            results[i] = _todd_descent(cols, qubits, s, deadline)
+            if target is not None and len(results[i]) <= target: last = i + 1
+    else:
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        pool = executor if executor is not None else ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = {pool.submit(_todd_descent, cols, qubits, s, deadline): i
+                       for i, s in enumerate(seeds)}
+            pending = set(futures)
+            while pending:
+                timeout = max(0, deadline - time.time()) if deadline is not None else None
+                finished, pending = wait(pending, timeout, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    i = futures[f]
+                    results[i] = f.result()
+                    if target is not None and len(results[i]) <= target: last = min(last, i + 1)
+                if deadline is not None and time.time() >= deadline:
+                    # The running restarts stop by themselves at the deadline
+                    pending = {f for f in pending if not f.cancel()}
+                    deadline = None
+                for f in pending:
+                    if futures[f] >= last: f.cancel()
+                pending = {f for f in pending if futures[f] < last}
+        finally:
+            if executor is None: pool.shutdown(wait=False)
+    results = [(len(c), i, c) for i, c in results.items() if i < last]
+    if not results:
+        best = cols
+    else:
+        best = min(results)[2]
+        if not quiet:
+            print("TODD restarts: " + " ".join(str(n) for n, _, _ in sorted(results, key=lambda r: r[1])))
+    return Mat2([[(c >> i) & 1 for c in best] for i in range(qubits)])
+
+def todd_iter(m, quiet=True, restarts=1, **options):
     """Keep finding TODD matches until nothing is found anymore.
-    If TOPT_LOCATION is given it uses the TOpt implementation of TODD. """
+    If TOPT_LOCATION is given it uses the TOpt implementation of TODD. Otherwise,
+    if ``restarts`` is larger than 1 it uses :func:`todd_restarts`, to which the
+    ``options`` are passed. Otherwise, if USE_PACKED is set it uses :func:`todd_packed`,
+    and else :func:`do_todd_single`."""
+    if restarts > 1 and not TOPT_LOCATION and m.cols() and m.rows():
+        return todd_restarts(m, restarts, quiet=quiet, **options)
     m = m.transpose()
     remove_trivial_cols(m)
     random.shuffle(m.data) # Randomly shuffle the columns
@@ -318,6 +536,11 @@ def todd_iter(m, quiet=True):
         return m
     if TOPT_LOCATION:
         return call_topt(m, quiet=quiet)
+    if USE_PACKED:
+        qubits = m.rows()
+        cols = [sum(1 << i for i, v in enumerate(col) if v) for col in m.transpose().data]
+        cols = todd_packed(cols, qubits, quiet=quiet)
+        return Mat2([[(c >> i) & 1 for c in cols] for i in range(qubits)])
     while True:
         m, reduced = do_todd_single(m)
         if not reduced:
@@ -373,24 +596,24 @@ def call_topt(m, quiet=True):
     return m2
 
 
-def todd_simp(gates, qubits, quiet=True):
+def todd_simp(gates, qubits, quiet=True, **options):
     """Run the TODD algorithm on a CNOT+CZ+T set of gates and 
     apply the necessary Clifford corrections. Uses the 
     CNOT parity algorithm from https://arxiv.org/pdf/1712.01859.pdf
-    to synthesize the necessary parities."""
+    to synthesize the necessary parities.
+    The ``options`` are passed to :func:`todd_iter`."""
     phase_poly, parity_polys = phase_gates_to_poly(gates, qubits)
     #print(phase_poly)
     #print(parity_polys)
     m = phase_poly.to_par_matrix()
-    m2 = todd_iter(m,quiet=quiet)
+    m2 = todd_iter(m,quiet=quiet,**options)
 
     newgates = []
     parities = []
     for col in m2.transpose().data:
-        if sum(col) == 1:
-            newgates.append(T(next(i for i in range(qubits) if col[i])))
-        else:
-            parities.append(col)
+        par = sum(v << i for i, v in enumerate(col))
+        if par & (par - 1): parities.append(par)
+        else: newgates.append(T(par.bit_length() - 1))
 
     p = MultiLinearPoly()
     p.add_par_matrix(m,False)
@@ -401,10 +624,7 @@ def todd_simp(gates, qubits, quiet=True):
     m = Mat2.id(qubits)
     for cnot in cnots:
         m.row_add(cnot.control, cnot.target)
-    data = []
-    for p in parity_polys:
-        l = [int(i in p.par) for i in range(qubits)]
-        data.append(l)
+    data = [[(par >> i) & 1 for i in range(qubits)] for par in parity_polys]
     target_matrix = Mat2(data) * m.inverse()
     #perm = column_optimal_swap(target_matrix.transpose())
     perm = {i:i for i in range(qubits)}
@@ -415,13 +635,13 @@ def todd_simp(gates, qubits, quiet=True):
     for gate in reversed(gates):
         cnots.append(CNOT(gate.target,gate.control))
 
-    m = Mat2.id(qubits)
+    rows = [1 << i for i in range(qubits)]
     for i, cnot in enumerate(cnots):
         newgates.append(cnot)
-        m.row_add(cnot.control, cnot.target)
+        rows[cnot.target] ^= rows[cnot.control]
         for par in parities:
-            if par in m.data: # The parity checks out, so put a phase here
-                newgates.append(T(m.data.index(par)))
+            if par in rows: # The parity checks out, so put a phase here
+                newgates.append(T(rows.index(par)))
                 parities.remove(par)
                 break
 
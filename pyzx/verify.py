@@ -0,0 +1,194 @@
+# PyZX - Python library for quantum circuit rewriting
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""This module contains the machinery behind :meth:`~circuit.Circuit.verify_equality`.
+Two circuits ``c1`` and ``c2`` are compared by checking whether ``c1.adjoint()`` followed
+by ``c2`` is the identity. This is decided by the first of the following tiers that
+can settle it:
+
+1. ``cancellation``: gates are cancelled outwards from the seam between ``c1.adjoint()``
+   and ``c2``, which removes the common beginning of the circuits. The common end is
+   removed as well, since conjugating a circuit does not change whether it is the identity.
+   If nothing is left the circuits are equal.
+2. ``zx``: the rest is turned into a ZX-diagram and simplified with
+   :func:`~simplify.full_reduce`, optionally within a time budget. If it reduces to bare
+   wires the circuits are equal if and only if these are the identity wires.
+3. ``tensor``: if the reduction did not finish the job and only a few qubits are involved,
+   the tensor of the simplified diagram is compared to the identity.
+"""
+
+from collections import deque
+from timeit import default_timer as _timer
+
+from .circuit import Circuit
+from .simplify import full_reduce, add_simp_hook, remove_simp_hook
+
+__all__ = ['verify_equality', 'VerificationReport', 'cancel_common_gates']
+
+
+class VerificationReport(object):
+    """The outcome of :func:`verify_equality`.
+
+    :ivar result: True if the circuits were shown to be equal, False if they were shown
+        to be different, and None if no tier could decide it.
+    :ivar tier: The name of the tier that decided the result: ``'cancellation'``,
+        ``'zx'`` or ``'tensor'``, or None when undecided.
+    :ivar cancelled: The number of pairs of gates cancelled in the first tier.
+    :ivar residue: The :class:`~circuit.Circuit` that was left after cancellation.
+    :ivar vertices: The number of vertices left after the ZX reduction, if it was run.
+    :ivar budget_exceeded: Whether the ZX reduction was stopped because it ran out of time.
+    :ivar time: Total time in seconds spent on the verification.
+    """
+    def __init__(self):
+        self.result = None
+        self.tier = None
+        self.cancelled = 0
+        self.residue = None
+        self.vertices = None
+        self.budget_exceeded = False
+        self.time = 0.0
+
+    def __bool__(self):
+        return bool(self.result)
+
+    def __str__(self):
+        s = "VerificationReport(result={!s}, tier={!s}, {:d} gate pairs cancelled".format(
+                self.result, self.tier, self.cancelled)
+        if self.residue is not None:
+            s += ", {:d} gates left".format(len(self.residue.gates))
+        if self.vertices is not None:
+            s += ", {:d} vertices after reduction".format(self.vertices)
+        if self.budget_exceeded: s += ", budget exceeded"
+        return s + ", {:.3f}s)".format(self.time)
+
+    def __repr__(self):
+        return str(self)
+
+
+def _gate_qubits(gate, qubits):
+    """Returns the qubits a gate acts on. Gates we don't know the qubits of act on all of them."""
+    qs = [getattr(gate, a) for a in ("ctrl1", "ctrl2", "control", "target") if hasattr(gate, a)]
+    if hasattr(gate, "targets"): qs.extend(gate.targets)
+    return qs if qs else list(range(qubits))
+
+def _strip_common_prefix(gates1, gates2, qubits):
+    """Removes the gates both lists start with, where gates acting on different qubits
+    are allowed to commute. Returns the remaining gates of both lists and the number
+    of gates removed from each."""
+    qs1 = [_gate_qubits(g, qubits) for g in gates1]
+    fronts = [deque() for _ in range(qubits)]
+    for i, qs in enumerate(qs1):
+        for q in qs: fronts[q].append(i)
+    removed = set()
+    blocked = set()
+    rest2 = []
+    for j, g in enumerate(gates2):
+        if len(blocked) == qubits:
+            rest2.extend(gates2[j:])
+            break
+        qs = _gate_qubits(g, qubits)
+        if not blocked.intersection(qs):
+            heads = set(fronts[q][0] if fronts[q] else None for q in qs)
+            i = heads.pop() if len(heads) == 1 else None
+            if i is not None and set(qs1[i]) == set(qs) and gates1[i] == g:
+                for q in qs: fronts[q].popleft()
+                removed.add(i)
+                continue
+        # Nothing that comes after this gate on these qubits can be moved to the front
+        blocked.update(qs)
+        rest2.append(g)
+    rest1 = [g for i, g in enumerate(gates1) if i not in removed]
+    return rest1, rest2, len(removed)
+
+def cancel_common_gates(c1, c2):
+    """Cancels the gates of ``c1.adjoint()`` against those of ``c2``, starting from where
+    they meet and working outwards, and does the same from the outer ends inwards.
+    Returns circuits ``r1`` and ``r2`` such that ``c1`` and ``c2`` are equal if and only
+    if ``r1`` and ``r2`` are, together with the number of cancelled pairs of gates."""
+    if c1.qubits != c2.qubits: raise TypeError("Amount of qubits do not match")
+    q = c1.qubits
+    gates1, gates2, n = _strip_common_prefix(c1.gates, c2.gates, q)
+    gates1, gates2, m = _strip_common_prefix(gates1[::-1], gates2[::-1], q)
+    r1, r2 = Circuit(q), Circuit(q)
+    r1.gates, r2.gates = gates1[::-1], gates2[::-1]
+    return r1, r2, n + m
+
+
+class _OutOfBudget(Exception):
+    pass
+
+def _have_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return False
+    return True
+
+def _identity_wires(g):
+    """Returns True if the diagram consists of plain wires connecting every input to the
+    output on the same qubit, False if it consists of some other set of wires, and None
+    if it still has other vertices."""
+    if g.num_vertices() != len(g.inputs) + len(g.outputs): return None
+    outputs = set(g.outputs)
+    for v in g.inputs:
+        w = next(iter(g.neighbours(v)), None)
+        if (w not in outputs or g.qubit(w) != g.qubit(v) or
+                g.edge_type(g.edge(v,w)) != 1):
+            return False
+    return True
+
+def verify_equality(c1, c2, budget=None, max_tensor_qubits=10):
+    """Checks whether the circuits ``c1`` and ``c2`` implement the same unitary (up to a
+    global phase) using the tiers described at the top of this module.
+    ``budget`` is the number of seconds the ZX reduction may run for, after which it is
+    stopped and whatever is left is handed to the tensor comparison, which is only done
+    for at most ``max_tensor_qubits`` qubits.
+
+    :rtype: :class:`VerificationReport`"""
+    start = _timer()
+    report = VerificationReport()
+    r1, r2, report.cancelled = cancel_common_gates(c1, c2)
+    residue = r1.adjoint()
+    residue.add_circuit(r2)
+    report.residue = residue
+    if not residue.gates:
+        report.result, report.tier = True, 'cancellation'
+        report.time = _timer() - start
+        return report
+
+    g = residue.to_graph()
+    if budget is not None:
+        deadline = start + budget
+        def hook(record):
+            if _timer() > deadline: raise _OutOfBudget()
+        add_simp_hook(hook)
+    try:
+        full_reduce(g, quiet=True)
+    except _OutOfBudget:
+        report.budget_exceeded = True
+    finally:
+        if budget is not None: remove_simp_hook(hook)
+    report.vertices = g.num_vertices()
+    wires = _identity_wires(g)
+    if wires is not None:
+        report.result, report.tier = wires, 'zx'
+    elif residue.qubits <= max_tensor_qubits and _have_numpy():
+        from .tensor import tensorfy, compare_tensors
+        report.result = compare_tensors(tensorfy(g), Circuit(residue.qubits).to_tensor())
+        report.tier = 'tensor'
+    report.time = _timer() - start
+    return report
@@ -0,0 +1,57 @@
+# PyZX - Python library for quantum circuit rewriting 
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import sys
+import os
+import tempfile
+if __name__ == '__main__':
+    sys.path.append('..')
+    sys.path.append('.')
+
+from pyzx.batch import batch_optimize, circuit_files
+
+CIRCUIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'circuits', 'Fast')
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_circuit_files(self):
+        files = circuit_files([CIRCUIT_DIR], pattern='QFT[0-9]*_before')
+        self.assertEqual([os.path.basename(f) for f in files], ['QFT16_before', 'QFT8_before'])
+
+    def test_batch_optimize(self):
+        with tempfile.TemporaryDirectory() as d:
+            broken = os.path.join(d, 'broken.qc')
+            with open(broken, 'w') as f: f.write('.v a b\nBEGIN\nfoo a b\nEND\n')
+            sources = circuit_files([CIRCUIT_DIR], pattern='QFT[0-9]*_before') + [broken]
+            results = {r['name']: r for r in batch_optimize(sources, workers=2, output_dir=d)}
+            self.assertEqual(set(results), {'QFT16_before', 'QFT8_before', 'broken.qc'})
+            self.assertEqual(results['broken.qc']['status'], 'error')
+            for name in ('QFT16_before', 'QFT8_before'):
+                r = results[name]
+                self.assertEqual(r['status'], 'ok')
+                self.assertTrue(r['tcount_after'] <= r['tcount'])
+                self.assertTrue(os.path.exists(r['output']))
+
+    def test_timeout(self):
+        sources = circuit_files([CIRCUIT_DIR], pattern='Adder8_before')
+        results = list(batch_optimize(sources, workers=1, timeout=0.01))
+        self.assertEqual([r['status'] for r in results], ['timeout'])
+
+
+if __name__ == '__main__':
+    unittest.main()
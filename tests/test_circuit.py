@@ -16,7 +16,10 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import unittest
+from fractions import Fraction
 import random
+import os
+import io
 import sys
 if __name__ == '__main__':
     sys.path.append('..')
@@ -31,9 +34,10 @@ except ImportError:
 from pyzx.generate import cliffordT, cliffords
 from pyzx.simplify import clifford_simp
 from pyzx.extract import streaming_extract
-from pyzx.circuit import Circuit
+from pyzx.circuit import Circuit, QASMParser, T, ParityPhase
 
 SEED = 1337
+CIRCUIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'circuits', 'Fast')
 
 @unittest.skipUnless(np, "numpy needs to be installed for this to run")
 class TestCircuit(unittest.TestCase):
@@ -86,5 +90,137 @@ class TestCircuit(unittest.TestCase):
         t2 = c.to_tensor()
         self.assertTrue(compare_tensors(t,t2))
 
+    def test_verify_equality(self):
+        random.seed(SEED)
+        c = Circuit.from_graph(cliffordT(4, 60, 0.15))
+        r = c.verify_equality(c.copy(), report=True)
+        self.assertTrue(r.result)
+        self.assertEqual(r.tier, 'cancellation')
+        self.assertEqual(r.cancelled, len(c.gates))
+        g = c.to_graph()
+        clifford_simp(g, quiet=True)
+        c2 = streaming_extract(g)
+        r = c.verify_equality(c2, report=True)
+        self.assertTrue(r.result)
+        self.assertEqual(r.tier, 'zx')
+        c3 = c.copy()
+        c3.add_gate("SWAP", 0, 2)
+        r = c.verify_equality(c3, report=True)
+        self.assertFalse(r.result)
+        self.assertEqual(r.tier, 'zx')
+        self.assertEqual(len(r.residue.gates), 1)
+        c4 = c.copy()
+        c4.gates.insert(30, T(1))
+        r = c.verify_equality(c4, report=True)
+        self.assertFalse(r.result)
+        self.assertEqual(r.tier, 'tensor')
+
+QASM_CUSTOM = """OPENQASM 2.0; include "qelib1.inc";
+// A custom gate spread over several lines
+gate mygate a, b
+{
+  h b; cx a,
+     b; tdg b;
+}
+qreg q[2]; qreg r[1];
+mygate q[0], r[0]; rz(pi/4) q[1]; rz(-3*pi/4) q[1]; // comment; with a semicolon
+cx q, r[0];
+"""
+
+class TestQASM(unittest.TestCase):
+
+    def test_roundtrip(self):
+        random.seed(SEED)
+        c = Circuit.from_graph(cliffordT(4, 60, 0.15))
+        c2 = QASMParser().parse(c.to_qasm())
+        self.assertEqual(c.qubits, c2.qubits)
+        self.assertListEqual(c.gates, c2.gates)
+
+    def test_streaming(self):
+        p = QASMParser()
+        gates = p.iter_gates(QASM_CUSTOM.splitlines(True))
+        self.assertEqual(next(gates).name, 'HAD')
+        self.assertEqual(p.qubit_count, 3)
+        c = QASMParser().parse(QASM_CUSTOM)
+        self.assertEqual(c.qubits, 3)
+        self.assertEqual([g.name for g in c.gates],
+                         ['HAD', 'CNOT', 'T', 'ZPhase', 'ZPhase', 'CNOT', 'CNOT'])
+        self.assertEqual((c.gates[1].control, c.gates[1].target), (0, 2))
+        self.assertTrue(c.gates[2].adjoint)
+        self.assertEqual([g.phase for g in c.gates[3:5]], [Fraction(1,4), Fraction(-3,4)])
+        self.assertEqual([(g.control, g.target) for g in c.gates[5:]], [(0, 2), (1, 2)])
+
+    def test_errors(self):
+        with self.assertRaises(TypeError):
+            QASMParser().parse('include "qelib1.inc";\nqreg q[1];')
+        with self.assertRaises(TypeError):
+            QASMParser().parse('OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[1];\nh q[0]')
+
+    def test_write(self):
+        random.seed(SEED)
+        c = Circuit.from_graph(cliffordT(4, 60, 0.15))
+        for fmt, s in [('qasm', c.to_qasm()), ('qc', c.to_qc())]:
+            f = io.StringIO()
+            c.write(f, fmt, buffer_size=50)
+            self.assertEqual(f.getvalue(), s)
+        with self.assertRaises(TypeError):
+            c.write(io.StringIO(), 'tikz')
+
+
+class TestGateList(unittest.TestCase):
+
+    def setUp(self):
+        c = Circuit.load(os.path.join(CIRCUIT_DIR, 'tof_4_before'))
+        c.add_gate("ZPhase", 1, Fraction(1,3))
+        c.add_gate(ParityPhase(Fraction(1,4), 0, 2))
+        c.add_gate("SWAP", 0, 1)
+        c.add_gate("S", 2, adjoint=True)
+        self.c = c
+
+    def test_same_gates(self):
+        c = self.c
+        k = c.to_compact()
+        self.assertTrue(k.is_compact())
+        self.assertFalse(c.is_compact())
+        self.assertListEqual(list(k.gates), c.gates)
+        self.assertEqual(k.gates[-1], c.gates[-1])
+        self.assertListEqual(k.gates[2:5], c.gates[2:5])
+        self.assertEqual(k.tcount(), c.tcount())
+        self.assertEqual(k.twoqubitcount(), c.twoqubitcount())
+        self.assertEqual(k.stats(), c.stats())
+        b = k.to_basic_gates()
+        self.assertTrue(b.is_compact())
+        self.assertListEqual(list(b.gates), c.to_basic_gates().gates)
+        self.assertEqual(k.copy().gates, k.gates)
+
+    def test_editing(self):
+        k = Circuit(3, compact=True)
+        k.add_gate("CNOT", 0, 1)
+        k.add_gates("S T HAD", 2)
+        k.gates.insert(0, T(1, adjoint=True))
+        del k.gates[2]
+        g = k.gates[1]
+        g.control = 2
+        self.assertEqual(k.gates[1].control, 2)
+        h = g.copy()
+        h.control = 0
+        self.assertEqual(k.gates[1].control, 2)
+        self.assertEqual([str(g) for g in k.gates], ['T*(1)', 'CNOT(2,1)', 'T(2)', 'HAD(2)'])
+        self.assertEqual(k.tcount(), 2)
+        for g in k.gates: g.index = 1
+        self.assertTrue(all(g.index == 1 for g in k.gates))
+        k.gates.insert(0, h)
+        with self.assertRaises(RuntimeError):
+            g.target = 0
+        self.assertEqual(k.gates[-1].target, 2)
+
+    def test_qasm(self):
+        c = Circuit.from_graph(cliffordT(4, 60, 0.15))
+        k = QASMParser().parse_stream(c.to_qasm().splitlines(), compact=True)
+        self.assertTrue(k.is_compact())
+        self.assertEqual(k.qubits, c.qubits)
+        self.assertListEqual(list(k.gates), c.gates)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
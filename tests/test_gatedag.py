@@ -0,0 +1,103 @@
+# PyZX - Python library for quantum circuit rewriting 
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import random
+import os
+import sys
+if __name__ == '__main__':
+    sys.path.append('..')
+    sys.path.append('.')
+
+from fractions import Fraction
+
+from pyzx.circuit import Circuit
+from pyzx.gatedag import GateDAG
+from pyzx.optimize import basic_optimization
+
+SEED = 1337
+CIRCUIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'circuits', 'Fast')
+
+def random_circuit(qubits, depth):
+    c = Circuit(qubits)
+    for _ in range(depth):
+        r = random.random()
+        a, b = random.sample(range(qubits), 2)
+        if r < 0.25: c.add_gate("HAD", a)
+        elif r < 0.45: c.add_gate("CNOT", a, b)
+        elif r < 0.55: c.add_gate("CZ", a, b)
+        elif r < 0.75: c.add_gate("ZPhase", a, Fraction(random.randint(1,7), 4))
+        elif r < 0.85: c.add_gate("XPhase", a, Fraction(random.randint(1,3), 2))
+        else: c.add_gate("NOT", a)
+    return c
+
+
+class TestGateDAG(unittest.TestCase):
+
+    def test_editing(self):
+        c = Circuit(3)
+        c.add_gate("CNOT", 0, 1)
+        c.add_gate("T", 0)
+        c.add_gate("HAD", 1)
+        c.add_gate("CZ", 1, 2)
+        dag = GateDAG.from_circuit(c)
+        self.assertEqual(len(dag), 4)
+        self.assertEqual((dag.first[0], dag.last[0], dag.first[2]), (0, 1, 3))
+        self.assertEqual(list(dag.commuting_after(0, 0)), [1])
+        self.assertEqual(list(dag.commuting_after(0, 1)), [])
+        dag.remove(2)
+        self.assertEqual((dag.next[0][1], dag.prev[3][1]), (3, 0))
+        self.assertEqual([str(g) for g in dag.to_gates()], ['T(0)', 'CNOT(0,1)', 'CZ(1,2)'])
+
+    def test_cancellation(self):
+        c = Circuit(3)
+        c.add_gate("CNOT", 0, 1)
+        c.add_gate("S", 0)
+        c.add_gate("CNOT", 2, 1)
+        c.add_gate("CNOT", 0, 1)
+        c.add_gate("HAD", 2)
+        c.add_gate("CZ", 2, 0)
+        c.add_gate("HAD", 2)
+        c.add_gate("T", 0)
+        c.add_gate("T", 0)
+        dag = GateDAG.from_circuit(c)
+        self.assertEqual(dag.simplify(), 4)
+        c2 = Circuit(3)
+        c2.gates = dag.to_gates()
+        self.assertEqual([str(g) for g in c2.gates], ['Z(0)', 'CNOT(2,1)', 'CNOT(0,2)'])
+        self.assertTrue(c.verify_equality(c2))
+
+    def test_simplify_preserves_semantics(self):
+        random.seed(SEED)
+        for _ in range(20):
+            c = random_circuit(4, 40)
+            dag = GateDAG.from_circuit(c)
+            c2 = Circuit(4)
+            c2.gates = dag.to_gates()
+            self.assertTrue(c.verify_equality(c2))
+            dag.simplify()
+            c2.gates = dag.to_gates()
+            self.assertTrue(c.verify_equality(c2))
+
+    def test_basic_optimization(self):
+        c = Circuit.load(os.path.join(CIRCUIT_DIR, 'tof_4_before')).to_basic_gates()
+        c2 = basic_optimization(c.copy())
+        self.assertLessEqual(len(c2.gates), len(c.gates))
+        self.assertTrue(c.verify_equality(c2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,22 +18,26 @@
 import unittest
 from fractions import Fraction
 import sys
+import os
+import tempfile
 if __name__ == '__main__':
     sys.path.append('..')
     sys.path.append('.')
 
 from pyzx.graph import Graph
+from pyzx.io import graph_to_binary, binary_to_graph, save_binary, load_binary
 
 
 class TestGraphBasicMethods(unittest.TestCase):
+    backend = None
 
     def test_empty_graph(self):
-        g = Graph()
+        g = Graph(self.backend)
         self.assertEqual(g.num_vertices(),0)
         self.assertEqual(g.num_edges(),0)
 
     def test_add_remove_vertices(self):
-        g = Graph()
+        g = Graph(self.backend)
         v = g.add_vertex()
         self.assertEqual(g.num_vertices(),1)
         g.add_vertices(3)
@@ -42,7 +46,7 @@ class TestGraphBasicMethods(unittest.TestCase):
         self.assertEqual(g.num_vertices(),3)
 
     def test_edges(self):
-        g = Graph()
+        g = Graph(self.backend)
         v1, v2, v3 = g.add_vertices(3)
         g.add_edge((v1,v2))
         self.assertEqual(g.num_edges(),1)
@@ -59,7 +63,7 @@ class TestGraphBasicMethods(unittest.TestCase):
         self.assertFalse(g.connected(v1,v2))
 
     def test_set_attributes(self):
-        g = Graph()
+        g = Graph(self.backend)
         v = g.add_vertex()
         g.set_phase(v,1)
         self.assertEqual(g.phase(v),1)
@@ -70,8 +74,50 @@ class TestGraphBasicMethods(unittest.TestCase):
         g.set_qubit(v,2)
         self.assertEqual(g.qubit(v),2)
 
+    def test_int_phases(self):
+        g = Graph(self.backend)
+        v1, v2 = g.add_vertices(2)
+        g.set_phase(v1, Fraction(3,4))
+        g.add_to_phase(v1, Fraction(7,4))
+        self.assertEqual(g.phase(v1), Fraction(1,2))
+        self.assertEqual(g.phase(v2), 0)
+        d = g.phase_denominator()
+        self.assertEqual(g.int_phases()[v1]*2, d)
+        g.set_phase(v2, Fraction(-1,3))
+        d = g.phase_denominator()
+        self.assertEqual(d % 3, 0)
+        self.assertEqual(g.phase(v1), Fraction(1,2))
+        self.assertEqual(g.phase(v2), Fraction(5,3))
+        self.assertEqual(Fraction(g.int_phases()[v2], d), Fraction(5,3))
+        self.assertEqual(dict(g.phases().items()), {v1: Fraction(1,2), v2: Fraction(5,3)})
+
+    def test_indexes(self):
+        g = Graph(self.backend)
+        v1, v2, v3, v4 = g.add_vertices(4)
+        for v in (v1, v2, v3): g.set_type(v,1)
+        g.add_edges([(v1,v2),(v3,v2)],1)
+        g.add_edge((v3,v4),2)
+        g.set_phase(v1, Fraction(1,2))
+        g.set_phase(v2, Fraction(1,4))
+        g.set_phase(v3, 1)
+        self.assertEqual(set(g.edges_of_type(1)), {g.edge(v1,v2), g.edge(v2,v3)})
+        self.assertEqual(set(g.edges_of_type(2)), {g.edge(v3,v4)})
+        self.assertEqual(set(g.vertices_of_type(1)), {v1,v2,v3})
+        self.assertEqual(set(g.pauli_vertices()), {v3,v4})
+        self.assertEqual(set(g.clifford_vertices()), {v1,v3,v4})
+        g.set_edge_type(g.edge(v1,v2),2)
+        g.remove_vertex(v3)
+        g.set_type(v4,2)
+        g.add_to_phase(v1, Fraction(1,2))
+        self.assertEqual(set(g.edges_of_type(1)), set())
+        self.assertEqual(set(g.edges_of_type(2)), {g.edge(v1,v2)})
+        self.assertEqual(set(g.vertices_of_type(1)), {v1,v2})
+        self.assertEqual(set(g.vertices_of_type(2)), {v4})
+        self.assertEqual(set(g.pauli_vertices()), {v1,v4})
+        self.assertEqual(g.edge_set(), {g.edge(v1,v2)})
+
     def test_add_edge_table_same_type(self):
-        g = Graph()
+        g = Graph(self.backend)
         v1, v2 = g.add_vertices(2)
         g.set_type(v1,1)
         g.set_type(v2,1)
@@ -90,7 +136,7 @@ class TestGraphBasicMethods(unittest.TestCase):
         self.assertTrue((g.phase(v1)==1  and g.phase(v2)==0) or (g.phase(v1)==0 and g.phase(v2)==1))
 
     def test_add_edge_table_different_type(self):
-        g = Graph()
+        g = Graph(self.backend)
         v1, v2 = g.add_vertices(2)
         g.set_type(v1,1)
         g.set_type(v2,2)
@@ -109,7 +155,7 @@ class TestGraphBasicMethods(unittest.TestCase):
         self.assertTrue((g.phase(v1)==1  and g.phase(v2)==0) or (g.phase(v1)==0 and g.phase(v2)==1))
 
     def test_copy(self):
-        g = Graph()
+        g = Graph(self.backend)
         v1, v2 = g.add_vertices(2)
         g.add_edge((v1,v2),2)
         g2 = g.copy()
@@ -120,10 +166,11 @@ class TestGraphBasicMethods(unittest.TestCase):
 
 
 class TestGraphCircuitMethods(unittest.TestCase):
+    backend = None
 
     def setUp(self):
         """Sets up a two qubit circuit containing a single CNOT with some phases."""
-        self.graph = Graph()
+        self.graph = Graph(self.backend)
         g = self.graph
         i1 = g.add_vertex(0,0,0) #add_vertex(type,qubit_index,row_index,phase=0)
         i2 = g.add_vertex(0,1,0)
@@ -172,5 +219,58 @@ class TestGraphCircuitMethods(unittest.TestCase):
         num_hadamards = len([e for e in g2.edges() if g2.edge_type(e)==2])
         self.assertEqual(num_hadamards, 0)
 
+    def test_binary_roundtrip(self):
+        g = self.graph
+        g.set_edge_type(g.edge(self.v,self.o1),2)
+        g.set_phase(self.w, Fraction(1,3))
+        u = g.add_vertex(1,0,0.5)
+        g.remove_vertex(u)
+        verts = list(g.vertices())
+        for backend in (None, 'array'):
+            g2 = binary_to_graph(graph_to_binary(g), backend)
+            self.assertEqual(list(g2.vertices()), list(range(len(verts))))
+            self.assertEqual(g2.num_edges(), g.num_edges())
+            for i,v in enumerate(verts):
+                self.assertEqual((g2.type(i),g2.phase(i),g2.qubit(i),g2.row(i)),
+                                 (g.type(v),g.phase(v),g.qubit(v),g.row(v)))
+            self.assertEqual(g2.edge_type(g2.edge(verts.index(self.v),verts.index(self.o1))), 2)
+            self.assertEqual(g2.inputs, [verts.index(v) for v in g.inputs])
+            self.assertEqual(g2.outputs, [verts.index(v) for v in g.outputs])
+        with tempfile.TemporaryDirectory() as d:
+            fname = os.path.join(d, 'g.zxb')
+            save_binary(g, fname)
+            for mmap in (True, False):
+                g2 = load_binary(fname, self.backend, mmap=mmap)
+                self.assertEqual(g2.num_edges(), g.num_edges())
+                self.assertEqual(g2.phase(verts.index(self.w)), Fraction(1,3))
+        with self.assertRaises(ValueError):
+            binary_to_graph(graph_to_binary(g)[:-16])
+
+
+class TestGraphArrayBasicMethods(TestGraphBasicMethods):
+    backend = 'array'
+
+    def test_remove_vertex_removes_edges(self):
+        g = Graph(self.backend)
+        v1, v2, v3 = g.add_vertices(3)
+        g.add_edges([(v1,v2),(v2,v3)])
+        g.remove_vertex(v2)
+        self.assertEqual(g.num_edges(),0)
+        self.assertEqual(list(g.vertices()),[v1,v3])
+        self.assertEqual(g.vertex_degree(v1),0)
+        self.assertEqual(g.vindex(),3)
+
+    def test_unset_positions(self):
+        g = Graph(self.backend)
+        v = g.add_vertex()
+        self.assertEqual((g.qubit(v),g.row(v)),(-1,-1))
+        self.assertFalse(v in g.qubits())
+        g.set_row(v,2.5)
+        self.assertEqual(g.rows()[v],2.5)
+
+
+class TestGraphArrayCircuitMethods(TestGraphCircuitMethods):
+    backend = 'array'
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+# PyZX - Python library for quantum circuit rewriting 
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import sys
+import os
+import subprocess
+if __name__ == '__main__':
+    sys.path.append('..')
+    sys.path.append('.')
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, stdout=subprocess.PIPE,
+                          universal_newlines=True, check=True).stdout.split()
+
+
+class TestImports(unittest.TestCase):
+
+    def test_no_heavy_imports(self):
+        heavy = ['numpy', 'matplotlib', 'IPython', 'multiprocessing', 'pyzx.tensor', 'pyzx.todd']
+        loaded = run_python("import sys, pyzx\n"
+                            "from pyzx.scripts import circ2circ\n"
+                            "print(' '.join(m for m in {!r} if m in sys.modules))".format(heavy))
+        self.assertEqual(loaded, [])
+
+    def test_lazy_names(self):
+        import pyzx
+        from pyzx.tensor import compare_tensors
+        from pyzx import todd
+        self.assertIs(pyzx.compare_tensors, compare_tensors)
+        self.assertIs(pyzx.todd, todd)
+        self.assertIn('draw', dir(pyzx))
+        self.assertIn('tensorfy', pyzx.__all__)
+        with self.assertRaises(AttributeError):
+            pyzx.does_not_exist
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,31 +21,35 @@ if __name__ == '__main__':
     sys.path.append('..')
     sys.path.append('.')
 
-from pyzx.linalg import Mat2
+import random
+import itertools
+
+from pyzx.linalg import Mat2, Mat2Packed, IncrementalBasis, greedy_reduction, find_minimal_sums
 
 
 class TestMat2(unittest.TestCase):
+    mat = Mat2
 
     def setUp(self):
-        self.m1 = Mat2([[1,0],
-                        [1,1]])
-        self.m2 = Mat2([[1,1],
-                        [1,1]])
-        self.m3 = Mat2([[1,0,1,1,0],
-                        [1,1,1,0,0],
-                        [1,1,0,0,1],
-                        [0,1,0,1,0],
-                        [0,0,1,1,0]])
-        self.m4 = Mat2([[1,0,1,0,0],
-                        [0,1,1,0,0],
-                        [1,1,0,0,1],
-                        [0,1,0,1,0],
-                        [0,0,0,1,1]])
+        self.m1 = self.mat([[1,0],
+                            [1,1]])
+        self.m2 = self.mat([[1,1],
+                            [1,1]])
+        self.m3 = self.mat([[1,0,1,1,0],
+                            [1,1,1,0,0],
+                            [1,1,0,0,1],
+                            [0,1,0,1,0],
+                            [0,0,1,1,0]])
+        self.m4 = self.mat([[1,0,1,0,0],
+                            [0,1,1,0,0],
+                            [1,1,0,0,1],
+                            [0,1,0,1,0],
+                            [0,0,0,1,1]])
 
     def test_matrix_multiplication(self):
-        result = Mat2([[1,1],[0,0]])
+        result = self.mat([[1,1],[0,0]])
         self.assertEqual(self.m1*self.m2, result)
-        result = Mat2([[0,1],[0,1]])
+        result = self.mat([[0,1],[0,1]])
         self.assertEqual(self.m2*self.m1, result)
 
     def test_gauss_makes_upper_triangular(self):
@@ -64,14 +68,14 @@ class TestMat2(unittest.TestCase):
 
     def test_inverse(self):
         inv = self.m4.inverse()
-        self.assertEqual(inv*self.m4, Mat2.id(5))
-        self.assertEqual(self.m4*inv, Mat2.id(5))
+        self.assertEqual(inv*self.m4, self.mat.id(5))
+        self.assertEqual(self.m4*inv, self.mat.id(5))
 
     def test_solve_inhomogeneous_equation(self):
-        b = Mat2([[1],[1],[0],[0],[0]])
+        b = self.mat([[1],[1],[0],[0],[0]])
         x = self.m3.solve(b)
         self.assertEqual(self.m3*x, b)
-        b = Mat2([[1],[0],[1],[1],[0]])
+        b = self.mat([[1],[0],[1],[1],[0]])
         x = self.m4.solve(b)
         self.assertEqual(self.m4*x, b)
 
@@ -81,5 +85,114 @@ class TestMat2(unittest.TestCase):
         self.assertEqual(m1.rows(),self.m3.rank())
         self.assertEqual(m0*m1, self.m3)
 
+
+class TestMat2Packed(TestMat2):
+    mat = Mat2Packed
+
+    def test_same_row_operations_as_mat2(self):
+        random.seed(1337)
+        for i in range(20):
+            r, c = random.randint(1,10), random.randint(1,10)
+            data = [[random.randint(0,1) for _ in range(c)] for _ in range(r)]
+            m, p = Mat2([list(row) for row in data]), Mat2Packed(data)
+            xm, xp = Mat2.id(r), Mat2Packed.id(r)
+            ym, yp = Mat2.id(r), Mat2Packed.id(r)
+            with self.subTest(i=i):
+                self.assertEqual(m.gauss(True, xm, ym, 3), p.gauss(True, xp, yp, 3))
+                self.assertEqual(m.data, p.data)
+                self.assertEqual(xm.data, xp.data)
+                self.assertEqual(ym.data, yp.data)
+                self.assertEqual(Mat2(data).nullspace(), Mat2Packed(data).nullspace())
+
+    def test_data_view(self):
+        m = Mat2Packed([[1,0,1],[0,1,1]])
+        self.assertEqual(m.data[0][2], 1)
+        self.assertEqual(len(m.data), 2)
+        self.assertEqual(len(m.data[1]), 3)
+        m.data[0][2] = 0
+        m.data[1][0] = 1
+        self.assertEqual(m.packed, [0b001, 0b111])
+        m.data.append([0,0,1])
+        m.data[0] = [0,1,0]
+        self.assertEqual(m.data, [[0,1,0],[1,1,1],[0,0,1]])
+        self.assertEqual(m.rank(), 3)
+        with self.assertRaises(IndexError):
+            m.data[0][3]
+
+    def test_same_greedy_reduction_as_mat2(self):
+        m = [[1,1,0,0],[0,1,1,0],[0,0,1,1],[1,0,1,1]]
+        self.assertEqual(greedy_reduction(Mat2(m)), greedy_reduction(Mat2Packed(m)))
+
+
+class TestMinimalSums(unittest.TestCase):
+
+    def brute_force(self, m):
+        rows = m.packed
+        for k in range(1, len(rows)+1):
+            for comb in itertools.combinations(range(len(rows)), k):
+                total = 0
+                for i in comb: total ^= rows[i]
+                if total and not total & (total-1): return k
+        return None
+
+    def assertReduces(self, m, indices):
+        total = 0
+        for i in indices: total ^= m.packed[i]
+        self.assertTrue(total and not total & (total-1))
+
+    def test_minimal(self):
+        random.seed(1337)
+        for i in range(50):
+            r, c = random.randint(1,7), random.randint(1,7)
+            m = Mat2Packed([[random.randint(0,1) for _ in range(c)] for _ in range(r)])
+            with self.subTest(i=i):
+                k = self.brute_force(m)
+                indices = find_minimal_sums(m)
+                if k is None: self.assertIsNone(indices)
+                elif k == 1: self.assertEqual(indices, [])
+                else:
+                    self.assertEqual(len(indices), k)
+                    self.assertReduces(m, indices)
+
+    def test_budget(self):
+        random.seed(1337)
+        m = Mat2Packed([[random.randint(0,1) for _ in range(40)] for _ in range(40)])
+        indices = find_minimal_sums(m, max_visited=1000)
+        self.assertReduces(m, indices)
+
+
+class TestIncrementalBasis(unittest.TestCase):
+
+    def test_matches_gauss(self):
+        random.seed(1337)
+        b = IncrementalBasis()
+        rows = {}
+        for i in range(300):
+            op = random.random()
+            if op < 0.5 or len(rows) < 2:
+                rows[i] = random.getrandbits(8) & random.getrandbits(8)
+                b.add_row(i, rows[i])
+            elif op < 0.8:
+                k = random.choice(list(rows))
+                b.remove_row(k)
+                del rows[k]
+            else:
+                k1, k2 = random.sample(list(rows), 2)
+                b.row_add(k1, k2)
+                rows[k2] ^= rows[k1]
+            with self.subTest(i=i):
+                m = Mat2Packed(list(rows.values()), 8)
+                self.assertEqual(b.rank(), m.rank())
+                m.gauss(full_reduce=True)
+                unit = any(r and not r & (r-1) for r in m.packed)
+                self.assertEqual(b.has_unit_vector(), unit)
+                keys = b.unit_combination()
+                self.assertEqual(keys is not None, unit)
+                if keys:
+                    total = 0
+                    for k in keys: total ^= rows[k]
+                    self.assertEqual(total & (total-1), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+# PyZX - Python library for quantum circuit rewriting 
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import random
+import sys
+import multiprocessing as mp
+if __name__ == '__main__':
+    sys.path.append('..')
+    sys.path.append('.')
+
+from fractions import Fraction
+
+from pyzx.circuit import Circuit, CNOT, CZ, ZPhase
+from pyzx.phasepoly import BitPolynomial, optimize_block, optimize_blocks, parity_network
+
+SEED = 1337
+
+
+class TestPhasePoly(unittest.TestCase):
+
+    def test_bit_polynomial(self):
+        p = BitPolynomial.parity(0b011)
+        q = BitPolynomial.parity(0b110)
+        # (x0 + x1)(x1 + x2) = x0x1 + x0x2 + x1 + x1x2
+        self.assertEqual((p*q).terms, {0b011: 1, 0b101: 1, 0b010: 1, 0b110: 1})
+        self.assertEqual((p + p).terms, {})
+        r = BitPolynomial(modulus=8)
+        r.add_term(0b101, 5)
+        r.add_term(0b101, 3)
+        self.assertEqual(r.terms, {})
+        self.assertEqual(str(3*BitPolynomial.parity(0b101, modulus=8)), "3x0 + 3x2")
+
+    def test_parity_network(self):
+        random.seed(SEED)
+        parities = [random.randrange(1, 1 << 5) for _ in range(8)]
+        rows = [1 << i for i in range(5)]
+        seen = set(rows)
+        for cnot in parity_network(5, [[(p >> i) & 1 for i in range(5)] for p in parities]):
+            rows[cnot.target] ^= rows[cnot.control]
+            seen.add(rows[cnot.target])
+        self.assertTrue(seen.issuperset(parities))
+
+    def test_optimize_block(self):
+        random.seed(SEED)
+        block = []
+        for _ in range(40):
+            r = random.random()
+            a, b = random.sample(range(4), 2)
+            if r < 0.5: block.append(CNOT(a, b))
+            elif r < 0.6: block.append(CZ(a, b))
+            else: block.append(ZPhase(a, Fraction(random.choice([1,2,3,5]), 4)))
+        c = Circuit(4)
+        c.gates = block
+        c2 = Circuit(4)
+        c2.gates = optimize_block([g.copy() for g in block], 4)
+        self.assertTrue(c.verify_equality(c2))
+
+    def test_optimize_blocks(self):
+        random.seed(SEED)
+        blocks = []
+        for _ in range(4):
+            block = []
+            for _ in range(20):
+                a, b = random.sample(range(4), 2)
+                if random.random() < 0.6: block.append(CNOT(a, b))
+                else: block.append(ZPhase(a, Fraction(1,4)))
+            blocks.append(block)
+        serial = [[str(g) for g in b] for b in optimize_blocks(blocks, 4)]
+        for options in [{'workers': 2}, {'workers': 2, 'timeout': 60}]:
+            result = optimize_blocks(blocks, 4, **options)
+            self.assertEqual([[str(g) for g in b] for b in result], serial)
+        # A block that runs out of time is returned as it was, in its own place
+        slow = []
+        for _ in range(800):
+            a, b = random.sample(range(40), 2)
+            if random.random() < 0.6: slow.append(CNOT(a, b))
+            else: slow.append(ZPhase(a, Fraction(1,4)))
+        result = optimize_blocks(blocks[:2] + [slow] + blocks[2:], 40, workers=2, timeout=0.2)
+        self.assertEqual(len(result), len(blocks) + 1)
+        self.assertIs(result[2], slow)
+        # Errors are passed on, without leaving worker processes behind
+        with self.assertRaises(IndexError):
+            optimize_blocks(blocks + [[CNOT(0, 7)]], 4, workers=2)
+        self.assertEqual(mp.active_children(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
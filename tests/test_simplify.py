@@ -18,6 +18,7 @@
 import unittest
 import random
 import sys
+import json
 if __name__ == '__main__':
     sys.path.append('..')
     sys.path.append('.')
@@ -29,21 +30,38 @@ except ImportError:
     np = None
 
 from pyzx.generate import cliffordT
+from pyzx.circuit import Circuit
 from pyzx.simplify import *
+from pyzx.extract import streaming_extract
+from pyzx.rules import match_spider_parallel, match_ids_parallel, match_pivot_parallel, match_lcomp_parallel
 
 SEED = 1337
 
+def random_circuit(qubits, depth):
+    """A random circuit whose graph has regular edges between Z-spiders."""
+    c = Circuit(qubits)
+    for _ in range(depth):
+        r = random.random()
+        a, b = random.sample(range(qubits), 2)
+        if r < 0.4: c.add_gate("CNOT", a, b)
+        elif r < 0.6: c.add_gate("HAD", a)
+        elif r < 0.7: c.add_gate("CZ", a, b)
+        elif r < 0.85: c.add_gate("T", a)
+        else: c.add_gate("S", a)
+    return c
+
 @unittest.skipUnless(np, "numpy needs to be installed for this to run")
 class TestSimplify(unittest.TestCase):
+    backend = None
 
     def setUp(self):
         random.seed(SEED)
         self.circuits = []
-        self.circuits.append(cliffordT(3,20,0.3))
-        self.circuits.append(cliffordT(3,10,0.1))
-        self.circuits.append(cliffordT(4,30,0.3))
-        self.circuits.append(cliffordT(5,50,0.08))
-        self.circuits.append(cliffordT(4,80,0.1))
+        self.circuits.append(cliffordT(3,20,0.3,backend=self.backend))
+        self.circuits.append(cliffordT(3,10,0.1,backend=self.backend))
+        self.circuits.append(cliffordT(4,30,0.3,backend=self.backend))
+        self.circuits.append(cliffordT(5,50,0.08,backend=self.backend))
+        self.circuits.append(cliffordT(4,80,0.1,backend=self.backend))
 
     def func_test(self, func, prepare=None):
         for i,c in enumerate(self.circuits):
@@ -74,6 +92,89 @@ class TestSimplify(unittest.TestCase):
     def test_clifford_simp(self):
         self.func_test(clifford_simp)
 
+    def test_dense_pass(self):
+        self.func_test(dense_pass,prepare=[spider_simp,to_gh,spider_simp])
+        for c in self.circuits:
+            clifford_simp(c, quiet=True, dense=True)
+            self.assertFalse(match_pivot_parallel(c))
+            self.assertFalse(match_lcomp_parallel(c))
+
+    def test_dense_circuit_graph(self):
+        random.seed(SEED)
+        for i in range(3):
+            c = random_circuit(6,100)
+            g = c.to_graph(backend=self.backend)
+            with self.subTest(i=i):
+                full_reduce(g, quiet=True, dense=True)
+                self.assertTrue(compare_tensors(c.to_tensor(),tensorfy(g)))
+
+    def test_incremental_fixpoint(self):
+        random.seed(SEED)
+        for i in range(5):
+            g = cliffordT(6,200,0.1,backend=self.backend)
+            with self.subTest(i=i):
+                spider_simp(g, quiet=True)
+                self.assertFalse(match_spider_parallel(g))
+                to_gh(g)
+                id_simp(g, quiet=True)
+                self.assertFalse(match_ids_parallel(g))
+                spider_simp(g, quiet=True)
+                pivot_simp(g, quiet=True)
+                self.assertFalse(match_pivot_parallel(g))
+                lcomp_simp(g, quiet=True)
+                self.assertFalse(match_lcomp_parallel(g))
+
+    def test_parallel_clifford_simp(self):
+        random.seed(SEED)
+        g = cliffordT(4,400,0.02,backend=self.backend)
+        t = tensorfy(g)
+        clifford_simp(g, quiet=True, workers=2)
+        self.assertFalse(match_pivot_parallel(g))
+        self.assertFalse(match_lcomp_parallel(g))
+        c = streaming_extract(g)
+        self.assertTrue(compare_tensors(t,c.to_tensor()))
+
+    def test_parallel_circuit_graph(self):
+        random.seed(SEED)
+        for i in range(3):
+            c = random_circuit(6,500)
+            g = c.to_graph(backend=self.backend)
+            with self.subTest(i=i):
+                full_reduce(g, quiet=True, workers=2)
+                self.assertTrue(compare_tensors(c.to_tensor(),tensorfy(g)))
+
+    def test_simp_stats(self):
+        random.seed(SEED)
+        g = cliffordT(4,100,0.1,backend=self.backend)
+        t, nv = tcount(g), g.num_vertices()
+        with SimpStats() as stats:
+            full_reduce(g, quiet=True)
+        self.assertTrue(stats.runs)
+        n = len(stats.runs)
+        spider_simp(g, quiet=True)
+        self.assertEqual(len(stats.runs), n)
+        summary = json.loads(stats.to_json())['rules']
+        self.assertIn('spider_simp', summary)
+        self.assertEqual(sum(d['tcount'] for d in summary.values()), tcount(g) - t)
+        self.assertEqual(sum(d['vertices'] for d in summary.values()), g.num_vertices() - nv)
+        for r in stats.runs:
+            self.assertEqual(len(r['iterations']), sum(1 for it in r['iterations'] if it['matches'] > 0))
+
+    def test_region_simp_keeps_hooks(self):
+        from pyzx.simplify import _region_payloads, _region_interior_simp
+        random.seed(SEED)
+        g = cliffordT(4,100,0.1,backend=self.backend)
+        with SimpStats() as stats:
+            for payload in _region_payloads(g, 2, 0):
+                _region_interior_simp(payload)
+            spider_simp(g, quiet=True)
+        self.assertIn('spider_simp', stats.summary())
+        self.assertNotIn('pivot_simp', stats.summary())
+
+
+class TestSimplifyArray(TestSimplify):
+    backend = 'array'
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
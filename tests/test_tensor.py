@@ -25,12 +25,13 @@ if __name__ == '__main__':
 
 try:
     import numpy as np
-    from pyzx.tensor import tensorfy, compare_tensors, compose_tensors, adjoint
+    from pyzx.tensor import tensorfy, compare_tensors, compose_tensors, adjoint, plan_contraction
 except ImportError:
     np = None
 
 from pyzx.graph import Graph
-from pyzx.generate import cliffords
+from pyzx.generate import cliffords, cliffordT
+from pyzx.simplify import full_reduce
 from pyzx.circuit import Circuit
 
 SEED = 1337
@@ -125,6 +126,36 @@ class TestTensor(unittest.TestCase):
         circ_adj = tensorfy(circ.adjoint())
         self.assertTrue(compare_tensors(t_adj,circ_adj))
 
+    def test_contraction_plan(self):
+        random.seed(SEED)
+        g = cliffordT(4, 60)
+        plan = plan_contraction(g)
+        self.assertEqual(plan.sliced, [])
+        self.assertTrue(plan.peak_memory > 0)
+        t = tensorfy(g, plan=plan)
+        self.assertTrue(compare_tensors(t, tensorfy(g)))
+        h = g.copy()
+        full_reduce(h)
+        self.assertTrue(compare_tensors(t, tensorfy(h)))
+
+    def test_sliced_contraction(self):
+        random.seed(SEED)
+        g = cliffordT(4, 150) # deep enough that the intermediate tensors outgrow the output
+        full_reduce(g)
+        plan = plan_contraction(g)
+        sliced = plan_contraction(g, max_memory=plan.peak_memory // 2)
+        self.assertTrue(sliced.sliced)
+        self.assertTrue(sliced.peak_memory <= plan.peak_memory // 2)
+        self.assertTrue(np.allclose(tensorfy(g, plan=plan), tensorfy(g, plan=sliced)))
+
+    def test_memory_cap(self):
+        random.seed(SEED)
+        g = cliffordT(4, 60)
+        with self.assertRaises(MemoryError):
+            plan_contraction(g, max_memory=1024, slicing=False)
+        with self.assertRaises(MemoryError):
+            tensorfy(g, max_memory=16) # the output alone does not fit
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+# PyZX - Python library for quantum circuit rewriting 
+#        and optimisation using the ZX-calculus
+# Copyright (C) 2018 - Aleks Kissinger and John van de Wetering
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+if __name__ == '__main__':
+    sys.path.append('..')
+    sys.path.append('.')
+
+try:
+    import numpy as np
+    from pyzx.tensor import compare_tensors
+except ImportError:
+    np = None
+
+from pyzx.linalg import Mat2
+from pyzx.circuit import Circuit
+from pyzx.todd import (do_todd_single, todd_packed, todd_simp, todd_restarts, remove_trivial_cols,
+                       find_todd_match_packed, remove_trivial_cols_packed)
+
+SEED = 1337
+
+def random_parity_matrix(qubits, terms):
+    cols = [[random.randint(0,1) for _ in range(qubits)] for _ in range(terms)]
+    m = Mat2(cols)
+    remove_trivial_cols(m)
+    return m.transpose()
+
+
+class TestTODD(unittest.TestCase):
+
+    @unittest.skipUnless(np, "numpy needs to be installed for this to run")
+    def test_packed_same_as_python(self):
+        random.seed(SEED)
+        for _ in range(10):
+            qubits = random.randint(3, 6)
+            m = random_parity_matrix(qubits, random.randint(4, 16))
+            cols = [sum(v << i for i, v in enumerate(col)) for col in m.transpose().data]
+            while True:
+                m, reduced = do_todd_single(m)
+                if not reduced: break
+            cols = todd_packed(cols, qubits)
+            self.assertEqual(m.transpose().data,
+                             [[(c >> i) & 1 for i in range(qubits)] for c in cols])
+
+    def test_restarts(self):
+        random.seed(SEED)
+        m = random_parity_matrix(6, 30)
+        m1 = todd_restarts(m, 4, seed=3)
+        self.assertEqual(todd_restarts(m, 4, seed=3, workers=2), m1)
+        self.assertEqual(todd_restarts(m, 1, seed=3), todd_restarts(m, 4, seed=3, target=m.cols()))
+        self.assertLessEqual(m1.cols(), todd_restarts(m, 1, seed=3).cols())
+        self.assertEqual(m1.rows(), 6)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for _ in range(2):
+                self.assertEqual(todd_restarts(m, 4, seed=3, executor=executor), m1)
+
+    def test_deadline(self):
+        random.seed(SEED)
+        m = random_parity_matrix(6, 30)
+        cols = [sum(v << i for i, v in enumerate(col)) for col in m.transpose().data]
+        self.assertIsNotNone(find_todd_match_packed(cols, 6)[2])
+        self.assertIsNone(find_todd_match_packed(cols, 6, deadline=time.time())[2])
+        self.assertEqual(todd_packed(cols, 6, deadline=time.time()),
+                         remove_trivial_cols_packed(cols))
+
+    def test_todd_simp(self):
+        random.seed(SEED)
+        c = Circuit(4)
+        for _ in range(40):
+            r = random.random()
+            a, b = random.sample(range(4), 2)
+            if r < 0.5: c.add_gate("CNOT", a, b)
+            elif r < 0.7: c.add_gate("CZ", a, b)
+            else: c.add_gate("T", a)
+        gates, perm = todd_simp(c.gates, c.qubits)
+        self.assertEqual(perm, {i:i for i in range(4)})
+        c2 = Circuit(4)
+        c2.gates = gates
+        self.assertLessEqual(c2.tcount(), c.tcount())
+        if np is not None:
+            self.assertTrue(compare_tensors(c.to_tensor(), c2.to_tensor()))
+
+
+if __name__ == '__main__':
+    unittest.main()